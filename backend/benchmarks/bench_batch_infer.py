@@ -0,0 +1,112 @@
+"""批量推理基准：逐张调用 vs 批量调用（/infer/batch/run 使用的路径）的吞吐量（图片/秒）
+
+用法（在 backend 目录下）：
+    python benchmarks/bench_batch_infer.py --model-id test_model --images 64 --batch-sizes 1,4,8,16
+    python benchmarks/bench_batch_infer.py --weights path/to/best.pt --imgsz 640 --image-dir some/images
+
+- per_image：每张图片单独调用一次 model(image)，即批量推理改造前的做法
+- batched(N)：与 batch_infer 相同，先 letterbox 预处理一次，再按形状分组、每 N 张一次前向推理
+
+单核 CPU 上前向计算占主导，批量带来的收益有限；多核 CPU 和 GPU 上吞吐量应随批大小提升。
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from src.core.settings import settings  # noqa: E402
+from src.services.infer_service import (  # noqa: E402
+    _group_by_shape, _infer_batch_job, _parse_results, _prepare_images_job,
+)
+
+
+def _resolve_weights(args) -> Path:
+    if args.weights:
+        return Path(args.weights)
+    model_dir = settings.REGISTRY_DIR / args.model_id
+    with open(model_dir / "model.json", "r", encoding="utf-8") as f:
+        weights_path = Path(json.load(f)["weights_path"])
+    return weights_path if weights_path.is_absolute() else model_dir / weights_path
+
+
+def _load_images(args) -> list:
+    if args.image_dir:
+        paths = sorted(p for p in Path(args.image_dir).iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+        images = [cv2.imread(str(p)) for p in paths]
+        images = [image for image in images if image is not None]
+        if not images:
+            raise SystemExit(f"No images found in {args.image_dir}")
+        return [images[i % len(images)] for i in range(args.images)]
+    # 随机图片（固定尺寸，批次不会因形状不同而拆分）
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(args.images)]
+
+
+def _per_image(model, images, model_meta, options):
+    for image in images:
+        _parse_results(model(image, verbose=False, **options), model_meta)
+
+
+def _batched(model, images, model_meta, options, batch_size):
+    prepared = _prepare_images_job(images, options["imgsz"])
+    sizes = [(image.shape[1], image.shape[0]) for image in images]
+    for group in _group_by_shape(prepared):
+        for start in range(0, len(group), batch_size):
+            chunk = group[start:start + batch_size]
+            _infer_batch_job(model, [prepared[i] for i in chunk], [sizes[i] for i in chunk], model_meta, options)
+
+
+def _measure(fn, images, repeat) -> float:
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = max(best, len(images) / (time.perf_counter() - start))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-id", default="test_model")
+    parser.add_argument("--weights", default=None, help="权重或导出模型路径（优先于 --model-id）")
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--image-dir", default=None)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--repeat", type=int, default=3, help="每种方式重复次数，取最好的一次")
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+
+    weights_path = _resolve_weights(args)
+    model = YOLO(str(weights_path), task="detect")
+    model_meta = {"classes": list(model.names.values()) if isinstance(model.names, dict) else list(model.names)}
+    options = {"conf": args.conf, "imgsz": args.imgsz}
+    images = _load_images(args)
+
+    # 预热（首次推理包含初始化）
+    model(images[0], verbose=False, **options)
+
+    print(f"weights: {weights_path}")
+    print(f"images: {len(images)} x {images[0].shape[1]}x{images[0].shape[0]}, imgsz={args.imgsz}, repeat={args.repeat}")
+    baseline = _measure(lambda: _per_image(model, images, model_meta, options), images, args.repeat)
+    print(f"{'per_image':<14}{baseline:>10.2f} img/s")
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        throughput = _measure(
+            lambda: _batched(model, images, model_meta, options, batch_size), images, args.repeat
+        )
+        print(f"{f'batched({batch_size})':<14}{throughput:>10.2f} img/s  x{throughput / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
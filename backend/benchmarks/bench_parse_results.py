@@ -0,0 +1,97 @@
+"""推理结果解析基准：逐框解析（原实现）vs 整体拷贝为 NumPy 数组后解析（_parse_results）
+
+用法（在 backend 目录下）：
+    python benchmarks/bench_parse_results.py --boxes 10,100,300 --repeat 200
+
+使用随机生成的 ultralytics Results（不需要模型），先检查两种实现输出完全一致
+（图片接口的 x1/y1/x2/y2 格式和视频接口的整数 bbox 格式），再比较单次解析耗时。
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+import numpy as np  # noqa: E402
+import torch  # noqa: E402
+from ultralytics.engine.results import Results  # noqa: E402
+
+from src.services.infer_service import _parse_results  # noqa: E402
+
+
+def _legacy_parse_results(results, model_meta, int_bbox: bool = False):
+    """原实现：逐框访问张量"""
+    detections = []
+    for result in results:
+        boxes = result.boxes
+        for i in range(len(boxes)):
+            box = boxes[i]
+            if int_bbox:
+                x1, y1, x2, y2 = [int(v) for v in box.xyxy[0].tolist()]
+            else:
+                x1, y1, x2, y2 = box.xyxy[0].tolist()
+            conf = float(box.conf[0])
+            class_id = int(box.cls[0])
+            classes = model_meta.get("classes", [])
+            class_name = classes[class_id] if class_id < len(classes) else f"class_{class_id}"
+            if int_bbox:
+                detections.append({"class_id": class_id, "class_name": class_name, "conf": conf,
+                                   "bbox": [x1, y1, x2, y2]})
+            else:
+                detections.append({"class_id": class_id, "class_name": class_name, "conf": conf,
+                                   "x1": x1, "y1": y1, "x2": x2, "y2": y2})
+    return detections
+
+
+def _make_results(num_boxes: int, num_classes: int, width: int = 640, height: int = 480, seed: int = 0):
+    """随机生成一张图片的检测结果（部分类别 id 超出类别表，覆盖 class_{id} 分支）"""
+    rng = np.random.default_rng(seed)
+    x1 = rng.uniform(0, width - 1, num_boxes)
+    y1 = rng.uniform(0, height - 1, num_boxes)
+    x2 = np.minimum(x1 + rng.uniform(1, 200, num_boxes), width)
+    y2 = np.minimum(y1 + rng.uniform(1, 200, num_boxes), height)
+    conf = rng.uniform(0.25, 1.0, num_boxes)
+    cls = rng.integers(0, num_classes + 2, num_boxes)
+    data = torch.tensor(np.stack([x1, y1, x2, y2, conf, cls], axis=1), dtype=torch.float32)
+    names = {i: f"cls{i}" for i in range(num_classes + 2)}
+    orig_img = np.zeros((height, width, 3), dtype=np.uint8)
+    return [Results(orig_img, path="bench.jpg", names=names, boxes=data)]
+
+
+def _time_per_call(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boxes", default="1,10,100,300", help="每张图片的检测框数量，逗号分隔")
+    parser.add_argument("--classes", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    model_meta = {"classes": [f"cls{i}" for i in range(args.classes)]}
+
+    print(f"{'boxes':>6}  {'mode':<8}{'per-box ms':>12}{'numpy ms':>12}{'speedup':>10}")
+    for num_boxes in (int(n) for n in args.boxes.split(",")):
+        results = _make_results(num_boxes, args.classes, seed=num_boxes)
+        for int_bbox in (False, True):
+            expected = _legacy_parse_results(results, model_meta, int_bbox=int_bbox)
+            actual = _parse_results(results, model_meta, int_bbox=int_bbox)
+            if actual != expected:
+                raise SystemExit(f"Output mismatch: boxes={num_boxes}, int_bbox={int_bbox}")
+
+            legacy_ms = _time_per_call(lambda: _legacy_parse_results(results, model_meta, int_bbox), args.repeat)
+            numpy_ms = _time_per_call(lambda: _parse_results(results, model_meta, int_bbox), args.repeat)
+            mode = "bbox" if int_bbox else "xyxy"
+            print(f"{num_boxes:>6}  {mode:<8}{legacy_ms:>12.3f}{numpy_ms:>12.3f}{legacy_ms / numpy_ms:>9.1f}x")
+    print("outputs identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict
 from src.services.dataset_service import DatasetService
@@ -69,14 +69,13 @@ async def export_annotated_dataset(
     version: str = Query("v1", description="数据集版本")
 ):
     """导出标注后的数据集（包含图片和标签）"""
-    zip_path = await dataset_service.export_annotated_dataset(dataset_id, version)
-    if not zip_path:
+    zip_stream = await dataset_service.export_annotated_dataset(dataset_id, version)
+    if not zip_stream:
         raise HTTPException(404, "Dataset not found")
     
-    return FileResponse(
-        zip_path,
+    return StreamingResponse(
+        zip_stream,
         media_type="application/zip",
-        filename=f"{dataset_id}_annotated.zip",
         headers={"Content-Disposition": f"attachment; filename={dataset_id}_annotated.zip"}
     )
 
@@ -86,13 +85,12 @@ async def export_original_dataset(
     version: str = Query("v1", description="数据集版本")
 ):
     """导出标注前的数据集（仅包含图片）"""
-    zip_path = await dataset_service.export_original_dataset(dataset_id, version)
-    if not zip_path:
+    zip_stream = await dataset_service.export_original_dataset(dataset_id, version)
+    if not zip_stream:
         raise HTTPException(404, "Dataset not found")
     
-    return FileResponse(
-        zip_path,
+    return StreamingResponse(
+        zip_stream,
         media_type="application/zip",
-        filename=f"{dataset_id}_original.zip",
         headers={"Content-Disposition": f"attachment; filename={dataset_id}_original.zip"}
     )
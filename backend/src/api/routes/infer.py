@@ -1,15 +1,149 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from fastapi.responses import StreamingResponse, FileResponse
-from typing import List
+import os
+import re
+import asyncio
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Header, Request, Depends, Query
+from fastapi.responses import StreamingResponse, FileResponse, Response
+from typing import List, Optional
 from src.services.infer_service import InferService
+from src.services.infer_options import InferOptions
 
 router = APIRouter(prefix="/infer", tags=["infer"])
 infer_service = InferService()
 
+def infer_options_form(
+    conf: Optional[float] = Form(None, ge=0, le=1),
+    iou: Optional[float] = Form(None, ge=0, le=1),
+    imgsz: Optional[int] = Form(None, ge=32, le=4096),
+    max_det: Optional[int] = Form(None, ge=1, le=10000),
+    half: Optional[bool] = Form(None)
+) -> InferOptions:
+    """从表单字段读取推理参数，所有推理接口共用；未指定的字段使用模型默认值（model.json 的 infer_defaults）"""
+    return InferOptions(conf=conf, iou=iou, imgsz=imgsz, max_det=max_det, half=half)
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_RANGE_CHUNK_SIZE = 256 * 1024
+
+
+def _parse_range(range_header: str, file_size: int):
+    """解析单个 Range 请求头，返回 (start, end)（含 end）；多段范围返回 None（按完整文件返回）
+
+    范围无法满足时抛出 ValueError
+    """
+    match = _RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        raise ValueError("Invalid range")
+    if not start:
+        # bytes=-N：最后 N 个字节
+        length = int(end)
+        if length == 0:
+            raise ValueError("Invalid range")
+        return max(0, file_size - length), file_size - 1
+    start = int(start)
+    end = min(int(end), file_size - 1) if end else file_size - 1
+    if start >= file_size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _iter_file(path, start: int, end: int):
+    """按块读取文件中 [start, end] 的字节"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(_RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _file_range_response(path, range_header: Optional[str], media_type: str):
+    """支持 HTTP Range 的文件响应（视频拖动进度条时浏览器会发送 Range 请求）"""
+    file_size = os.path.getsize(path)
+    headers = {"Accept-Ranges": "bytes"}
+    byte_range = None
+    if range_header:
+        try:
+            byte_range = _parse_range(range_header, file_size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{file_size}"})
+
+    if byte_range is None:
+        headers["Content-Length"] = str(file_size)
+        return StreamingResponse(_iter_file(path, 0, file_size - 1), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(_iter_file(path, start, end), status_code=206, media_type=media_type, headers=headers)
+
+
+@router.get("/pool/stats")
+async def get_pool_stats():
+    """模型池统计：命中、未命中、淘汰次数、加载耗时及已加载模型"""
+    return infer_service.get_pool_stats()
+
+@router.get("/executor/stats")
+async def get_executor_stats():
+    """推理执行器统计：执行模式、排队数量、拒绝及超时次数"""
+    return infer_service.get_executor_stats()
+
+@router.get("/batcher/stats")
+async def get_batcher_stats():
+    """单图推理微批处理统计：各模型的队列深度和批次大小直方图"""
+    return infer_service.get_batcher_stats()
+
+@router.get("/warmup/stats")
+async def get_warmup_stats():
+    """启动预热状态：各预加载模型的运行时、加载耗时和预热耗时"""
+    return infer_service.get_warmup_stats()
+
+@router.get("/export/stats")
+async def get_export_stats():
+    """后台推理导出任务统计：运行中、排队中的任务及其进度"""
+    return infer_service.get_export_stats()
+
+@router.get("/stream/stats")
+async def get_stream_stats():
+    """流式视频推理统计：最近会话的状态及产出、发送、丢弃的帧数"""
+    return infer_service.get_stream_stats()
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """推理结果缓存统计：条目数、占用字节、命中率"""
+    return infer_service.get_cache_stats()
+
+@router.post("/cache/clear")
+async def clear_cache():
+    """清空推理结果缓存"""
+    return await asyncio.to_thread(infer_service.clear_cache)
+
+@router.post("/pool/{model_id}/pin")
+async def pin_model(model_id: str):
+    """固定模型：常驻模型池，不会被 LRU 淘汰"""
+    return infer_service.pin_model(model_id)
+
+@router.post("/pool/{model_id}/unpin")
+async def unpin_model(model_id: str):
+    """取消固定模型"""
+    return infer_service.unpin_model(model_id)
+
 @router.post("/{model_id}")
-async def inference(model_id: str, file: UploadFile = File(...)):
-    """使用指定模型进行推理"""
-    result = await infer_service.infer(model_id, file)
+async def inference(
+    model_id: str,
+    file: UploadFile = File(...),
+    options: InferOptions = Depends(infer_options_form)
+):
+    """使用指定模型进行推理
+    
+    推理参数 conf / iou / imgsz / max_det / half 均为可选表单字段
+    """
+    result = await infer_service.infer(model_id, file, options.model_dump(exclude_none=True))
     if "error" in result:
         raise HTTPException(400, result["error"])
     return result
@@ -17,12 +151,14 @@ async def inference(model_id: str, file: UploadFile = File(...)):
 @router.post("/batch/run")
 async def batch_inference(
     model_ids: str = Form(...),  # 逗号分隔的模型ID列表
-    files: List[UploadFile] = File(...)
+    files: List[UploadFile] = File(...),
+    options: InferOptions = Depends(infer_options_form)
 ):
     """批量推理：支持多模型、多图片
     
     - model_ids: 逗号分隔的模型ID列表，如 "model_1,model_2"
     - files: 多个图片文件
+    - conf / iou / imgsz / max_det / half: 可选推理参数，未指定的按各模型默认值
     """
     # 解析模型ID列表
     model_id_list = [mid.strip() for mid in model_ids.split(",") if mid.strip()]
@@ -33,7 +169,7 @@ async def batch_inference(
     if not files:
         raise HTTPException(400, "至少需要上传一张图片")
     
-    result = await infer_service.batch_infer(model_id_list, files)
+    result = await infer_service.batch_infer(model_id_list, files, options.model_dump(exclude_none=True))
     
     if "error" in result:
         raise HTTPException(400, result["error"])
@@ -44,67 +180,208 @@ async def batch_inference(
 async def video_inference(
     model_id: str, 
     file: UploadFile = File(...),
-    conf: float = Form(0.25)
+    options: InferOptions = Depends(infer_options_form),
+    stride: int = Form(1, ge=1),
+    adaptive: bool = Form(False),
+    diff_threshold: float = Form(8.0, ge=0)
 ):
     """视频推理：处理视频文件并返回带标注的视频
     
     Args:
         model_id: 模型ID
         file: 视频文件
-        conf: 置信度阈值，默认0.25
+        conf / iou / imgsz / max_det / half: 可选推理参数，未指定的使用模型默认值（conf 默认0.25）
+        stride: 每隔 stride 帧推理一次，其余帧沿用上一次的检测结果，默认1（每帧推理）
+        adaptive: 自适应模式，画面变化达到 diff_threshold 时才推理
+        diff_threshold: 自适应模式的画面差异阈值（缩略灰度图平均绝对差，0~255），默认8
     
     Returns:
-        处理后的视频数据（base64编码）和检测统计信息
+        处理后视频的下载地址（video_url）、视频信息和检测统计信息
     """
-    result = await infer_service.infer_video(model_id, file, conf)
+    result = await infer_service.infer_video(
+        model_id, file, options.model_dump(exclude_none=True), stride, adaptive, diff_threshold
+    )
     
     if "error" in result:
         raise HTTPException(400, result["error"])
     
     return result
 
+@router.get("/videos/{video_id}")
+async def get_video_result(video_id: str, range_header: Optional[str] = Header(None, alias="Range")):
+    """获取视频推理结果，支持 Range 请求（可直接用于 <video> 播放和拖动）
+    
+    Args:
+        video_id: 视频推理返回的 video_id
+    """
+    video_path = infer_service.get_video_result_path(video_id)
+    if not video_path:
+        raise HTTPException(404, "Video result not found")
+    
+    return _file_range_response(video_path, range_header, "video/mp4")
+
 @router.post("/video/{model_id}/stream")
 async def video_inference_stream(
     model_id: str,
+    request: Request,
     file: UploadFile = File(...),
-    conf: float = Form(0.25)
+    options: InferOptions = Depends(infer_options_form),
+    stride: int = Form(1, ge=1),
+    adaptive: bool = Form(False),
+    diff_threshold: float = Form(8.0, ge=0)
 ):
     """视频推理流式接口：逐帧返回检测结果
     
     Args:
         model_id: 模型ID
         file: 视频文件
-        conf: 置信度阈值，默认0.25
+        conf / iou / imgsz / max_det / half: 可选推理参数，未指定的使用模型默认值（conf 默认0.25）
+        stride: 每隔 stride 帧推理一次，其余帧沿用上一次的检测结果，默认1（每帧推理）
+        adaptive: 自适应模式，画面变化达到 diff_threshold 时才推理
+        diff_threshold: 自适应模式的画面差异阈值（缩略灰度图平均绝对差，0~255），默认8
     
     Returns:
         SSE流，每帧返回：帧数据（base64编码的JPEG）和检测结果
+        客户端消费慢时只发送最新的帧（丢帧数见完成信号和 /infer/stream/stats），客户端断开后立即停止推理
     """
+    # 在返回流式响应前保存上传文件：响应开始后上传文件已被关闭
+    input_path = await infer_service.save_upload(file)
     return StreamingResponse(
-        infer_service.infer_video_stream(model_id, file, conf),
+        infer_service.infer_video_stream(
+            model_id, input_path, options.model_dump(exclude_none=True), stride, adaptive, diff_threshold,
+            is_disconnected=request.is_disconnected
+        ),
         media_type="text/event-stream"
     )
 
+@router.post("/video/{model_id}/frames")
+async def video_inference_frames(
+    model_id: str,
+    request: Request,
+    file: UploadFile = File(...),
+    options: InferOptions = Depends(infer_options_form),
+    stride: int = Form(1, ge=1),
+    adaptive: bool = Form(False),
+    diff_threshold: float = Form(8.0, ge=0),
+    mode: str = Form("frames")
+):
+    """视频推理二进制帧流：逐帧返回原始JPEG字节和二进制检测结果（无 base64 / JSON 开销）
+
+    Args:
+        model_id: 模型ID
+        file: 视频文件
+        conf / iou / imgsz / max_det / half: 可选推理参数，未指定的使用模型默认值（conf 默认0.25）
+        stride / adaptive / diff_threshold: 抽帧参数，同流式接口
+        mode: frames（带标注的JPEG + 检测结果）或 detections（只返回检测结果，不返回图片）
+
+    Returns:
+        application/octet-stream 分块流，由连续的记录组成，每条记录：
+        - 12 字节记录头（小端）：类型 u8（0 视频信息，1 帧，2 完成，3 错误）、
+          标志 u8（bit0 已推理，bit1 带图片）、检测框数量 u16、帧号 u32、负载长度 u32
+        - 检测框数量 × 22 字节：类别ID u16、置信度 f32、x1 y1 x2 y2 i32
+        - 负载：帧记录为JPEG字节，其他记录为UTF-8 JSON（视频信息中包含类别名称列表）
+        背压与断开处理同流式接口
+    """
+    if mode not in ("frames", "detections"):
+        raise HTTPException(400, "mode 只能为 frames 或 detections")
+
+    # 在返回流式响应前保存上传文件：响应开始后上传文件已被关闭
+    input_path = await infer_service.save_upload(file)
+    return StreamingResponse(
+        infer_service.infer_video_frames(
+            model_id, input_path, options.model_dump(exclude_none=True), stride, adaptive, diff_threshold, mode,
+            is_disconnected=request.is_disconnected
+        ),
+        media_type="application/octet-stream"
+    )
+
 @router.post("/{model_id}/export")
 async def inference_and_export(
     model_id: str,
-    files: List[UploadFile] = File(...)
+    files: List[UploadFile] = File(...),
+    options: InferOptions = Depends(infer_options_form),
+    render: bool = Form(True),
+    jpeg_quality: Optional[int] = Form(None, ge=1, le=100)
 ):
-    """执行推理并保存结果，生成UUID和CSV
+    """创建后台推理导出任务：推理并保存结果图片，生成UUID和CSV
+    
+    上传完成后立即返回 session_id，推理在后台进行（服务重启后自动继续），
+    进度见 /infer/results/{session_id}/progress，完成后结果见 /infer/results/{session_id}
     
     Args:
         model_id: 模型ID
         files: 图片文件列表
+        conf / iou / imgsz / max_det / half: 可选推理参数，未指定的使用模型默认值
+        render: 是否绘制并保存结果图片，False 时只生成CSV
+        jpeg_quality: 结果图片的 JPEG 质量（1~100），默认使用 EXPORT_JPEG_QUALITY
     
     Returns:
-        包含session_id和结果的JSON
+        session_id、任务状态、图片总数和推理参数
     """
-    result = await infer_service.infer_and_save(model_id, files, save_results=True)
+    result = await infer_service.create_export_job(
+        model_id, files, options.model_dump(exclude_none=True), render, jpeg_quality
+    )
     
     if "error" in result:
         raise HTTPException(400, result["error"])
     
     return result
 
+@router.get("/results/{session_id}/progress")
+async def get_export_progress(session_id: str):
+    """导出任务进度：状态、已完成/总数、失败数、剩余时间估算（eta_seconds）"""
+    result = await infer_service.get_export_progress(session_id)
+    if not result:
+        raise HTTPException(404, "Inference session not found")
+    return result
+
+@router.get("/results/{session_id}")
+async def get_export_results(
+    session_id: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """导出任务进度及已完成图片的检测结果（offset / limit 分页，默认返回全部）"""
+    result = await infer_service.get_export_results(session_id, offset, limit)
+    if not result:
+        raise HTTPException(404, "Inference session not found")
+    return result
+
+@router.get("/results/{session_id}/detections")
+async def query_export_detections(
+    session_id: str,
+    class_name: Optional[str] = Query(None),
+    class_id: Optional[int] = Query(None),
+    min_conf: Optional[float] = Query(None, ge=0, le=1),
+    max_conf: Optional[float] = Query(None, ge=0, le=1),
+    image: Optional[str] = Query(None, description="图片文件名或 image_uuid"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=10000)
+):
+    """按类别、置信度和图片筛选检测框（每个检测框一行，列同 results.csv）
+    
+    任务完成后从 Parquet 列式存储中按条件读取（需要 pyarrow），不会加载整个结果文件
+    """
+    result = await infer_service.query_export_detections(
+        session_id, class_name=class_name, class_id=class_id, min_conf=min_conf,
+        max_conf=max_conf, image=image, offset=offset, limit=limit
+    )
+    if result is None:
+        raise HTTPException(404, "Inference session not found")
+    return result
+
+@router.get("/results/{session_id}/csv")
+async def export_results_csv(session_id: str):
+    """下载推理结果CSV（任务完成后生成）"""
+    csv_path = await infer_service.get_export_csv_path(session_id)
+    if not csv_path:
+        raise HTTPException(404, "Inference results CSV not found")
+    return FileResponse(
+        csv_path,
+        media_type="text/csv",
+        filename=f"{session_id}_results.csv"
+    )
+
 @router.get("/results/{session_id}/export")
 async def export_inference_results(session_id: str):
     """导出推理结果为ZIP文件
@@ -115,13 +392,16 @@ async def export_inference_results(session_id: str):
     Returns:
         包含所有推理结果图片和CSV的ZIP文件
     """
-    zip_path = await infer_service.export_inference_results(session_id)
-    if not zip_path:
+    progress = await infer_service.get_export_progress(session_id)
+    if progress and progress["status"] != "completed":
+        raise HTTPException(400, f"Inference session is {progress['status']}")
+    
+    zip_stream = await infer_service.export_inference_results(session_id)
+    if not zip_stream:
         raise HTTPException(404, "Inference session not found")
     
-    return FileResponse(
-        zip_path,
+    return StreamingResponse(
+        zip_stream,
         media_type="application/zip",
-        filename=f"{session_id}_results.zip",
         headers={"Content-Disposition": f"attachment; filename={session_id}_results.zip"}
     )
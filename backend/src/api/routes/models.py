@@ -1,8 +1,9 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from src.services.model_service import ModelService
+from src.services.infer_options import InferOptions
 import os
 
 router = APIRouter(prefix="/models", tags=["models"])
@@ -12,15 +13,43 @@ class UpdateModelRequest(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     tags: Optional[list[str]] = None
+    infer_defaults: Optional[InferOptions] = None  # 该模型的默认推理参数，未指定的字段使用全局默认值
+
+class OptimizeModelRequest(BaseModel):
+    formats: list[str] = ["onnx"]  # onnx / openvino
+    half: bool = False  # FP16（ONNX 的 FP16 导出需要 GPU）
+    int8: bool = False  # INT8 量化（仅 OpenVINO，使用训练数据集校准）
+    imgsz: Optional[int] = None  # 默认使用训练时的输入尺寸
 
 class UploadModelRequest(BaseModel):
     name: Optional[str] = None
     classes: Optional[list[str]] = None
 
 @router.get("")
-async def list_models():
-    """列出所有模型"""
-    return await model_service.list_models()
+async def list_models(
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="每页数量，不指定时返回全部"),
+    sort: str = Query("created_at", description="排序字段：created_at、updated_at、name、model_id、file_size"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    tag: Optional[str] = Query(None, description="按标签过滤"),
+    class_name: Optional[str] = Query(None, description="按类别过滤"),
+    q: Optional[str] = Query(None, description="按名称或模型ID搜索")
+):
+    """列出模型（分页、排序、按标签或类别过滤）"""
+    try:
+        return await model_service.list_models(offset, limit, sort, order, tag, class_name, q)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+@router.get("/facets")
+async def list_model_facets():
+    """所有标签和类别及对应的模型数量"""
+    return await model_service.list_model_facets()
+
+@router.post("/reindex")
+async def reindex_models():
+    """重新扫描模型仓库目录并更新模型索引（手动修改过 model.json 时使用）"""
+    return await model_service.reindex_models()
 
 @router.get("/{model_id}")
 async def get_model(model_id: str):
@@ -46,6 +75,30 @@ async def delete_model(model_id: str):
         raise HTTPException(404, "Model not found")
     return result
 
+@router.post("/{model_id}/optimize")
+async def optimize_model(model_id: str, request: OptimizeModelRequest):
+    """导出优化的推理运行时（ONNX / OpenVINO），推理时自动选择最快的运行时"""
+    for fmt in request.formats:
+        if fmt not in ("onnx", "openvino"):
+            raise HTTPException(400, f"Unsupported format: {fmt}")
+    
+    result = await model_service.optimize_model(model_id, request)
+    if not result:
+        raise HTTPException(404, "Model not found")
+    if "error" in result:
+        raise HTTPException(400, result["error"])
+    return result
+
+@router.post("/{model_id}/benchmark")
+async def benchmark_model(model_id: str, runs: int = Query(20, ge=1, le=1000)):
+    """比较各运行时的推理延迟，结果用于推理时选择运行时"""
+    result = await model_service.benchmark_model(model_id, runs)
+    if not result:
+        raise HTTPException(404, "Model not found")
+    if "error" in result:
+        raise HTTPException(400, result["error"])
+    return result
+
 @router.post("/upload")
 async def upload_model(
     file: UploadFile = File(...)
@@ -67,17 +120,33 @@ async def upload_model(
 @router.get("/{model_id}/export")
 async def export_model(model_id: str):
     """导出模型为ZIP文件"""
-    zip_path = await model_service.export_model(model_id)
-    if not zip_path:
+    zip_stream = await model_service.export_model(model_id)
+    if not zip_stream:
         raise HTTPException(404, "Model not found")
     
-    return FileResponse(
-        zip_path,
+    return StreamingResponse(
+        zip_stream,
         media_type="application/zip",
-        filename=f"{model_id}.zip",
         headers={"Content-Disposition": f"attachment; filename={model_id}.zip"}
     )
 
+@router.get("/{model_id}/metrics/series")
+async def get_metric_series(
+    model_id: str,
+    points: int = Query(200, ge=10, le=5000, description="每个指标最多保留的点数"),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$", description="降采样方法: lttb, minmax"),
+    metrics: Optional[str] = Query(None, description="逗号分隔的指标名，如 metrics_mAP50,train_box_loss")
+):
+    """训练指标的降采样数值序列（前端直接绘图，不在服务端渲染图片）"""
+    metric_names = [name.strip() for name in metrics.split(",") if name.strip()] if metrics else None
+    try:
+        result = await model_service.get_metric_series(model_id, points, method, metric_names)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if result is None:
+        raise HTTPException(404, "Model not found")
+    return result
+
 @router.get("/{model_id}/charts")
 async def generate_training_charts(
     model_id: str,
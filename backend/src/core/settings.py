@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -16,12 +17,49 @@ class Settings(BaseSettings):
     # 模型目录
     MODELS_DIR: Path = BASE_DIR / "models"
     REGISTRY_DIR: Path = MODELS_DIR / "registry"
+    REGISTRY_DB: Path = MODELS_DIR / "registry.db"  # 模型仓库索引（由 model.json 生成，可随时删除重建）
     
     # API配置
     API_PREFIX: str = ""
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     
+    # 推理模型池：按字节数限额的 LRU 缓存
+    MODEL_POOL_MAX_BYTES: int = 4 * 1024 * 1024 * 1024
+    MODEL_POOL_PINNED: List[str] = []  # 常驻内存、不会被淘汰的模型ID
+    
+    # 启动时预加载并预热（空输入前向推理一次）的模型，预热完成前 /health 返回 503
+    PRELOAD_MODELS: List[str] = []  # 指定的模型ID
+    PRELOAD_RECENT_MODELS: int = 0  # 未指定 PRELOAD_MODELS 时，预加载最近使用的 N 个模型
+    
+    # 推理执行器：thread（线程池）或 process（进程池，每个工作进程各加载一次模型）
+    INFER_EXECUTOR: str = "thread"
+    INFER_WORKERS: int = 2
+    INFER_WORKER_MAX_MODELS: int = 2  # 进程池模式下每个工作进程最多缓存的模型数（LRU）
+    INFER_QUEUE_SIZE: int = 16  # 除正在执行的任务外最多排队的任务数
+    INFER_TIMEOUT: float = 60.0  # 单个推理请求超时（秒）
+    INFER_VIDEO_TIMEOUT: float = 3600.0  # 视频推理超时（秒），进程池模式下超时的视频仍会在工作进程中处理完
+    INFER_BATCH_SIZE: int = 8  # 批量推理时每次前向推理的图片数
+    INFER_BATCH_WINDOW_MS: float = 5.0  # 单图推理请求合并的时间窗口（毫秒）
+    INFER_MAX_BATCH_SIZE: int = 8  # 单图推理请求合并的最大批次
+    INFER_VIDEO_BATCH_SIZE: int = 8  # 视频推理每批帧数
+    INFER_VIDEO_QUEUE_SIZE: int = 32  # 视频流水线各阶段之间的队列长度（帧）
+    INFER_RUNTIME: str = "auto"  # 推理运行时：auto（按基准测试结果/硬件选择最快的）、pytorch、onnx、openvino 等
+    INFER_EXPORT_WORKERS: int = 1  # 同时运行的后台推理导出任务数
+    EXPORT_RENDER_WORKERS: int = 2  # 导出任务绘制、编码结果图片的线程数
+    EXPORT_JPEG_QUALITY: int = 95  # 导出结果图片的 JPEG 质量（1~100）
+    EXPORT_PARQUET_BATCH_ROWS: int = 5000  # 导出任务的检测框每多少行写出一个 Parquet 分片
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 上传文件分块写入磁盘的块大小（字节）
+    
+    # 推理结果缓存：相同图片、模型和参数的检测结果直接复用
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 内存层上限（字节）
+    RESULT_CACHE_DISK: bool = False  # 是否启用磁盘层（INFERENCE_RESULTS_DIR/_cache）
+    
+    # 启动诊断（/health/startup）：应用导入耗时和常驻内存的预算，超出时 within_budget 为 false
+    STARTUP_IMPORT_BUDGET_SECONDS: float = 3.0
+    STARTUP_RSS_BUDGET_MB: float = 200.0
+    
     class Config:
         env_file = ".env"
         
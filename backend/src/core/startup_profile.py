@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 推理、绘图等才需要的重量级依赖，应在首次使用时才导入，不应出现在启动后的模块中
+HEAVY_MODULES = [
+    "numpy", "cv2", "PIL", "yaml", "torch", "ultralytics",
+    "matplotlib", "pyarrow", "onnxruntime", "openvino",
+]
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def _rss_mb() -> Optional[float]:
+    """当前进程的常驻内存（MB），Linux 读取 /proc，其他平台尝试 psutil"""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+class StartupProfile:
+    """记录服务启动各阶段的耗时（导入应用、各启动任务）
+
+    main.py 最先导入本模块，导入完成时记录应用导入耗时；启动任务用 phase() 计时
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.rss_after_import_mb: Optional[float] = None
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = round(seconds, 4)
+
+    def mark_imported(self):
+        """应用模块导入完成（路由和服务单例均已创建）"""
+        self.record("import_app", time.perf_counter() - self.started_at)
+        self.rss_after_import_mb = _rss_mb()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def snapshot(self, import_budget_seconds: float, rss_budget_mb: float) -> Dict[str, Any]:
+        import_seconds = self.phases.get("import_app")
+        within_budget = (
+            import_seconds is not None and import_seconds <= import_budget_seconds
+            and self.rss_after_import_mb is not None and self.rss_after_import_mb <= rss_budget_mb
+        )
+        return {
+            "phases": dict(self.phases),
+            "rss_after_import_mb": self.rss_after_import_mb,
+            "rss_mb": _rss_mb(),
+            "budget": {
+                "import_seconds": import_budget_seconds,
+                "rss_mb": rss_budget_mb,
+                "within_budget": within_budget,
+            },
+            "heavy_modules_loaded": [name for name in HEAVY_MODULES if name in sys.modules],
+            "modules_loaded": len(sys.modules),
+        }
+
+
+def import_time_breakdown(module: str = "src.main", top: int = 30) -> Dict[str, Any]:
+    """在子进程中以 python -X importtime 导入应用，返回按累计耗时排序的模块列表
+
+    不影响当前进程已加载的模块；每次调用需要完整导入一次应用（约 1~2 秒）
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(BACKEND_DIR), capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    wall_seconds = time.perf_counter() - start
+
+    modules: List[Dict[str, Any]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 表头
+        name = parts[2].rstrip()
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_ms": round(int(parts[0]) / 1000, 2),
+            "cumulative_ms": round(int(parts[1]) / 1000, 2),
+        })
+
+    top_level = [item for item in modules if item["depth"] == 0]
+    return {
+        "module": module,
+        "returncode": proc.returncode,
+        "wall_seconds": round(wall_seconds, 3),
+        "total_ms": round(sum(item["cumulative_ms"] for item in top_level), 2),
+        "top_cumulative": sorted(modules, key=lambda item: item["cumulative_ms"], reverse=True)[:top],
+        "top_self": sorted(modules, key=lambda item: item["self_ms"], reverse=True)[:top],
+    }
+
+
+startup_profile = StartupProfile()
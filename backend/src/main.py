@@ -1,8 +1,13 @@
-from fastapi import FastAPI
+from src.core.startup_profile import startup_profile, import_time_breakdown  # 最先导入，记录应用导入耗时
+import asyncio
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from src.core.settings import settings
 from src.api.routes import datasets, annotations, train, logs, models, infer
+from src.services.infer_executor import infer_executor, InferExecutorError
+from src.services.model_registry import model_registry
 
 app = FastAPI(title="YOLO Training Platform API")
 
@@ -15,6 +20,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 推理队列已满 / 推理超时
+@app.exception_handler(InferExecutorError)
+async def infer_executor_error_handler(request: Request, exc: InferExecutorError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
+
+# 启动时在后台预加载并预热模型，完成前 /health 返回 503
+@app.on_event("startup")
+async def preload_models():
+    model_ids = infer.infer_service.get_preload_model_ids()
+    if model_ids:
+        infer.infer_service.warmup_status = "warming_up"
+        app.state.warmup_task = asyncio.create_task(infer.infer_service.warmup_models(model_ids))
+
+# 启动时与模型仓库目录完整对账一次，更新模型索引
+@app.on_event("startup")
+async def reconcile_model_registry():
+    with startup_profile.phase("reconcile_model_registry"):
+        result = await asyncio.to_thread(model_registry.reconcile, True)
+    print(f"Model registry index: {result}")
+
+# 继续服务重启前未完成的后台推理导出任务
+@app.on_event("startup")
+async def resume_export_jobs():
+    with startup_profile.phase("resume_export_jobs"):
+        await infer.infer_service.resume_export_jobs()
+
+@app.on_event("shutdown")
+async def shutdown_infer_executor():
+    infer_executor.shutdown()
+
 # 静态文件（用于访问图片等）
 app.mount("/static", StaticFiles(directory=str(settings.DATA_DIR)), name="static")
 
@@ -26,10 +61,26 @@ app.include_router(logs.router)
 app.include_router(models.router)
 app.include_router(infer.router)
 
+startup_profile.mark_imported()
+
 @app.get("/")
 async def root():
     return {"message": "YOLO Training Platform API", "version": "1.0.0"}
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    warmup = infer.infer_service.get_warmup_stats()
+    if warmup["status"] == "warming_up":
+        return JSONResponse(status_code=503, content={"status": "warming_up", "warmup": warmup})
+    return {"status": "ok", "warmup": warmup}
+
+@app.get("/health/startup")
+async def startup_diagnostics(
+    breakdown: bool = Query(False, description="是否在子进程中重新导入应用，返回各模块的导入耗时"),
+    top: int = Query(30, ge=1, le=500)
+):
+    """启动诊断：应用导入和启动任务耗时、常驻内存、已加载的重量级依赖，以及是否在预算内"""
+    result = startup_profile.snapshot(settings.STARTUP_IMPORT_BUDGET_SECONDS, settings.STARTUP_RSS_BUDGET_MB)
+    if breakdown:
+        result["import_breakdown"] = await asyncio.to_thread(import_time_breakdown, "src.main", top)
+    return result
@@ -1,9 +1,7 @@
 import json
-import yaml
 import asyncio
 from pathlib import Path
 from datetime import datetime
-from PIL import Image
 from src.core.settings import settings
 
 
@@ -21,6 +19,8 @@ def _save_json(path: Path, data: dict):
 
 def _load_yaml(path: Path):
     """同步加载 YAML 文件"""
+    import yaml
+    
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
@@ -53,6 +53,8 @@ class AnnotationService:
         
         # 在线程中执行所有同步操作
         def _create_task_sync():
+            from PIL import Image
+            
             images_dir = self._find_images_dir(dataset_dir)
             labels_dir = self._find_labels_dir(dataset_dir)
             
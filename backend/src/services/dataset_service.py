@@ -2,14 +2,13 @@ import json
 import zipfile
 import shutil
 import asyncio
-import yaml
 import os
 import logging
-import tempfile
 from pathlib import Path
 from datetime import datetime
 from fastapi import UploadFile
 from src.core.settings import settings
+from src.services.zip_stream import iter_zip
 
 logger = logging.getLogger(__name__)
 
@@ -28,12 +27,16 @@ def _save_json(path: Path, data: dict):
 
 def _load_yaml(path: Path):
     """同步加载 YAML 文件"""
+    import yaml
+    
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
 
 def _save_yaml(path: Path, data: dict):
     """同步保存 YAML 文件"""
+    import yaml
+    
     with open(path, "w", encoding="utf-8") as f:
         yaml.dump(data, f, allow_unicode=True)
 
@@ -388,75 +391,56 @@ class DatasetService:
         return {"ok": True, "message": f"Dataset {dataset_id} deleted"}
     
     async def export_annotated_dataset(self, dataset_id: str, version: str = "v1"):
-        """导出标注后的数据集"""
+        """导出标注后的数据集，返回 ZIP 字节流生成器"""
         dataset_dir = self.datasets_dir / dataset_id
         version_dir = dataset_dir / version
         
         if not await asyncio.to_thread(lambda: version_dir.exists()):
             return None
         
-        # 创建临时ZIP文件
-        def _create_zip():
-            temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            temp_zip_path = temp_zip.name
-            temp_zip.close()
+        # ZIP条目（惰性遍历，边读边发送）
+        def _entries():
+            # 添加images目录
+            images_dir = self._find_images_dir(version_dir)
+            if images_dir:
+                for img_file in images_dir.rglob("*"):
+                    if img_file.is_file():
+                        yield img_file, str(img_file.relative_to(version_dir))
             
-            with zipfile.ZipFile(temp_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # 添加images目录
-                images_dir = self._find_images_dir(version_dir)
-                if images_dir:
-                    for img_file in images_dir.rglob("*"):
-                        if img_file.is_file():
-                            arcname = img_file.relative_to(version_dir)
-                            zipf.write(img_file, arcname)
-                
-                # 添加labels目录
-                labels_dir = self._find_labels_dir(version_dir)
-                if labels_dir:
-                    for label_file in labels_dir.rglob("*"):
-                        if label_file.is_file():
-                            arcname = label_file.relative_to(version_dir)
-                            zipf.write(label_file, arcname)
-                
-                # 添加data.yaml
-                data_yaml = version_dir / "data.yaml"
-                if data_yaml.exists():
-                    zipf.write(data_yaml, "data.yaml")
+            # 添加labels目录
+            labels_dir = self._find_labels_dir(version_dir)
+            if labels_dir:
+                for label_file in labels_dir.rglob("*"):
+                    if label_file.is_file():
+                        yield label_file, str(label_file.relative_to(version_dir))
             
-            return temp_zip_path
+            # 添加data.yaml
+            data_yaml = version_dir / "data.yaml"
+            if data_yaml.exists():
+                yield data_yaml, "data.yaml"
         
-        zip_path = await asyncio.to_thread(_create_zip)
-        return zip_path
+        return iter_zip(_entries())
     
     async def export_original_dataset(self, dataset_id: str, version: str = "v1"):
-        """导出标注前的数据集（仅图片）"""
+        """导出标注前的数据集（仅图片），返回 ZIP 字节流生成器"""
         dataset_dir = self.datasets_dir / dataset_id
         version_dir = dataset_dir / version
         
         if not await asyncio.to_thread(lambda: version_dir.exists()):
             return None
         
-        # 创建临时ZIP文件
-        def _create_zip():
-            temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            temp_zip_path = temp_zip.name
-            temp_zip.close()
-            
-            with zipfile.ZipFile(temp_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # 仅添加images目录
-                images_dir = self._find_images_dir(version_dir)
-                if images_dir:
-                    for img_file in images_dir.rglob("*"):
-                        if img_file.is_file():
-                            arcname = img_file.relative_to(version_dir)
-                            zipf.write(img_file, arcname)
-                
-                # 可选：添加data.yaml（如果存在）
-                data_yaml = version_dir / "data.yaml"
-                if data_yaml.exists():
-                    zipf.write(data_yaml, "data.yaml")
+        # ZIP条目（惰性遍历，边读边发送）
+        def _entries():
+            # 仅添加images目录
+            images_dir = self._find_images_dir(version_dir)
+            if images_dir:
+                for img_file in images_dir.rglob("*"):
+                    if img_file.is_file():
+                        yield img_file, str(img_file.relative_to(version_dir))
             
-            return temp_zip_path
+            # 可选：添加data.yaml（如果存在）
+            data_yaml = version_dir / "data.yaml"
+            if data_yaml.exists():
+                yield data_yaml, "data.yaml"
         
-        zip_path = await asyncio.to_thread(_create_zip)
-        return zip_path
+        return iter_zip(_entries())
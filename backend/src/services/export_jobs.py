@@ -0,0 +1,187 @@
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class ExportJob:
+    """后台推理导出任务（一个推理会话）
+
+    状态保存在会话目录的 job.json 中，每张图片的结果逐行追加到 results.jsonl，
+    服务重启后可以从已完成的图片之后继续。上传的图片暂存在 inputs/ 下，任务完成后删除。
+    """
+
+    JOB_FILE = "job.json"
+    RESULTS_FILE = "results.jsonl"
+    INPUTS_DIR = "inputs"
+
+    def __init__(self, session_dir: Path, data: Dict[str, Any]):
+        self.session_dir = session_dir
+        self.data = data
+        # 本次运行的起点，用于估算剩余时间（重启后重新计算）
+        self._run_started_at = None
+        self._run_done_start = 0
+
+    @classmethod
+    def create(cls, session_dir: Path, model_id: str, options: dict, filenames: List[str]) -> "ExportJob":
+        inputs = []
+        for index, filename in enumerate(filenames):
+            suffix = Path(filename or "").suffix or ".jpg"
+            inputs.append({
+                "index": index,
+                "filename": filename,
+                "image_uuid": str(uuid.uuid4()),
+                "input": f"{cls.INPUTS_DIR}/{index:06d}{suffix}",
+            })
+        data = {
+            "session_id": session_dir.name,
+            "model_id": model_id,
+            "status": "queued",  # queued / running / completed / failed
+            "options": options,
+            "total": len(inputs),
+            "done": 0,
+            "failed": 0,
+            "inputs": inputs,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "completed_at": None,
+            "elapsed_seconds": 0.0,  # 累计运行时间（不含排队和重启间隔）
+            "error": None,
+        }
+        return cls(session_dir, data)
+
+    @classmethod
+    def load(cls, session_dir: Path) -> Optional["ExportJob"]:
+        try:
+            with open(session_dir / cls.JOB_FILE, "r", encoding="utf-8") as f:
+                return cls(session_dir, json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def session_id(self) -> str:
+        return self.data["session_id"]
+
+    @property
+    def model_id(self) -> str:
+        return self.data["model_id"]
+
+    @property
+    def status(self) -> str:
+        return self.data["status"]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def input_path(self, item: dict) -> Path:
+        return self.session_dir / item["input"]
+
+    def save(self):
+        """原子写入 job.json"""
+        path = self.session_dir / self.JOB_FILE
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def iter_results(self) -> Iterator[dict]:
+        """逐行读取已完成图片的结果（按完成顺序，忽略写了一半的最后一行）"""
+        try:
+            with open(self.session_dir / self.RESULTS_FILE, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except OSError:
+            return
+
+    def _truncate_partial_line(self):
+        """截掉 results.jsonl 末尾写了一半的行（服务中断时留下），否则继续追加的结果会与它拼成无法解析的一行"""
+        path = self.session_dir / self.RESULTS_FILE
+        try:
+            with open(path, "r+b") as f:
+                size = f.seek(0, os.SEEK_END)
+                end = size
+                while end > 0:
+                    start = max(0, end - 4096)
+                    f.seek(start)
+                    newline = f.read(end - start).rfind(b"\n")
+                    if newline >= 0:
+                        end = start + newline + 1
+                        break
+                    end = start
+                if end < size:
+                    f.truncate(end)
+        except OSError:
+            return
+
+    def completed_indices(self) -> Tuple[set, int]:
+        """已完成图片的序号和其中失败的数量（不保留检测结果，内存占用与检测框数量无关）
+
+        继续任务前调用，会先截掉末尾不完整的行
+        """
+        self._truncate_partial_line()
+        indices, failed = set(), 0
+        for result in self.iter_results():
+            indices.add(result["index"])
+            if result.get("error"):
+                failed += 1
+        return indices, failed
+
+    def append_result(self, result: dict):
+        with open(self.session_dir / self.RESULTS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.data["done"] += 1
+        if result.get("error"):
+            self.data["failed"] += 1
+
+    def start(self, done: int, failed: int):
+        self.data["status"] = "running"
+        self.data["done"] = done
+        self.data["failed"] = failed
+        self.data["started_at"] = self.data["started_at"] or datetime.now().isoformat()
+        self._run_started_at = time.time()
+        self._run_done_start = done
+
+    def finish(self, status: str, error: str = None):
+        self.data["elapsed_seconds"] = round(self._elapsed(), 3)
+        self._run_started_at = None
+        self.data["status"] = status
+        self.data["error"] = error
+        self.data["completed_at"] = datetime.now().isoformat()
+
+    def _elapsed(self) -> float:
+        elapsed = self.data.get("elapsed_seconds") or 0.0
+        if self._run_started_at is not None:
+            elapsed += time.time() - self._run_started_at
+        return elapsed
+
+    def progress(self) -> Dict[str, Any]:
+        """进度：已完成/总数、耗时和按本次运行速度估算的剩余时间"""
+        total, done = self.data["total"], self.data["done"]
+        eta_seconds = None
+        if self.status == "running" and self._run_started_at is not None:
+            processed = done - self._run_done_start
+            if processed > 0:
+                rate = processed / (time.time() - self._run_started_at)
+                eta_seconds = round((total - done) / rate, 1)
+        return {
+            "session_id": self.session_id,
+            "model_id": self.model_id,
+            "status": self.status,
+            "total": total,
+            "done": done,
+            "failed": self.data["failed"],
+            "progress": round(done / total, 4) if total else 1.0,
+            "elapsed_seconds": round(self._elapsed(), 3),
+            "eta_seconds": eta_seconds,
+            "created_at": self.data["created_at"],
+            "started_at": self.data["started_at"],
+            "completed_at": self.data["completed_at"],
+            "error": self.data["error"],
+        }
@@ -0,0 +1,189 @@
+import asyncio
+import gc
+import os
+import threading
+import weakref
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from src.core.settings import settings
+
+
+class InferExecutorError(Exception):
+    """推理执行器错误基类，status_code 为对应的 HTTP 状态码"""
+    status_code = 503
+
+
+class InferQueueFullError(InferExecutorError):
+    """推理队列已满"""
+    status_code = 503
+
+
+class InferTimeoutError(InferExecutorError):
+    """推理超时"""
+    status_code = 504
+
+
+# 进程池模式下每个工作进程各自缓存已加载的模型：(权重路径, 任务类型, 修改时间) -> YOLO
+# 按 LRU 最多保留 INFER_WORKER_MAX_MODELS 个；权重被替换后修改时间变化，旧模型随之丢弃
+_worker_models: "OrderedDict[Tuple[str, str, float], Any]" = OrderedDict()
+
+# 线程池模式下同一个模型对象不能被多个线程同时调用
+_model_locks: "weakref.WeakKeyDictionary[Any, threading.Lock]" = weakref.WeakKeyDictionary()
+_model_locks_guard = threading.Lock()
+
+
+def _weights_mtime(path: str) -> float:
+    """权重的修改时间；OpenVINO 等格式导出为目录，取目录内文件的最新修改时间"""
+    try:
+        if os.path.isdir(path):
+            return max((f.stat().st_mtime for f in Path(path).rglob("*") if f.is_file()), default=0.0)
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def _worker_model(path: str, task: str):
+    """工作进程内按 (路径, 任务类型, 修改时间) 取得缓存的模型，未命中时加载并按 LRU 淘汰"""
+    key = (path, task, _weights_mtime(path))
+    model = _worker_models.get(key)
+    if model is not None:
+        _worker_models.move_to_end(key)
+        return model
+
+    from ultralytics import YOLO
+
+    # 同一路径的旧版本（权重已被替换）不再使用
+    for stale in [cached for cached in _worker_models if cached[0] == path]:
+        del _worker_models[stale]
+    model = YOLO(path, task=task)
+    _worker_models[key] = model
+    evicted = 0
+    while len(_worker_models) > max(1, settings.INFER_WORKER_MAX_MODELS):
+        _worker_models.popitem(last=False)
+        evicted += 1
+    if evicted:
+        gc.collect()
+    return model
+
+
+@contextmanager
+def use_model(handle):
+    """在推理任务中取得模型
+
+    handle 为模型对象（线程池模式）或 (权重路径, 任务类型)（进程池模式，在工作进程内加载后缓存复用）。
+    线程池模式下持有该模型的锁，只应包住一次前向推理：视频等长任务逐批取得，避免阻塞同一模型的其他请求
+    """
+    if isinstance(handle, tuple):
+        # 工作进程一次只执行一个任务，无需加锁
+        yield _worker_model(*handle)
+        return
+
+    with _model_locks_guard:
+        lock = _model_locks.get(handle)
+        if lock is None:
+            lock = threading.Lock()
+            _model_locks[handle] = lock
+    with lock:
+        yield handle
+
+
+class InferExecutor:
+    """专用推理执行器：把模型推理和 cv2 处理移出事件循环
+
+    - mode: "thread"（线程池）或 "process"（进程池，每个工作进程只加载一次模型）
+    - 正在执行和排队的任务总数受 workers + queue_size 限制，超出直接拒绝
+    - 每个请求等待结果的时间受 timeout 限制
+    """
+
+    def __init__(self, mode: str, workers: int, queue_size: int, timeout: float):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unsupported INFER_EXECUTOR: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._executor = None
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._lock = threading.Lock()
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.mode == "process"
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.uses_processes:
+                # spawn：避免在已加载 torch 的进程中 fork
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="infer",
+                )
+        return self._executor
+
+    def _on_done(self, _):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    async def run(self, fn, *args, timeout: Optional[float] = None):
+        """在执行器中运行 fn(*args) 并等待结果"""
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                self._rejected += 1
+                raise InferQueueFullError("Inference queue is full, please retry later")
+            self._pending += 1
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        # 任务真正结束时才释放名额：超时的任务仍在占用工作线程
+        future.add_done_callback(self._on_done)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._timeouts += 1
+            raise InferTimeoutError("Inference timed out")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "timeout": self.timeout,
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+infer_executor = InferExecutor(
+    settings.INFER_EXECUTOR,
+    settings.INFER_WORKERS,
+    settings.INFER_QUEUE_SIZE,
+    settings.INFER_TIMEOUT,
+)
@@ -0,0 +1,31 @@
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, Field
+
+# 未在请求和 model.json 中指定时使用的推理参数（与 ultralytics 默认值一致）
+DEFAULT_INFER_OPTIONS: Dict[str, Any] = {
+    "conf": 0.25,
+    "iou": 0.7,
+    "imgsz": 640,
+    "max_det": 300,
+    "half": False,
+}
+
+
+class InferOptions(BaseModel):
+    """推理参数，未指定的字段依次使用模型默认值（model.json 的 infer_defaults）和全局默认值"""
+    conf: Optional[float] = Field(None, ge=0, le=1, description="置信度阈值")
+    iou: Optional[float] = Field(None, ge=0, le=1, description="NMS 的 IoU 阈值")
+    imgsz: Optional[int] = Field(None, ge=32, le=4096, description="推理输入尺寸")
+    max_det: Optional[int] = Field(None, ge=1, le=10000, description="每张图片最多检测框数")
+    half: Optional[bool] = Field(None, description="是否使用 FP16（仅 GPU 有效）")
+
+
+def resolve_infer_options(model_meta: dict, options: Optional[dict] = None) -> Dict[str, Any]:
+    """合并推理参数：请求参数 > 模型默认值 > 训练时的 imgsz > 全局默认值"""
+    resolved = dict(DEFAULT_INFER_OPTIONS)
+    if model_meta.get("imgsz"):
+        resolved["imgsz"] = int(model_meta["imgsz"])
+    for source in (model_meta.get("infer_defaults") or {}, options or {}):
+        resolved.update({key: value for key, value in source.items()
+                         if key in DEFAULT_INFER_OPTIONS and value is not None})
+    return resolved
@@ -1,39 +1,467 @@
 import json
 import os
-import time
 import shutil
 import base64
 import asyncio
 import uuid
-import csv
-import zipfile
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Any, AsyncGenerator
 from fastapi import UploadFile
-from PIL import Image
 import tempfile
-import cv2
-import numpy as np
 from datetime import datetime
 from src.core.settings import settings
+from src.services.model_pool import model_pool
+from src.services.infer_executor import (
+    infer_executor, use_model, InferExecutorError, InferQueueFullError, InferTimeoutError
+)
+from src.services.micro_batcher import MicroBatcher
+from src.services.video_pipeline import run_video_pipeline, FrameSampler
+from src.services.stream_buffer import StreamSession
+from src.services.export_jobs import ExportJob
+from src.services.zip_stream import iter_zip
+from src.services.results_store import (
+    DETECTIONS_DIR, DetectionWriter, parquet_available, query_detections, write_results_csv
+)
+from src.services.result_cache import result_cache
+from src.services.infer_options import resolve_infer_options
+from src.services.model_runtimes import select_runtime
+from src.services.model_registry import model_registry
+
+
+def _get_color(class_id: int) -> tuple:
+    """根据类别ID生成颜色"""
+    colors = [
+        (0, 255, 0),    # 绿色
+        (255, 0, 0),    # 蓝色
+        (0, 0, 255),    # 红色
+        (255, 255, 0),  # 青色
+        (255, 0, 255),  # 洋红色
+        (0, 255, 255),  # 黄色
+        (128, 0, 255),  # 紫色
+        (255, 128, 0),  # 橙色
+        (0, 128, 255),  # 橙黄色
+        (255, 0, 128),  # 粉色
+    ]
+    return colors[class_id % len(colors)]
+
+
+def _draw_box(frame, x1: int, y1: int, x2: int, y2: int, class_id: int, class_name: str, conf: float):
+    """在图像上绘制一个检测框及其标签"""
+    import cv2
+    
+    # 绘制边界框
+    color = _get_color(class_id)
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+    
+    # 绘制标签
+    label = f"{class_name}: {conf:.2f}"
+    label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+    cv2.rectangle(frame, (x1, y1 - label_size[1] - 10),
+                (x1 + label_size[0], y1), color, -1)
+    cv2.putText(frame, label, (x1, y1 - 5),
+               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+
+def _decode_image(content: bytes):
+    """把上传的图片字节直接解码为 BGR 数组（不落盘）"""
+    import cv2
+    import numpy as np
+    
+    image = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("无法解码图片")
+    return image
+
+
+@lru_cache(maxsize=64)
+def _class_name_table(classes: tuple):
+    """类别ID -> 类别名称的查找数组（按类别列表缓存）"""
+    import numpy as np
+    
+    return np.array(classes, dtype=object)
+
+
+def _class_names(class_ids, classes: list):
+    """批量映射类别名称，超出类别列表的ID使用 class_{id}"""
+    import numpy as np
+    
+    table = _class_name_table(tuple(classes))
+    names = np.empty(len(class_ids), dtype=object)
+    known = (class_ids >= 0) & (class_ids < len(table))
+    names[known] = table[class_ids[known]]
+    for i in np.flatnonzero(~known):
+        names[i] = f"class_{class_ids[i]}"
+    return names
+
+
+def _parse_results(results, model_meta, int_bbox: bool = False, letterbox: tuple = None):
+    """解析推理结果
+    
+    每个结果的框、置信度、类别一次性整体拷贝为 NumPy 数组，不再逐框访问张量。
+    
+    Args:
+        int_bbox: True 时输出视频接口使用的 {"bbox": [x1, y1, x2, y2]}（整数坐标）
+        letterbox: (缩放比例, (左侧填充, 顶部填充), 原图宽, 原图高)，把框从 letterbox 坐标映射回原图
+    """
+    import numpy as np
+    
+    classes = model_meta.get("classes", [])
+    detections = []
+    for result in results:
+        # boxes.data: [x1, y1, x2, y2, (track_id,) conf, cls]
+        data = result.boxes.data.cpu().numpy()
+        if not len(data):
+            continue
+        
+        xyxy = data[:, :4]
+        if letterbox is not None:
+            ratio, (left, top), width, height = letterbox
+            xyxy = (xyxy - (left, top, left, top)) / ratio
+            xyxy = np.clip(xyxy, 0, (width, height, width, height))
+        class_ids = data[:, -1].astype(np.int64)
+        names = _class_names(class_ids, classes)
+        confs = data[:, -2].tolist()
+        class_ids = class_ids.tolist()
+        
+        if int_bbox:
+            for box, conf, class_id, class_name in zip(xyxy.astype(np.int64).tolist(), confs, class_ids, names):
+                detections.append({
+                    "class_id": class_id,
+                    "class_name": class_name,
+                    "conf": conf,
+                    "bbox": box
+                })
+        else:
+            for (x1, y1, x2, y2), conf, class_id, class_name in zip(xyxy.tolist(), confs, class_ids, names):
+                detections.append({
+                    "class_id": class_id,
+                    "class_name": class_name,
+                    "conf": conf,
+                    "x1": x1,
+                    "y1": y1,
+                    "x2": x2,
+                    "y2": y2
+                })
+    return detections
+
+
+# ---- 二进制帧流的记录格式（小端） ----
+# 记录头 12 字节：类型(u8) 标志(u8) 检测框数量(u16) 帧号(u32) 负载长度(u32)
+# 之后是 检测框数量 × 22 字节的检测框：类别ID(u16) 置信度(f32) x1 y1 x2 y2(i32)，最后是负载
+# 帧记录的负载为JPEG字节（仅检测结果模式下为空）；其他记录的负载为UTF-8 JSON
+RECORD_INFO = 0
+RECORD_FRAME = 1
+RECORD_COMPLETE = 2
+RECORD_ERROR = 3
+FLAG_INFERRED = 0x01  # 该帧实际推理（否则沿用上一次的检测结果）
+FLAG_IMAGE = 0x02  # 负载中带有JPEG图片
+_RECORD_HEADER = struct.Struct("<BBHII")
+_DETECTION = struct.Struct("<Hf4i")
+
+
+def _pack_frame_record(frame_number: int, inferred: bool, detections: list, jpeg: bytes = None) -> bytes:
+    """打包一帧：记录头 + 二进制检测框 + JPEG"""
+    flags = (FLAG_INFERRED if inferred else 0) | (FLAG_IMAGE if jpeg else 0)
+    payload = jpeg or b""
+    boxes = b"".join(
+        _DETECTION.pack(det["class_id"], det["conf"], *det["bbox"]) for det in detections
+    )
+    return _RECORD_HEADER.pack(RECORD_FRAME, flags, len(detections), frame_number, len(payload)) + boxes + payload
+
+
+def _pack_json_record(record_type: int, data: dict) -> bytes:
+    """打包视频信息、完成信号或错误等 JSON 记录"""
+    payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    return _RECORD_HEADER.pack(record_type, 0, 0, 0, len(payload)) + payload
+
+
+# ---- 以下为在推理执行器中运行的任务（进程池模式下需可 pickle，因此为模块级函数） ----
+
+def _letterbox(image, size: int, stride: int = 32):
+    """等比缩放到长边为 size，并以最小矩形填充到 stride 的整数倍（与 ultralytics 相同的灰色填充）
+    
+    预处理后的图像再交给 ultralytics 时不会被再次缩放或填充。
+    
+    Returns:
+        (处理后的图像, 缩放比例, (左侧填充, 顶部填充))
+    """
+    import cv2
+    
+    height, width = image.shape[:2]
+    ratio = min(size / height, size / width)
+    new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+    if (new_width, new_height) != (width, height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    
+    pad_x, pad_y = ((size - new_width) % stride) / 2, ((size - new_height) % stride) / 2
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return image, ratio, (left, top)
+
+
+def _prepare_images_job(images: List, size: int):
+    """对一组图片做 letterbox 预处理，输入尺寸相同的模型共用结果"""
+    return [_letterbox(image, size) for image in images]
+
+
+def _group_by_shape(prepared: List[tuple]) -> List[List[int]]:
+    """按预处理后的形状分组（返回下标），形状相同的图片才能组成一个批次"""
+    shape_groups = {}
+    for index, item in enumerate(prepared):
+        shape_groups.setdefault(item[0].shape, []).append(index)
+    return list(shape_groups.values())
+
+
+def _infer_batch_job(handle, prepared: List[tuple], sizes: List[tuple], model_meta: dict, options: dict):
+    """同一模型对一批预处理后的图片做一次批量前向推理，返回每张图片的检测结果"""
+    with use_model(handle) as model:
+        results = model([item[0] for item in prepared], verbose=False, **options)
+    
+    batch_detections = []
+    for result, (_, ratio, pad), (width, height) in zip(results, prepared, sizes):
+        batch_detections.append(_parse_results([result], model_meta, letterbox=(ratio, pad, width, height)))
+    return batch_detections
+
+
+def _infer_uploads_job(handle, contents: List[bytes], model_meta: dict, options: dict):
+    """解码并批量推理一组上传的图片（微批处理），单张图片失败不影响其他图片"""
+    outputs = [None] * len(contents)
+    prepared, sizes, indices = [], [], []
+    for index, content in enumerate(contents):
+        try:
+            image = _decode_image(content)
+        except Exception as e:
+            outputs[index] = {"error": str(e)}
+            continue
+        image_height, image_width = image.shape[:2]
+        prepared.append(_letterbox(image, options["imgsz"]))
+        sizes.append((image_width, image_height))
+        indices.append(index)
+    
+    for group in _group_by_shape(prepared):
+        batch_detections = _infer_batch_job(
+            handle, [prepared[i] for i in group], [sizes[i] for i in group], model_meta, options
+        )
+        for i, detections in zip(group, batch_detections):
+            image_width, image_height = sizes[i]
+            outputs[indices[i]] = {
+                "detections": detections,
+                "image_width": image_width,
+                "image_height": image_height
+            }
+    return outputs
+
+
+def _infer_video_job(handle, input_path: str, output_path: str, model_meta: dict, options: dict,
+                     stride: int = 1, adaptive: bool = False, diff_threshold: float = 8.0,
+                     stop: threading.Event = None):
+    """视频推理：解码、批量推理、绘制并写出三个阶段流水线并行
+    
+    按 stride / adaptive 抽帧，未推理的帧沿用最近一次的检测结果绘制。
+    stop 被设置（请求超时）时流水线尽快停止，释放工作线程（进程池模式下无法传入，为 None）。
+    """
+    import cv2
+    
+    # 打开视频
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        return {"error": "无法打开视频文件"}
+    
+    # 获取视频信息
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    
+    # 创建视频写入器
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    
+    summary = {"total_detections": 0, "frames_with_detections": 0}
+    sampler = FrameSampler(stride, adaptive, diff_threshold)
+    
+    def _write_frame(frame_number, frame, frame_detections):
+        # 编码阶段：绘制检测框并按原始顺序写入
+        for det in frame_detections:
+            x1, y1, x2, y2 = det["bbox"]
+            _draw_box(frame, x1, y1, x2, y2, det["class_id"], det["class_name"], det["conf"])
+        out.write(frame)
+        summary["total_detections"] += len(frame_detections)
+        if frame_detections:
+            summary["frames_with_detections"] += 1
+    
+    def _infer_frames(frames):
+        # 只在前向推理期间占用模型，视频处理期间同一模型的其他请求仍可穿插执行
+        with use_model(handle) as model:
+            results = model(frames, verbose=False, **options)
+        return [_parse_results([result], model_meta, int_bbox=True) for result in results]
+    
+    try:
+        pipeline_stats = run_video_pipeline(
+            cap, _infer_frames, _write_frame,
+            batch_size=settings.INFER_VIDEO_BATCH_SIZE,
+            queue_size=settings.INFER_VIDEO_QUEUE_SIZE,
+            stop=stop,
+            sampler=sampler,
+        )
+    finally:
+        cap.release()
+        out.release()
+    
+    return {
+        "video_info": {
+            "fps": fps,
+            "width": width,
+            "height": height,
+            "total_frames": total_frames,
+            "processed_frames": sampler.processed,
+            "skipped_frames": sampler.skipped
+        },
+        "summary": summary,
+        "pipeline": pipeline_stats
+    }
+
+
+def _encode_jpeg(frame, quality: int = 80) -> bytes:
+    """将帧编码为JPEG"""
+    import cv2
+    
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+
+def _infer_frame_job(handle, frame, model_meta: dict, options: dict):
+    """推理一帧并编码为JPEG，返回 (JPEG字节, 检测结果)"""
+    with use_model(handle) as model:
+        results = model(frame, verbose=False, **options)
+    frame_detections = _parse_results(results, model_meta, int_bbox=True)
+    return _render_frame_job(frame, frame_detections), frame_detections
+
+
+def _render_frame_job(frame, frame_detections: list):
+    """跳过推理的帧：沿用已有检测结果绘制并编码为JPEG"""
+    for det in frame_detections:
+        x1, y1, x2, y2 = det["bbox"]
+        _draw_box(frame, x1, y1, x2, y2, det["class_id"], det["class_name"], det["conf"])
+    return _encode_jpeg(frame)
+
+
+def _detect_frame_job(handle, frame, model_meta: dict, options: dict):
+    """只推理一帧，返回检测结果（不绘制、不编码）"""
+    with use_model(handle) as model:
+        results = model(frame, verbose=False, **options)
+    return _parse_results(results, model_meta, int_bbox=True)
+
+
+def _warmup_job(handle, imgsz: int, half: bool):
+    """用空白图片前向推理一次，触发权重加载和推理后端的延迟初始化，返回耗时（秒）"""
+    import numpy as np
+    
+    start = time.perf_counter()
+    with use_model(handle) as model:
+        model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, half=half, verbose=False)
+    return time.perf_counter() - start
+
+
+def _read_frame(cap, sampler: FrameSampler, frame_number: int, lock: threading.Lock):
+    """读取下一帧并判断是否需要推理，返回 (是否读到, 帧, 是否推理)
+    
+    lock 防止读取中途（请求被取消时线程仍在读取）释放 VideoCapture
+    """
+    with lock:
+        ret, frame = cap.read()
+    if not ret:
+        return False, None, False
+    return True, frame, sampler.should_infer(frame_number, frame)
+
+
+def _infer_image_job(handle, content: bytes, model_meta: dict, options: dict, return_image: bool):
+    """推理一张图片，返回 (宽, 高, 检测结果, 解码后的图片)
+    
+    return_image 为 True 时返回解码后的 BGR 数组供绘制复用（线程池模式，无需跨进程传输）
+    """
+    image = _decode_image(content)
+    image_height, image_width = image.shape[:2]
+    with use_model(handle) as model:
+        infer_results = model(image, verbose=False, **options)
+    detections = _parse_results(infer_results, model_meta)
+    return image_width, image_height, detections, image if return_image else None
+
+
+def _render_export_job(content: bytes, image, detections: list, result_image_path: str, quality: int):
+    """绘制检测框并编码写出结果图片（在绘制线程池中运行，与下一张图片的推理重叠）"""
+    import cv2
+    
+    if image is None:
+        image = _decode_image(content)
+    for det in detections:
+        _draw_box(
+            image,
+            int(det['x1']), int(det['y1']), int(det['x2']), int(det['y2']),
+            det['class_id'], det['class_name'], det['conf']
+        )
+    cv2.imwrite(result_image_path, image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+
 
 class InferService:
+    MAX_STREAM_SESSIONS = 100  # 保留统计信息的最近流式会话数
+    
     def __init__(self):
         self.registry_dir = settings.REGISTRY_DIR
         self.jobs_dir = settings.JOBS_DIR
         self.inference_results_dir = settings.INFERENCE_RESULTS_DIR
-        self._model_cache: Dict[str, Any] = {}  # 模型缓存
+        self.model_pool = model_pool  # 全局 LRU 模型池
+        self.executor = infer_executor  # 专用推理执行器
+        self.result_cache = result_cache  # 推理结果缓存
+        self._loading: Dict[str, asyncio.Future] = {}  # 正在加载的模型（single-flight）
+        self._batchers: Dict[str, MicroBatcher] = {}  # 单图推理的按模型请求合并器
+        self._stream_sessions: "OrderedDict[str, StreamSession]" = OrderedDict()  # 最近的流式推理会话
+        self._export_jobs: Dict[str, ExportJob] = {}  # 本次运行中创建或继续的导出任务
+        self._export_tasks: Dict[str, asyncio.Task] = {}
+        self._export_semaphore = asyncio.Semaphore(settings.INFER_EXPORT_WORKERS)  # 同时运行的导出任务数
+        self._render_executor = None  # 导出任务绘制结果图片的线程池（首次使用时创建）
+        self.warmup_status = "idle"  # idle / warming_up / ready
+        self._warmup_results: Dict[str, dict] = {}  # 各模型的预热耗时
+        self._recent_file = settings.MODELS_DIR / "recent_models.json"  # 最近加载的模型ID（用于启动预加载）
+        self._recent_lock = threading.Lock()
     
-    def _get_model(self, model_id: str):
-        """获取模型（带缓存）"""
-        if model_id in self._model_cache:
-            return self._model_cache[model_id]
+    async def _get_model(self, model_id: str):
+        """获取模型（带缓存）并占用
         
+        同一模型ID同时只会有一次加载，并发的请求共享该次加载的结果或错误。
+        
+        Returns:
+            (PooledModel, error)，成功时调用方需在推理结束后 model_pool.release(entry)
+        """
+        entry = self.model_pool.get(model_id)
+        if entry is None:
+            loading = self._loading.get(model_id)
+            if loading is None:
+                loading = asyncio.ensure_future(asyncio.to_thread(self._load_model, model_id))
+                self._loading[model_id] = loading
+                loading.add_done_callback(lambda _: self._loading.pop(model_id, None))
+            # shield：某个等待者被取消时不影响其他等待者和加载本身
+            entry, error = await asyncio.shield(loading)
+            if error:
+                return None, error
+        
+        self.model_pool.acquire(entry)
+        return entry, None
+    
+    def _load_model(self, model_id: str):
+        """解析权重路径并加载模型放入模型池（同步方法，在线程中调用）"""
         model_dir = self.registry_dir / model_id
         model_file = model_dir / "model.json"
         
         if not model_file.exists():
-            return None, None, "Model not found"
+            return None, "Model not found"
         
         with open(model_file, "r", encoding="utf-8") as f:
             model_meta = json.load(f)
@@ -41,7 +469,7 @@ class InferService:
         # 处理权重路径：可能是绝对路径或相对路径
         weights_path_str = model_meta.get("weights_path", "")
         if not weights_path_str:
-            return None, None, "Model weights_path not found in model.json"
+            return None, "Model weights_path not found in model.json"
         
         weights_path = Path(weights_path_str)
         
@@ -85,6 +513,7 @@ class InferService:
                                     model_meta["weights_path"] = str(target_file.resolve())
                                     with open(model_file, "w", encoding="utf-8") as f:
                                         json.dump(model_meta, f, indent=2, ensure_ascii=False)
+                                    model_registry.upsert(model_meta)
                                     weights_path = target_file
                                     break
                                 else:
@@ -108,78 +537,266 @@ class InferService:
                     break
             
             if not found:
-                return None, None, error_msg
+                return None, error_msg
         
-        from ultralytics import YOLO
-        model = YOLO(str(weights_path))
+        # 选择推理运行时：优先使用已导出的最快格式（ONNX / OpenVINO），否则使用 PyTorch 权重
+        runtime = select_runtime(model_dir, model_meta, weights_path, settings.INFER_RUNTIME)
+        runtime_path = str(runtime["path"])
         
-        self._model_cache[model_id] = (model, model_meta, None)
-        return model, model_meta, None
+        task = model_meta.get("task") or "detect"
+        if self.executor.uses_processes:
+            # 进程池模式：模型由各工作进程按权重路径各自加载并缓存，这里只登记路径和任务类型
+            model, memory_bytes, load_seconds = (runtime_path, task), 0, 0.0
+        else:
+            from ultralytics import YOLO
+            model, memory_bytes, load_seconds = self.model_pool.measure_load(lambda: YOLO(runtime_path, task=task))
+        
+        entry = self.model_pool.put(
+            model_id, model, model_meta, runtime_path, memory_bytes, load_seconds, runtime=runtime["name"]
+        )
+        self._record_recent_model(model_id)
+        return entry, None
     
-    async def infer(self, model_id: str, file: UploadFile):
-        """执行推理"""
-        model, model_meta, error = self._get_model(model_id)
-        if error:
-            return {"error": error}
+    def _record_recent_model(self, model_id: str):
+        """记录最近加载的模型（按加载时间倒序），下次启动时可预加载"""
+        with self._recent_lock:
+            recent = self.get_recent_model_ids()
+            recent = [model_id] + [mid for mid in recent if mid != model_id]
+            try:
+                self._recent_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(self._recent_file, "w", encoding="utf-8") as f:
+                    json.dump(recent[:50], f)
+            except OSError as e:
+                print(f"Warning: Failed to record recent model: {e}")
+    
+    def get_recent_model_ids(self, limit: int = None) -> List[str]:
+        """最近加载的模型ID（仍存在于模型仓库中的）"""
+        try:
+            with open(self._recent_file, "r", encoding="utf-8") as f:
+                recent = json.load(f)
+        except (OSError, ValueError):
+            recent = []
+        recent = [mid for mid in recent if (self.registry_dir / mid / "model.json").exists()]
+        return recent[:limit] if limit is not None else recent
+    
+    def get_preload_model_ids(self) -> List[str]:
+        """启动时需要预加载的模型：PRELOAD_MODELS，未配置时为最近使用的 PRELOAD_RECENT_MODELS 个"""
+        if settings.PRELOAD_MODELS:
+            return list(settings.PRELOAD_MODELS)
+        if settings.PRELOAD_RECENT_MODELS > 0:
+            return self.get_recent_model_ids(settings.PRELOAD_RECENT_MODELS)
+        return []
+    
+    async def warmup_models(self, model_ids: List[str]):
+        """预加载模型并用空白图片推理一次，记录各模型的加载和预热耗时
+        
+        预热期间 warmup_status 为 warming_up（/health 返回 503）。
+        进程池模式下只有执行预热任务的那个工作进程加载了模型。
+        """
+        self.warmup_status = "warming_up"
+        try:
+            for model_id in model_ids:
+                start = time.perf_counter()
+                entry, error = await self._get_model(model_id)
+                if error:
+                    self._warmup_results[model_id] = {"status": "error", "error": error}
+                    continue
+                try:
+                    options = resolve_infer_options(entry.model_meta)
+                    warmup_seconds = await self.executor.run(
+                        _warmup_job, entry.model, options["imgsz"], options["half"]
+                    )
+                    self._warmup_results[model_id] = {
+                        "status": "ready",
+                        "runtime": entry.runtime,
+                        "imgsz": options["imgsz"],
+                        "load_seconds": round(entry.load_seconds, 3),
+                        "warmup_seconds": round(warmup_seconds, 3),
+                        "total_seconds": round(time.perf_counter() - start, 3)
+                    }
+                except Exception as e:
+                    self._warmup_results[model_id] = {"status": "error", "error": str(e)}
+                finally:
+                    self.model_pool.release(entry)
+                print(f"Model warm-up {model_id}: {self._warmup_results[model_id]}")
+        finally:
+            self.warmup_status = "ready"
+    
+    def get_warmup_stats(self):
+        """启动预热状态及各模型的预热耗时"""
+        return {"status": self.warmup_status, "models": self._warmup_results}
+    
+    def get_pool_stats(self):
+        """模型池统计信息"""
+        return self.model_pool.stats()
+    
+    def get_executor_stats(self):
+        """推理执行器统计信息"""
+        return self.executor.stats()
+    
+    def get_batcher_stats(self):
+        """各模型微批处理统计：队列深度及批次大小直方图"""
+        return {model_id: batcher.stats() for model_id, batcher in self._batchers.items()}
+    
+    def get_stream_stats(self):
+        """流式视频推理统计：最近会话的产出、发送和丢弃帧数"""
+        sessions = [session.to_dict() for session in reversed(self._stream_sessions.values())]
+        return {
+            "active": sum(1 for session in sessions if session["status"] == "running"),
+            "frames_dropped": sum(session["frames_dropped"] for session in sessions),
+            "sessions": sessions
+        }
+    
+    def get_cache_stats(self):
+        """推理结果缓存统计"""
+        return self.result_cache.stats()
+    
+    def clear_cache(self):
+        """清空推理结果缓存"""
+        self.result_cache.clear()
+        return {"ok": True}
+    
+    async def _cache_lookup(self, entry, contents: List[bytes], params: Dict[str, Any]):
+        """计算一组上传内容的缓存键并查找缓存，返回 (缓存键列表, 缓存结果列表)；缓存关闭时键为 None
         
-        # 保存上传的图片到临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-            content = await file.read()
-            tmp.write(content)
-            tmp_path = tmp.name
+        params 为合并后的推理参数，参与缓存键
+        """
+        if not self.result_cache.enabled:
+            return [None] * len(contents), [None] * len(contents)
+        
+        
+        def _lookup():
+            keys, cached = [], []
+            for content in contents:
+                key = self.result_cache.make_key(
+                    content, entry.model_id, entry.weights_mtime, entry.meta_version, params
+                )
+                keys.append(key)
+                cached.append(self.result_cache.get(entry.model_id, key))
+            return keys, cached
+        
+        return await asyncio.to_thread(_lookup)
+    
+    async def _cache_store(self, entry, key: str, value):
+        if key is not None:
+            await asyncio.to_thread(self.result_cache.put, entry.model_id, key, value)
+    
+    def _get_batcher(self, model_id: str) -> MicroBatcher:
+        batcher = self._batchers.get(model_id)
+        if batcher is None:
+            batcher = MicroBatcher(
+                lambda items: self._run_micro_batch(model_id, items),
+                settings.INFER_BATCH_WINDOW_MS / 1000,
+                settings.INFER_MAX_BATCH_SIZE,
+            )
+            self._batchers[model_id] = batcher
+        return batcher
+    
+    async def _run_micro_batch(self, model_id: str, items: List[tuple]):
+        """对合并后的一批单图请求做批量推理
+        
+        items 为 (图片字节, 合并后的推理参数)，推理参数相同的请求才能合并为一次推理
+        """
+        entry, error = await self._get_model(model_id)
+        if error:
+            return [{"error": error}] * len(items)
         
         try:
-            # 获取图片尺寸 (使用 with 确保文件正确关闭)
-            with Image.open(tmp_path) as img:
-                image_width, image_height = img.size
-            
-            results = model(tmp_path, verbose=False)
+            groups = {}
+            for index, (_, options) in enumerate(items):
+                groups.setdefault(json.dumps(options, sort_keys=True), []).append(index)
             
-            # 解析结果
-            detections = self._parse_results(results, model_meta)
+            outputs = [None] * len(items)
+            for indices in groups.values():
+                options = items[indices[0]][1]
+                group_outputs = await self.executor.run(
+                    _infer_uploads_job, entry.model, [items[i][0] for i in indices], entry.model_meta, options
+                )
+                for i, output in zip(indices, group_outputs):
+                    outputs[i] = output
+            return outputs
+        finally:
+            self.model_pool.release(entry)
+    
+    def pin_model(self, model_id: str):
+        """固定模型，使其不会被淘汰"""
+        self.model_pool.pin(model_id)
+        return {"ok": True, "model_id": model_id, "pinned": True}
+    
+    def unpin_model(self, model_id: str):
+        """取消固定模型"""
+        self.model_pool.unpin(model_id)
+        return {"ok": True, "model_id": model_id, "pinned": False}
+    
+    async def infer(self, model_id: str, file: UploadFile, options: dict = None):
+        """执行推理：同一模型在短时间窗口内的请求会被合并为一次批量推理
+        
+        options 为推理参数（conf / iou / imgsz / max_det / half），未指定的使用模型默认值
+        """
+        content = await file.read()
+        
+        # 先确认模型可用，并在等待批次期间占用模型
+        entry, error = await self._get_model(model_id)
+        if error:
+            return {"error": error}
+        
+        try:
+            options = resolve_infer_options(entry.model_meta, options)
+            (key,), (result,) = await self._cache_lookup(entry, [content], options)
+            if result is None:
+                result = await self._get_batcher(model_id).submit((content, options))
+                if "error" in result:
+                    return result
+                await self._cache_store(entry, key, result)
             
             return {
                 "model_id": model_id,
-                "detections": detections,
-                "image_width": image_width,
-                "image_height": image_height
+                "options": options,
+                "detections": result["detections"],
+                "image_width": result["image_width"],
+                "image_height": result["image_height"]
             }
         
+        except InferExecutorError:
+            raise
+        
         except Exception as e:
             return {"error": str(e)}
         
         finally:
-            self._cleanup_temp_file(tmp_path)
+            self.model_pool.release(entry)
     
-    async def batch_infer(self, model_ids: List[str], files: List[UploadFile]):
-        """批量推理：支持多模型、多图片"""
+    async def batch_infer(self, model_ids: List[str], files: List[UploadFile], options: dict = None):
+        """批量推理：支持多模型、多图片
+        
+        options 为推理参数，未指定的字段按各模型的默认值分别合并
+        """
         results = []
-        temp_files = []
         
         try:
-            # 先保存所有图片到临时文件
+            # 先把所有图片解码到内存，各模型共用
             image_infos = []
             for file in files:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                    content = await file.read()
-                    tmp.write(content)
-                    tmp_path = tmp.name
-                    temp_files.append(tmp_path)
-                
-                # 获取图片尺寸
-                with Image.open(tmp_path) as img:
-                    image_width, image_height = img.size
+                content = await file.read()
+                image = await self.executor.run(_decode_image, content)
+                image_height, image_width = image.shape[:2]
                 
                 image_infos.append({
                     "filename": file.filename,
-                    "path": tmp_path,
+                    "content": content,
+                    "image": image,
                     "width": image_width,
                     "height": image_height
                 })
             
+            images = [info["image"] for info in image_infos]
+            sizes = [(info["width"], info["height"]) for info in image_infos]
+            batch_size = max(1, settings.INFER_BATCH_SIZE)
+            prepared_by_size = {}  # imgsz -> letterbox 后的图片，输入尺寸相同的模型共用预处理
+            
             # 对每个模型进行推理
             for model_id in model_ids:
-                model, model_meta, error = self._get_model(model_id)
+                entry, error = await self._get_model(model_id)
                 
                 if error:
                     results.append({
@@ -189,32 +806,76 @@ class InferService:
                     })
                     continue
                 
+                model_meta = entry.model_meta
+                model_options = resolve_infer_options(model_meta, options)
                 model_results = {
                     "model_id": model_id,
                     "model_name": model_meta.get("base_model", model_id),
                     "classes": model_meta.get("classes", []),
+                    "options": model_options,
                     "images": []
                 }
+                imgsz = model_options["imgsz"]
                 
-                # 对每张图片进行推理
-                for img_info in image_infos:
-                    try:
-                        infer_results = model(img_info["path"], verbose=False)
-                        detections = self._parse_results(infer_results, model_meta)
-                        
-                        model_results["images"].append({
-                            "filename": img_info["filename"],
-                            "image_width": img_info["width"],
-                            "image_height": img_info["height"],
-                            "detections": detections,
-                            "detection_count": len(detections)
-                        })
-                    except Exception as e:
-                        model_results["images"].append({
-                            "filename": img_info["filename"],
-                            "error": str(e),
-                            "detections": []
-                        })
+                # 按批次推理（期间占用模型，防止被淘汰）
+                try:
+                    images_results = [None] * len(image_infos)
+                    
+                    # 先查结果缓存，只推理未命中的图片
+                    keys, cached = await self._cache_lookup(
+                        entry, [info["content"] for info in image_infos], model_options
+                    )
+                    for i, hit in enumerate(cached):
+                        if hit is not None:
+                            images_results[i] = {
+                                "filename": image_infos[i]["filename"],
+                                "image_width": hit["image_width"],
+                                "image_height": hit["image_height"],
+                                "detections": hit["detections"],
+                                "detection_count": len(hit["detections"])
+                            }
+                    missing = [i for i, hit in enumerate(cached) if hit is None]
+                    
+                    if missing and imgsz not in prepared_by_size:
+                        prepared_by_size[imgsz] = await self.executor.run(_prepare_images_job, images, imgsz)
+                    prepared = prepared_by_size.get(imgsz)
+                    
+                    groups = _group_by_shape([prepared[i] for i in missing]) if missing else []
+                    for group in groups:
+                        indices = [missing[j] for j in group]
+                        for start in range(0, len(indices), batch_size):
+                            batch = indices[start:start + batch_size]
+                            try:
+                                batch_detections = await self.executor.run(
+                                    _infer_batch_job, entry.model,
+                                    [prepared[i] for i in batch], [sizes[i] for i in batch],
+                                    model_meta, model_options
+                                )
+                                for i, detections in zip(batch, batch_detections):
+                                    images_results[i] = {
+                                        "filename": image_infos[i]["filename"],
+                                        "image_width": image_infos[i]["width"],
+                                        "image_height": image_infos[i]["height"],
+                                        "detections": detections,
+                                        "detection_count": len(detections)
+                                    }
+                                    await self._cache_store(entry, keys[i], {
+                                        "detections": detections,
+                                        "image_width": image_infos[i]["width"],
+                                        "image_height": image_infos[i]["height"]
+                                    })
+                            except InferExecutorError:
+                                raise
+                            except Exception as e:
+                                for i in batch:
+                                    images_results[i] = {
+                                        "filename": image_infos[i]["filename"],
+                                        "error": str(e),
+                                        "detections": []
+                                    }
+                    model_results["images"] = images_results
+                finally:
+                    self.model_pool.release(entry)
                 
                 results.append(model_results)
             
@@ -224,459 +885,640 @@ class InferService:
                 "total_images": len(files)
             }
         
+        except InferExecutorError:
+            raise
+        
         except Exception as e:
             return {"error": str(e)}
-        
-        finally:
-            # 清理所有临时文件
-            for tmp_path in temp_files:
-                self._cleanup_temp_file(tmp_path)
-    
-    def _parse_results(self, results, model_meta):
-        """解析推理结果"""
-        detections = []
-        for result in results:
-            boxes = result.boxes
-            for i in range(len(boxes)):
-                box = boxes[i]
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                conf = float(box.conf[0])
-                class_id = int(box.cls[0])
-                
-                classes = model_meta.get("classes", [])
-                class_name = classes[class_id] if class_id < len(classes) else f"class_{class_id}"
-                
-                detections.append({
-                    "class_id": class_id,
-                    "class_name": class_name,
-                    "conf": conf,
-                    "x1": x1,
-                    "y1": y1,
-                    "x2": x2,
-                    "y2": y2
-                })
-        return detections
     
     def _cleanup_temp_file(self, tmp_path: str):
         """清理临时文件"""
         try:
-            time.sleep(0.1)
             os.remove(tmp_path)
         except Exception:
             pass
     
-    async def infer_video(self, model_id: str, file: UploadFile, conf_threshold: float = 0.25):
-        """视频推理：返回处理后的视频文件"""
-        model, model_meta, error = self._get_model(model_id)
+    async def save_upload(self, file: UploadFile, default_suffix: str = ".mp4", dest: str = None) -> str:
+        """把上传文件分块写入临时文件（不一次性读入内存），返回文件路径；指定 dest 时写入该路径"""
+        if dest is not None:
+            tmp = await asyncio.to_thread(open, dest, "wb")
+        else:
+            suffix = Path(file.filename or "").suffix or default_suffix
+            tmp = await asyncio.to_thread(tempfile.NamedTemporaryFile, delete=False, suffix=suffix)
+        try:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                await asyncio.to_thread(tmp.write, chunk)
+        except Exception:
+            tmp.close()
+            self._cleanup_temp_file(tmp.name)
+            raise
+        await asyncio.to_thread(tmp.close)
+        return tmp.name
+    
+    def get_video_result_path(self, video_id: str):
+        """视频推理结果文件路径，不存在或ID非法时返回 None"""
+        if not video_id.startswith("video_") or Path(video_id).name != video_id:
+            return None
+        video_path = self.inference_results_dir / video_id / "result.mp4"
+        return video_path if video_path.is_file() else None
+    
+    async def infer_video(self, model_id: str, file: UploadFile, options: dict = None,
+                          stride: int = 1, adaptive: bool = False, diff_threshold: float = 8.0):
+        """视频推理：处理后的视频保存为推理结果，返回元数据和下载地址
+        
+        stride / adaptive / diff_threshold 控制抽帧，见 FrameSampler
+        
+        超过 INFER_VIDEO_TIMEOUT 时返回 504：线程池模式下通过停止事件中止流水线并释放工作线程；
+        进程池模式下无法向工作进程传递停止事件，超时的视频会在工作进程中继续处理到结束（结果被丢弃），期间占用一个工作进程
+        """
+        # 分块保存上传的视频到临时文件
+        input_path = await self.save_upload(file)
+        
+        entry, error = await self._get_model(model_id)
         if error:
+            self._cleanup_temp_file(input_path)
             return {"error": error}
         
-        # 确定视频后缀
-        original_filename = file.filename or "video.mp4"
-        suffix = Path(original_filename).suffix or ".mp4"
-        
-        # 保存上传的视频到临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            content = await file.read()
-            tmp.write(content)
-            input_path = tmp.name
+        options = resolve_infer_options(entry.model_meta, options)
+        # 输出视频保存在推理结果目录下，写完后再改名，避免被下载到不完整的文件
+        video_id = f"video_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        video_dir = self.inference_results_dir / video_id
+        output_path = video_dir / "result.mp4"
+        partial_path = video_dir / "result.part.mp4"
         
-        # 输出视频路径
-        output_path = tempfile.mktemp(suffix=".mp4")
+        # 超时后通知仍在运行的流水线停止（future.cancel() 无法中止已开始的任务）
+        stop = None if self.executor.uses_processes else threading.Event()
         
         try:
-            # 打开视频
-            cap = cv2.VideoCapture(input_path)
-            if not cap.isOpened():
-                return {"error": "无法打开视频文件"}
-            
-            # 获取视频信息
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            
-            # 创建视频写入器
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+            await asyncio.to_thread(lambda: video_dir.mkdir(parents=True, exist_ok=True))
+            try:
+                result = await self.executor.run(
+                    _infer_video_job, entry.model, input_path, str(partial_path), entry.model_meta, options,
+                    stride, adaptive, diff_threshold, stop,
+                    timeout=settings.INFER_VIDEO_TIMEOUT
+                )
+            except InferTimeoutError:
+                if stop is not None:
+                    stop.set()
+                raise
+            if "error" in result:
+                await asyncio.to_thread(shutil.rmtree, video_dir, True)
+                return result
             
-            classes = model_meta.get("classes", [])
-            frame_count = 0
-            all_detections = []
-            
-            # 处理每一帧
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                frame_count += 1
-                
-                # 使用YOLO进行推理
-                results = model(frame, verbose=False, conf=conf_threshold)
-                
-                # 绘制检测框
-                frame_detections = []
-                for result in results:
-                    boxes = result.boxes
-                    for i in range(len(boxes)):
-                        box = boxes[i]
-                        x1, y1, x2, y2 = [int(v) for v in box.xyxy[0].tolist()]
-                        conf = float(box.conf[0])
-                        class_id = int(box.cls[0])
-                        class_name = classes[class_id] if class_id < len(classes) else f"class_{class_id}"
-                        
-                        # 绘制边界框
-                        color = self._get_color(class_id)
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                        
-                        # 绘制标签
-                        label = f"{class_name}: {conf:.2f}"
-                        label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-                        cv2.rectangle(frame, (x1, y1 - label_size[1] - 10), 
-                                    (x1 + label_size[0], y1), color, -1)
-                        cv2.putText(frame, label, (x1, y1 - 5), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                        
-                        frame_detections.append({
-                            "class_id": class_id,
-                            "class_name": class_name,
-                            "conf": conf,
-                            "bbox": [x1, y1, x2, y2]
-                        })
-                
-                all_detections.append({
-                    "frame": frame_count,
-                    "detections": frame_detections
-                })
-                
-                # 写入处理后的帧
-                out.write(frame)
+            metadata = {
+                "video_id": video_id,
+                "model_id": model_id,
+                "created_at": datetime.now().isoformat(),
+                "source_filename": file.filename,
+                "options": options,
+                "stride": stride,
+                "adaptive": adaptive,
+                "diff_threshold": diff_threshold if adaptive else None,
+                "video_info": result["video_info"],
+                "summary": result["summary"]
+            }
             
-            cap.release()
-            out.release()
+            def _finish():
+                os.replace(partial_path, output_path)
+                with open(video_dir / "metadata.json", "w", encoding="utf-8") as f:
+                    json.dump(metadata, f, indent=2, ensure_ascii=False)
+                return output_path.stat().st_size
             
-            # 读取输出视频为base64
-            with open(output_path, "rb") as f:
-                video_data = base64.b64encode(f.read()).decode('utf-8')
+            video_size = await asyncio.to_thread(_finish)
             
             return {
                 "model_id": model_id,
-                "video_data": video_data,
-                "video_info": {
-                    "fps": fps,
-                    "width": width,
-                    "height": height,
-                    "total_frames": total_frames,
-                    "processed_frames": frame_count
-                },
-                "summary": {
-                    "total_detections": sum(len(f["detections"]) for f in all_detections),
-                    "frames_with_detections": sum(1 for f in all_detections if f["detections"])
-                }
+                "video_id": video_id,
+                "video_url": f"/infer/videos/{video_id}",
+                "video_size": video_size,
+                "options": options,
+                "video_info": result["video_info"],
+                "summary": result["summary"],
+                "pipeline": result["pipeline"]
             }
         
+        except InferExecutorError:
+            await asyncio.to_thread(shutil.rmtree, video_dir, True)
+            raise
+        
         except Exception as e:
+            await asyncio.to_thread(shutil.rmtree, video_dir, True)
             return {"error": str(e)}
         
         finally:
+            self.model_pool.release(entry)
             self._cleanup_temp_file(input_path)
-            self._cleanup_temp_file(output_path)
     
-    async def infer_video_stream(self, model_id: str, file: UploadFile, conf_threshold: float = 0.25) -> AsyncGenerator:
-        """视频推理流式接口：逐帧返回结果"""
-        model, model_meta, error = self._get_model(model_id)
-        if error:
-            yield f"data: {json.dumps({'error': error})}\n\n"
-            return
+    async def _decode_video_frames(self, model_id: str, input_path: str, options: dict = None,
+                                   stride: int = 1, adaptive: bool = False, diff_threshold: float = 8.0,
+                                   render: bool = True) -> AsyncGenerator:
+        """逐帧推理视频，依次产出事件
         
-        # 确定视频后缀
-        original_filename = file.filename or "video.mp4"
-        suffix = Path(original_filename).suffix or ".mp4"
+        - ("info", {...})：视频信息和类别列表
+        - ("frame", 帧号, 是否推理, JPEG字节或None, 检测结果)：render=False 时不绘制也不编码图片
+        - ("complete", {...})：处理完成，包含推理和跳过的帧数
+        - ("error", 错误信息)
         
-        # 保存上传的视频到临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            content = await file.read()
-            tmp.write(content)
-            input_path = tmp.name
+        input_path 为已保存的上传视频（需在返回流式响应前保存，此时上传文件尚未关闭），结束后删除。
+        按 stride / adaptive 抽帧，未推理的帧沿用最近一次的检测结果。
+        """
+        import cv2
+        
+        entry, error = await self._get_model(model_id)
+        if error:
+            self._cleanup_temp_file(input_path)
+            yield ("error", error)
+            return
         
+        options = resolve_infer_options(entry.model_meta, options)
+        cap = None
+        read_lock = threading.Lock()
         try:
             # 打开视频
             cap = cv2.VideoCapture(input_path)
             if not cap.isOpened():
-                yield f"data: {json.dumps({'error': '无法打开视频文件'})}\n\n"
+                yield ("error", "无法打开视频文件")
                 return
             
             # 获取视频信息
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            
-            # 发送视频信息
-            yield f"data: {json.dumps({'type': 'info', 'fps': fps, 'width': width, 'height': height, 'total_frames': total_frames})}\n\n"
+            yield ("info", {
+                "fps": cap.get(cv2.CAP_PROP_FPS),
+                "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                "total_frames": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+                "classes": entry.model_meta.get("classes", []),
+                "options": options
+            })
             
-            classes = model_meta.get("classes", [])
             frame_count = 0
+            sampler = FrameSampler(stride, adaptive, diff_threshold)
+            last_detections = []
             
             # 处理每一帧
             while True:
-                ret, frame = cap.read()
+                ret, frame, infer = await asyncio.to_thread(_read_frame, cap, sampler, frame_count + 1, read_lock)
                 if not ret:
                     break
                 
                 frame_count += 1
+                buffer = None
                 
-                # 使用YOLO进行推理
-                results = model(frame, verbose=False, conf=conf_threshold)
-                
-                # 解析检测结果
-                frame_detections = []
-                for result in results:
-                    boxes = result.boxes
-                    for i in range(len(boxes)):
-                        box = boxes[i]
-                        x1, y1, x2, y2 = [int(v) for v in box.xyxy[0].tolist()]
-                        conf = float(box.conf[0])
-                        class_id = int(box.cls[0])
-                        class_name = classes[class_id] if class_id < len(classes) else f"class_{class_id}"
-                        
-                        # 绘制边界框到帧上
-                        color = self._get_color(class_id)
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                        
-                        # 绘制标签
-                        label = f"{class_name}: {conf:.2f}"
-                        label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-                        cv2.rectangle(frame, (x1, y1 - label_size[1] - 10), 
-                                    (x1 + label_size[0], y1), color, -1)
-                        cv2.putText(frame, label, (x1, y1 - 5), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                        
-                        frame_detections.append({
-                            "class_id": class_id,
-                            "class_name": class_name,
-                            "conf": conf,
-                            "bbox": [x1, y1, x2, y2]
-                        })
+                if infer and render:
+                    # 在推理执行器中推理、绘制检测框并编码为JPEG
+                    buffer, last_detections = await self.executor.run(
+                        _infer_frame_job, entry.model, frame, entry.model_meta, options
+                    )
+                elif infer:
+                    # 只需要检测结果：不绘制、不编码
+                    last_detections = await self.executor.run(
+                        _detect_frame_job, entry.model, frame, entry.model_meta, options
+                    )
+                elif render:
+                    # 沿用上一次的检测结果，只绘制和编码
+                    buffer = await asyncio.to_thread(_render_frame_job, frame, last_detections)
                 
-                # 将帧编码为JPEG
-                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                frame_base64 = base64.b64encode(buffer).decode('utf-8')
-                
-                # 发送帧数据
-                yield f"data: {json.dumps({'type': 'frame', 'frame_number': frame_count, 'frame_data': frame_base64, 'detections': frame_detections})}\n\n"
-                
-                # 控制帧率，避免处理过快
-                await asyncio.sleep(0.01)
+                yield ("frame", frame_count, infer, buffer, last_detections)
             
-            cap.release()
-            
-            # 发送完成信号
-            yield f"data: {json.dumps({'type': 'complete', 'processed_frames': frame_count})}\n\n"
+            yield ("complete", {"processed_frames": sampler.processed, "skipped_frames": sampler.skipped})
         
         except Exception as e:
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield ("error", str(e))
         
         finally:
+            if cap is not None:
+                with read_lock:
+                    cap.release()
+            self.model_pool.release(entry)
             self._cleanup_temp_file(input_path)
     
-    def _get_color(self, class_id: int) -> tuple:
-        """根据类别ID生成颜色"""
-        colors = [
-            (0, 255, 0),    # 绿色
-            (255, 0, 0),    # 蓝色
-            (0, 0, 255),    # 红色
-            (255, 255, 0),  # 青色
-            (255, 0, 255),  # 洋红色
-            (0, 255, 255),  # 黄色
-            (128, 0, 255),  # 紫色
-            (255, 128, 0),  # 橙色
-            (0, 128, 255),  # 橙黄色
-            (255, 0, 128),  # 粉色
-        ]
-        return colors[class_id % len(colors)]
-    
-    async def infer_and_save(self, model_id: str, files: List[UploadFile], save_results: bool = True):
-        """推理并保存结果图片，生成UUID和CSV"""
-        model, model_meta, error = self._get_model(model_id)
-        if error:
-            return {"error": error}
+    async def _video_frame_events(self, model_id: str, input_path: str, options: dict = None,
+                                  stride: int = 1, adaptive: bool = False, diff_threshold: float = 8.0,
+                                  render: bool = True, is_disconnected=None, transport: str = "sse") -> AsyncGenerator:
+        """带背压的逐帧事件流，供不同的流式接口按各自格式编码
+        
+        解码和推理在后台任务中按自身速度进行，帧放入 latest-frame-wins 缓冲区：
+        客户端消费慢时只拿到最新的帧，被覆盖的帧计入会话的丢帧数。
+        客户端断开（is_disconnected 返回 True，或响应被取消）时立即停止解码和推理。
+        事件格式见 _decode_video_frames，视频信息中附带 session_id。
+        """
+        session = StreamSession(model_id, transport)
+        self._stream_sessions[session.session_id] = session
+        while len(self._stream_sessions) > self.MAX_STREAM_SESSIONS:
+            self._stream_sessions.popitem(last=False)
+        buffer = session.buffer
+        
+        async def _produce():
+            events = self._decode_video_frames(
+                model_id, input_path, options, stride, adaptive, diff_threshold, render=render
+            )
+            try:
+                async for event in events:
+                    if is_disconnected is not None and await is_disconnected():
+                        session.finish("disconnected")
+                        break
+                    if event[0] == "frame":
+                        session.frames_produced += 1
+                        buffer.put_frame(event)
+                    else:
+                        buffer.put_control(event)
+            finally:
+                await events.aclose()
+                buffer.put_control(None)  # 结束标记
+        
+        producer = asyncio.create_task(_produce())
+        try:
+            while True:
+                event = await buffer.get()
+                if event is None:
+                    break
+                kind = event[0]
+                if kind == "frame":
+                    session.frames_sent += 1
+                elif kind == "info":
+                    event = ("info", {**event[1], "session_id": session.session_id})
+                elif kind == "complete":
+                    session.finish("completed")
+                    event = ("complete", {**event[1], "frames_dropped": session.frames_dropped})
+                elif kind == "error":
+                    session.finish("error")
+                yield event
+            # 生产者的异常（非推理错误事件）在这里抛出
+            await producer
+        finally:
+            if not producer.done():
+                # 客户端已断开或响应被取消：停止解码和推理
+                producer.cancel()
+            session.finish("disconnected")
+    
+    async def infer_video_stream(self, model_id: str, input_path: str, options: dict = None,
+                                 stride: int = 1, adaptive: bool = False, diff_threshold: float = 8.0,
+                                 is_disconnected=None) -> AsyncGenerator:
+        """视频推理流式接口（SSE）：逐帧返回 base64 编码的JPEG和检测结果"""
+        events = self._video_frame_events(
+            model_id, input_path, options, stride, adaptive, diff_threshold,
+            is_disconnected=is_disconnected, transport="sse"
+        )
+        async for event in events:
+            kind = event[0]
+            if kind == "error":
+                yield f"data: {json.dumps({'error': event[1]})}\n\n"
+            elif kind == "frame":
+                _, frame_number, infer, buffer, frame_detections = event
+                frame_base64 = base64.b64encode(buffer).decode('utf-8')
+                
+                # 发送帧数据（发送速度由客户端消费速度决定，来不及发送的帧被丢弃）
+                yield f"data: {json.dumps({'type': 'frame', 'frame_number': frame_number, 'inferred': infer, 'frame_data': frame_base64, 'detections': frame_detections})}\n\n"
+            else:
+                # 视频信息 / 完成信号
+                yield f"data: {json.dumps({'type': kind, **event[1]})}\n\n"
+    
+    async def infer_video_frames(self, model_id: str, input_path: str, options: dict = None,
+                                 stride: int = 1, adaptive: bool = False, diff_threshold: float = 8.0,
+                                 mode: str = "frames", is_disconnected=None) -> AsyncGenerator:
+        """视频推理二进制帧流：每帧一条记录，原始JPEG字节 + 二进制检测结果，格式见 _pack_frame_record
+        
+        mode 为 "detections" 时只发送检测结果（客户端已有视频），不绘制、不编码图片。
+        """
+        render = mode == "frames"
+        events = self._video_frame_events(
+            model_id, input_path, options, stride, adaptive, diff_threshold, render=render,
+            is_disconnected=is_disconnected, transport=f"binary:{mode}"
+        )
+        async for event in events:
+            kind = event[0]
+            if kind == "frame":
+                _, frame_number, infer, buffer, frame_detections = event
+                yield _pack_frame_record(frame_number, infer, frame_detections, buffer)
+            elif kind == "error":
+                yield _pack_json_record(RECORD_ERROR, {"error": event[1]})
+            elif kind == "info":
+                yield _pack_json_record(RECORD_INFO, {**event[1], "mode": mode})
+            else:
+                yield _pack_json_record(RECORD_COMPLETE, event[1])
+    
+    async def create_export_job(self, model_id: str, files: List[UploadFile], options: dict = None,
+                                render: bool = True, jpeg_quality: int = None):
+        """创建后台推理导出任务：保存上传的图片后立即返回会话ID，推理在后台进行
+        
+        进度见 get_export_progress，同时运行的任务数受 INFER_EXPORT_WORKERS 限制。
+        render 为 False 时只生成CSV，不绘制结果图片；jpeg_quality 默认为 EXPORT_JPEG_QUALITY
+        """
+        model_file = self.registry_dir / model_id / "model.json"
+        
+        def _load_meta():
+            if not model_file.exists():
+                return None
+            with open(model_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        
+        model_meta = await asyncio.to_thread(_load_meta)
+        if model_meta is None:
+            return {"error": "Model not found"}
+        # 创建任务时确定推理参数，重启后继续的任务使用相同参数
+        options = resolve_infer_options(model_meta, options)
         
-        # 创建会话目录
         session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
         session_dir = self.inference_results_dir / session_id
-        images_dir = session_dir / "images"
+        job = ExportJob.create(session_dir, model_id, options, [file.filename for file in files])
+        job.data["render"] = render
+        job.data["jpeg_quality"] = jpeg_quality or settings.EXPORT_JPEG_QUALITY
         
-        await asyncio.to_thread(lambda: images_dir.mkdir(parents=True, exist_ok=True))
+        try:
+            await asyncio.to_thread(lambda: (session_dir / ExportJob.INPUTS_DIR).mkdir(parents=True, exist_ok=True))
+            for file, item in zip(files, job.data["inputs"]):
+                await self.save_upload(file, dest=str(job.input_path(item)))
+            await asyncio.to_thread(job.save)
+        except Exception as e:
+            await asyncio.to_thread(shutil.rmtree, session_dir, True)
+            return {"error": str(e)}
         
-        results_data = []
-        temp_files = []
+        self._start_export_job(job)
+        return {
+            "session_id": session_id,
+            "status": job.status,
+            "total": job.data["total"],
+            "options": options,
+            "render": render,
+            "jpeg_quality": job.data["jpeg_quality"]
+        }
+    
+    def _start_export_job(self, job: ExportJob):
+        self._export_jobs[job.session_id] = job
+        task = asyncio.create_task(self._run_export_job(job))
+        self._export_tasks[job.session_id] = task
+        task.add_done_callback(lambda _: self._export_tasks.pop(job.session_id, None))
+    
+    async def resume_export_jobs(self):
+        """服务启动时继续未完成的导出任务（排队中或运行中被中断的）"""
+        def _find_jobs():
+            if not self.inference_results_dir.exists():
+                return []
+            jobs = []
+            for session_dir in sorted(self.inference_results_dir.glob("session_*")):
+                job = ExportJob.load(session_dir)
+                if job is not None and not job.finished:
+                    jobs.append(job)
+            return jobs
         
-        try:
-            for file in files:
-                # 保存上传的图片到临时文件
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-                    content = await file.read()
-                    tmp.write(content)
-                    tmp_path = tmp.name
-                    temp_files.append(tmp_path)
-                
-                # 获取图片尺寸
-                with Image.open(tmp_path) as img:
-                    image_width, image_height = img.size
-                    img_array = np.array(img)
-                
-                # 执行推理
-                infer_results = model(tmp_path, verbose=False)
-                detections = self._parse_results(infer_results, model_meta)
-                
-                # 生成UUID
-                image_uuid = str(uuid.uuid4())
-                
-                # 如果需要保存结果
-                if save_results:
-                    # 在图片上绘制检测框
-                    img_with_boxes = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-                    
-                    for det in detections:
-                        x1, y1, x2, y2 = int(det['x1']), int(det['y1']), int(det['x2']), int(det['y2'])
-                        class_id = det['class_id']
-                        class_name = det['class_name']
-                        conf = det['conf']
-                        
-                        # 绘制边界框
-                        color = self._get_color(class_id)
-                        cv2.rectangle(img_with_boxes, (x1, y1), (x2, y2), color, 2)
-                        
-                        # 绘制标签
-                        label = f"{class_name}: {conf:.2f}"
-                        label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-                        cv2.rectangle(img_with_boxes, (x1, y1 - label_size[1] - 10),
-                                    (x1 + label_size[0], y1), color, -1)
-                        cv2.putText(img_with_boxes, label, (x1, y1 - 5),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                    
-                    # 保存结果图片
-                    result_image_path = images_dir / f"{image_uuid}.jpg"
-                    cv2.imwrite(str(result_image_path), img_with_boxes)
-                
-                # 记录结果
-                results_data.append({
-                    "image_uuid": image_uuid,
-                    "image_filename": file.filename,
-                    "model_id": model_id,
-                    "image_width": image_width,
-                    "image_height": image_height,
-                    "detection_count": len(detections),
-                    "detections": detections
-                })
+        jobs = await asyncio.to_thread(_find_jobs)
+        for job in jobs:
+            print(f"Resuming inference export {job.session_id} ({job.data['total']} images)")
+            self._start_export_job(job)
+        return [job.session_id for job in jobs]
+    
+    async def _run_export_job(self, job: ExportJob):
+        """逐张推理并保存结果图片，每张图片的结果立即追加到 results.jsonl，
+        检测框按批追加到列式存储（Parquet，需要 pyarrow），最后生成CSV和元数据
+        """
+        async with self._export_semaphore:
+            completed, failed = await asyncio.to_thread(job.completed_indices)
+            job.start(len(completed), failed)
+            await asyncio.to_thread(job.save)
+            writer = None
+            if parquet_available():
+                writer = DetectionWriter(job.session_dir, settings.EXPORT_PARQUET_BATCH_ROWS)
+                await asyncio.to_thread(self._recover_detection_parts, job, writer)
             
-            # 生成CSV文件
-            if save_results and results_data:
-                csv_path = session_dir / "results.csv"
-                
-                def _write_csv():
-                    with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-                        # CSV包含扁平化的检测结果
-                        fieldnames = ['image_uuid', 'image_filename', 'model_id', 'image_width', 
-                                    'image_height', 'detection_count', 'detection_index', 
-                                    'class_id', 'class_name', 'confidence', 'x1', 'y1', 'x2', 'y2']
-                        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                        writer.writeheader()
-                        
-                        for result in results_data:
-                            if result['detections']:
-                                for idx, det in enumerate(result['detections']):
-                                    writer.writerow({
-                                        'image_uuid': result['image_uuid'],
-                                        'image_filename': result['image_filename'],
-                                        'model_id': result['model_id'],
-                                        'image_width': result['image_width'],
-                                        'image_height': result['image_height'],
-                                        'detection_count': result['detection_count'],
-                                        'detection_index': idx,
-                                        'class_id': det['class_id'],
-                                        'class_name': det['class_name'],
-                                        'confidence': det['conf'],
-                                        'x1': det['x1'],
-                                        'y1': det['y1'],
-                                        'x2': det['x2'],
-                                        'y2': det['y2']
-                                    })
-                            else:
-                                # 没有检测结果的图片也记录一行
-                                writer.writerow({
-                                    'image_uuid': result['image_uuid'],
-                                    'image_filename': result['image_filename'],
-                                    'model_id': result['model_id'],
-                                    'image_width': result['image_width'],
-                                    'image_height': result['image_height'],
-                                    'detection_count': 0,
-                                    'detection_index': '',
-                                    'class_id': '',
-                                    'class_name': '',
-                                    'confidence': '',
-                                    'x1': '',
-                                    'y1': '',
-                                    'x2': '',
-                                    'y2': ''
-                                })
-                
-                await asyncio.to_thread(_write_csv)
-                
-                # 生成元数据JSON
-                metadata = {
-                    "session_id": session_id,
-                    "model_id": model_id,
-                    "created_at": datetime.now().isoformat(),
-                    "total_images": len(results_data),
-                    "total_detections": sum(r['detection_count'] for r in results_data)
-                }
+            entry, error = await self._get_model(job.model_id)
+            if error:
+                job.finish("failed", error)
+                await asyncio.to_thread(job.save)
+                return
+            
+            options = job.data["options"]
+            render = job.data.get("render", True)
+            quality = job.data.get("jpeg_quality") or settings.EXPORT_JPEG_QUALITY
+            # 线程池模式下推理任务直接返回解码后的图片供绘制复用，进程池模式下绘制时重新解码
+            return_image = render and not self.executor.uses_processes
+            images_dir = job.session_dir / "images"
+            # 绘制和写出结果图片在绘制线程池中进行，与后续图片的推理重叠；
+            # 结果按顺序在图片写出后才追加到 results.jsonl，保证重启继续时不会缺图
+            pending = deque()  # [(绘制任务, 结果)]
+            max_pending = settings.EXPORT_RENDER_WORKERS * 2
+            loop = asyncio.get_running_loop()
+            try:
+                if render:
+                    await asyncio.to_thread(lambda: images_dir.mkdir(parents=True, exist_ok=True))
                 
-                metadata_path = session_dir / "metadata.json"
+                for item in job.data["inputs"]:
+                    if item["index"] in completed:
+                        continue
+                    result = {
+                        "index": item["index"],
+                        "image_uuid": item["image_uuid"],
+                        "image_filename": item["filename"],
+                        "model_id": job.model_id
+                    }
+                    render_future = None
+                    try:
+                        content = await asyncio.to_thread(job.input_path(item).read_bytes)
+                        image_width, image_height, detections, image = await self._infer_export_image(
+                            entry, content, options, return_image
+                        )
+                        result.update({
+                            "image_width": image_width,
+                            "image_height": image_height,
+                            "detection_count": len(detections),
+                            "detections": detections
+                        })
+                        if render:
+                            render_future = loop.run_in_executor(
+                                self._get_render_executor(), _render_export_job,
+                                content, image, detections, str(images_dir / f"{item['image_uuid']}.jpg"), quality
+                            )
+                    except Exception as e:
+                        # 单张图片失败（无法解码、推理超时等）不影响其他图片
+                        result["error"] = str(e)
+                    
+                    pending.append((render_future, result))
+                    while len(pending) > max_pending:
+                        await self._append_export_result(job, writer, *pending.popleft())
                 
-                def _write_metadata():
-                    with open(metadata_path, 'w', encoding='utf-8') as f:
-                        json.dump(metadata, f, indent=2, ensure_ascii=False)
+                while pending:
+                    await self._append_export_result(job, writer, *pending.popleft())
                 
-                await asyncio.to_thread(_write_metadata)
-            
-            return {
-                "session_id": session_id,
-                "results": results_data,
-                "session_dir": str(session_dir) if save_results else None
-            }
+                if writer is not None:
+                    await asyncio.to_thread(writer.flush)
+                await asyncio.to_thread(self._finalize_export_job, job)
+                job.finish("completed")
+                print(f"Inference export {job.session_id} completed: "
+                      f"{job.data['done']} images in {job.data['elapsed_seconds']}s")
+            except asyncio.CancelledError:
+                # 服务关闭：保留 running 状态，下次启动时继续
+                raise
+            except Exception as e:
+                job.finish("failed", str(e))
+            finally:
+                self.model_pool.release(entry)
+                if job.finished:
+                    await asyncio.to_thread(job.save)
+    
+    def _get_render_executor(self):
+        """导出任务绘制结果图片用的线程池（cv2 绘制和编码会释放 GIL）"""
+        if self._render_executor is None:
+            self._render_executor = ThreadPoolExecutor(
+                max_workers=settings.EXPORT_RENDER_WORKERS, thread_name_prefix="render"
+            )
+        return self._render_executor
+    
+    async def _append_export_result(self, job: ExportJob, writer, render_future, result: dict):
+        """等待结果图片写出后再记录该图片的结果（results.jsonl 及列式存储）"""
+        if render_future is not None:
+            try:
+                await render_future
+            except Exception as e:
+                result["error"] = f"Failed to render result image: {e}"
         
-        except Exception as e:
-            return {"error": str(e)}
+        def _append():
+            job.append_result(result)
+            if writer is not None:
+                writer.add(result)
         
-        finally:
-            # 清理临时文件
-            for tmp_path in temp_files:
-                self._cleanup_temp_file(tmp_path)
+        await asyncio.to_thread(_append)
+    
+    def _recover_detection_parts(self, job: ExportJob, writer: DetectionWriter):
+        """重启继续时，把已记录在 results.jsonl 但还没写入 Parquet 分片的结果补写进去"""
+        covered = writer.covered_indices()
+        for result in job.iter_results():
+            if result["index"] not in covered:
+                writer.add(result)
+        writer.flush()
+    
+    async def _infer_export_image(self, entry, content: bytes, options: dict, return_image: bool):
+        """推理一张图片（优先使用结果缓存），执行器队列已满时等待重试
+        
+        Returns:
+            (宽, 高, 检测结果, 解码后的图片或 None)
+        """
+        (key,), (hit,) = await self._cache_lookup(entry, [content], options)
+        if hit is not None:
+            return hit["image_width"], hit["image_height"], hit["detections"], None
+        while True:
+            try:
+                image_width, image_height, detections, image = await self.executor.run(
+                    _infer_image_job, entry.model, content, entry.model_meta, options, return_image
+                )
+                break
+            except InferQueueFullError:
+                # 后台任务不拒绝，让出执行器给交互式请求
+                await asyncio.sleep(0.5)
+        await self._cache_store(entry, key, {
+            "detections": detections,
+            "image_width": image_width,
+            "image_height": image_height
+        })
+        return image_width, image_height, detections, image
+    
+    def _finalize_export_job(self, job: ExportJob):
+        """生成CSV和元数据，删除暂存的上传图片（同步方法，在线程中调用）
+        
+        逐行读取 results.jsonl，内存占用与会话大小无关
+        """
+        total_images, total_detections, failed_images = 0, 0, []
+        
+        def _succeeded():
+            nonlocal total_images, total_detections
+            for result in job.iter_results():
+                if result.get("error"):
+                    failed_images.append({"image_filename": result["image_filename"], "error": result["error"]})
+                    continue
+                total_images += 1
+                total_detections += result["detection_count"]
+                yield result
+        
+        write_results_csv(job.session_dir / "results.csv", _succeeded())
+        
+        metadata = {
+            "session_id": job.session_id,
+            "model_id": job.model_id,
+            "created_at": job.data["created_at"],
+            "options": job.data["options"],
+            "storage": "parquet" if (job.session_dir / DETECTIONS_DIR).exists() else "csv",
+            "total_images": total_images,
+            "total_detections": total_detections,
+            "failed_images": failed_images
+        }
+        with open(job.session_dir / "metadata.json", "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        
+        shutil.rmtree(job.session_dir / ExportJob.INPUTS_DIR, ignore_errors=True)
+    
+    def _get_export_job(self, session_id: str):
+        """运行中的任务从内存读取，其余从 job.json 读取；ID非法或不存在时返回 None"""
+        if not session_id.startswith("session_") or Path(session_id).name != session_id:
+            return None
+        job = self._export_jobs.get(session_id)
+        if job is None:
+            job = ExportJob.load(self.inference_results_dir / session_id)
+        return job
+    
+    async def get_export_progress(self, session_id: str):
+        """导出任务进度：已完成/总数、剩余时间估算"""
+        job = await asyncio.to_thread(self._get_export_job, session_id)
+        return job.progress() if job else None
+    
+    async def get_export_results(self, session_id: str, offset: int = 0, limit: int = None):
+        """导出任务进度及已完成图片的检测结果（按完成顺序，可分页）"""
+        job = await asyncio.to_thread(self._get_export_job, session_id)
+        if job is None:
+            return None
+        
+        def _read_page():
+            results = []
+            for position, result in enumerate(job.iter_results()):
+                if position < offset:
+                    continue
+                if limit is not None and len(results) >= limit:
+                    break
+                results.append(result)
+            return results
+        
+        results = await asyncio.to_thread(_read_page)
+        return {**job.progress(), "options": job.data["options"], "offset": offset, "results": results}
+    
+    async def query_export_detections(self, session_id: str, **filters):
+        """按类别、置信度和图片筛选导出任务的检测框，见 query_detections"""
+        job = await asyncio.to_thread(self._get_export_job, session_id)
+        if job is None:
+            return None
+        # 任务完成后 Parquet 分片才完整，运行中的任务扫描 results.jsonl
+        return await asyncio.to_thread(
+            query_detections, job.session_dir, job.iter_results(), use_parquet=job.status == "completed", **filters
+        )
+    
+    async def get_export_csv_path(self, session_id: str):
+        """已完成导出任务的CSV文件路径，不存在时返回 None"""
+        job = await asyncio.to_thread(self._get_export_job, session_id)
+        if job is None:
+            return None
+        csv_path = job.session_dir / "results.csv"
+        return csv_path if await asyncio.to_thread(csv_path.exists) else None
+    
+    def get_export_stats(self):
+        """后台导出任务统计"""
+        jobs = [job.progress() for job in reversed(self._export_jobs.values())]
+        return {
+            "workers": settings.INFER_EXPORT_WORKERS,
+            "running": sum(1 for job in jobs if job["status"] == "running"),
+            "queued": sum(1 for job in jobs if job["status"] == "queued"),
+            "jobs": jobs
+        }
     
     async def export_inference_results(self, session_id: str):
-        """导出推理结果为ZIP文件"""
+        """导出推理结果为ZIP文件，返回 ZIP 字节流生成器"""
         session_dir = self.inference_results_dir / session_id
         
         if not await asyncio.to_thread(lambda: session_dir.exists()):
             return None
         
-        # 创建临时ZIP文件
-        def _create_zip():
-            temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            temp_zip_path = temp_zip.name
-            temp_zip.close()
-            
-            with zipfile.ZipFile(temp_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # 添加所有文件
-                for item in session_dir.rglob("*"):
-                    if item.is_file():
-                        arcname = item.relative_to(session_dir)
-                        zipf.write(item, arcname)
-            
-            return temp_zip_path
+        # ZIP条目（惰性遍历，边读边发送）
+        def _entries():
+            for item in session_dir.rglob("*"):
+                # 任务状态和逐行结果是内部文件，结果见 results.csv
+                if item.is_file() and item.name not in (ExportJob.JOB_FILE, ExportJob.RESULTS_FILE):
+                    yield item, str(item.relative_to(session_dir))
         
-        zip_path = await asyncio.to_thread(_create_zip)
-        return zip_path
+        return iter_zip(_entries())
@@ -0,0 +1,105 @@
+import asyncio
+import bisect
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+class Histogram:
+    """固定分桶的计数直方图"""
+
+    def __init__(self, buckets: List[int]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个桶为 > 最大边界
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value: int):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.total,
+            "mean": round(self.sum / self.total, 3) if self.total else None,
+        }
+
+
+class MicroBatcher:
+    """单个模型的请求合并器
+
+    在 window 秒内到达的请求（最多 max_batch_size 个）合并为一次批量推理，
+    再把每个结果分发给对应的调用方。空闲时后台任务自动退出，下次提交时重新启动。
+    """
+
+    def __init__(self, run_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+                 window: float, max_batch_size: int):
+        self.run_batch = run_batch
+        self.window = window
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = None
+        self.queue_depth = Histogram([0, 1, 2, 4, 8, 16, 32, 64])
+        self.batch_size = Histogram(list(range(1, self.max_batch_size + 1)))
+
+    async def submit(self, item):
+        """提交一个请求并等待它在批次中的结果"""
+        future = asyncio.get_running_loop().create_future()
+        # 记录请求到达时前面已排队的数量
+        self.queue_depth.observe(self._queue.qsize())
+        self._queue.put_nowait((item, future))
+        if self._task is None:
+            self._task = asyncio.create_task(self._worker())
+        return await future
+
+    async def _collect(self):
+        """取出第一个请求后，在时间窗口内继续收集，直到达到最大批次"""
+        batch = [self._queue.get_nowait()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        try:
+            while not self._queue.empty():
+                batch = await self._collect()
+                # 等待期间已取消的调用方（如客户端断开）不再参与推理
+                batch = [(item, future) for item, future in batch if not future.done()]
+                if not batch:
+                    continue
+                self.batch_size.observe(len(batch))
+
+                try:
+                    results = await self.run_batch([item for item, _ in batch])
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_ms": round(self.window * 1000, 3),
+            "max_batch_size": self.max_batch_size,
+            "queued": self._queue.qsize(),
+            "queue_depth": self.queue_depth.to_dict(),
+            "batch_size": self.batch_size.to_dict(),
+        }
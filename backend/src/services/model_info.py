@@ -0,0 +1,80 @@
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def weights_fingerprint(weights_path: Path) -> Optional[Dict[str, int]]:
+    """权重文件的大小和修改时间，用于判断缓存的模型信息是否过期"""
+    try:
+        stat = os.stat(weights_path)
+    except OSError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def is_current(model_info: Optional[dict], weights_path: Path) -> bool:
+    """model.json 中缓存的模型信息是否与当前权重文件一致"""
+    if not model_info or not model_info.get("weights_fingerprint"):
+        return False
+    return model_info["weights_fingerprint"] == weights_fingerprint(weights_path)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compute_model_info(weights_path: Path, imgsz: Optional[int] = None) -> Dict[str, Any]:
+    """加载一次权重，计算任务类型、模型结构、参数量、GFLOPs、输入尺寸和文件哈希
+
+    结果写入 model.json 的 model_info，权重文件不变时直接复用，不再重复加载模型
+    """
+    from ultralytics import YOLO
+    from ultralytics.utils.torch_utils import get_flops
+
+    fingerprint = weights_fingerprint(weights_path)
+    model = YOLO(str(weights_path))
+    net = model.model
+
+    yaml_cfg = getattr(net, "yaml", None) or {}
+    ckpt = model.ckpt if isinstance(model.ckpt, dict) else {}
+    train_args = ckpt.get("train_args") or {}
+    input_size = train_args.get("imgsz") or imgsz or model.overrides.get("imgsz") or 640
+    if isinstance(input_size, (list, tuple)):
+        input_size = max(input_size)
+
+    info = {
+        "task": model.task,
+        "model_type": yaml_cfg.get("yaml_file", "unknown") if isinstance(yaml_cfg, dict) else "unknown",
+        "input_size": int(input_size),
+        "stride": int(net.stride.max()) if hasattr(net, "stride") else None,
+        "num_classes": len(model.names) if model.names else None,
+        "sha256": file_sha256(weights_path),
+        "weights_fingerprint": fingerprint,
+        "computed_at": datetime.now().isoformat(),
+    }
+
+    if hasattr(net, "model"):
+        total_params = sum(p.numel() for p in net.model.parameters())
+        trainable_params = sum(p.numel() for p in net.model.parameters() if p.requires_grad)
+        info["total_params"] = total_params
+        info["trainable_params"] = trainable_params
+        info["total_params_m"] = round(total_params / 1e6, 2)  # 百万参数
+
+    try:
+        gflops = get_flops(net, info["input_size"])
+        info["gflops"] = round(gflops, 2) if gflops else None
+    except Exception:
+        info["gflops"] = None
+
+    return info
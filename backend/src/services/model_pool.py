@@ -0,0 +1,249 @@
+import gc
+import hashlib
+import json
+import os
+import time
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+from src.core.settings import settings
+
+
+def _tensor_bytes(model: Any) -> int:
+    """模型参数和缓冲区张量占用的字节数（PyTorch 模型）；ONNX / OpenVINO 等导出格式无法获取，返回 0"""
+    net = getattr(model, "model", None)
+    try:
+        tensors = list(net.parameters()) + list(net.buffers())
+    except (AttributeError, TypeError):
+        return 0
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def _weights_bytes(weights_path: str) -> int:
+    """权重文件大小；OpenVINO 等格式导出为目录，取目录内文件总大小"""
+    try:
+        if os.path.isdir(weights_path):
+            return sum(f.stat().st_size for f in Path(weights_path).rglob("*") if f.is_file())
+        return os.path.getsize(weights_path)
+    except OSError:
+        return 0
+
+
+def _weights_mtime(weights_path: str) -> float:
+    try:
+        return os.path.getmtime(weights_path)
+    except OSError:
+        return 0.0
+
+
+def _meta_version(model_meta: dict) -> str:
+    """影响推理结果的元数据（类别名称）的哈希；修改类别后与旧条目不同，旧的缓存结果不再命中"""
+    classes = json.dumps(model_meta.get("classes", []), ensure_ascii=False)
+    return hashlib.sha256(classes.encode("utf-8")).hexdigest()[:16]
+
+
+class PooledModel:
+    """模型池中的一个条目"""
+
+    def __init__(self, model_id: str, model: Any, model_meta: dict, weights_path: str,
+                 size_bytes: int, load_seconds: float, pinned: bool = False, runtime: str = "pytorch"):
+        self.model_id = model_id
+        self.model = model
+        self.model_meta = model_meta
+        self.weights_path = weights_path
+        self.runtime = runtime  # 推理运行时：pytorch / onnx / openvino 等
+        self.size_bytes = size_bytes
+        self.weights_mtime = _weights_mtime(weights_path)  # 加载时的权重修改时间，用于结果缓存键
+        self.meta_version = _meta_version(model_meta)  # 类别名称的版本，用于结果缓存键
+        self.load_seconds = load_seconds
+        self.pinned = pinned
+        self.refcount = 0  # 正在使用该模型的推理数量
+        self.hits = 0
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+
+    def to_dict(self) -> dict:
+        return {
+            "model_id": self.model_id,
+            "weights_path": self.weights_path,
+            "runtime": self.runtime,
+            "size_bytes": self.size_bytes,
+            "size_mb": round(self.size_bytes / (1024 * 1024), 2),
+            "load_seconds": round(self.load_seconds, 3),
+            "pinned": self.pinned,
+            "in_use": self.refcount,
+            "hits": self.hits,
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used,
+        }
+
+
+class ModelPool:
+    """按字节数限额的 LRU 模型池
+
+    - 条目大小为估算值：PyTorch 模型取参数和缓冲区张量的字节数，其他运行时取权重文件大小
+      （不含推理时的中间结果和运行时自身开销；不使用加载前后的进程内存差，避免把并发推理的内存算到模型上）
+    - 超出限额时按最近最少使用顺序淘汰，固定（pinned）的模型不会被淘汰
+    - 正在被推理使用的模型（refcount > 0）不会被淘汰，待释放后再回收
+    """
+
+    def __init__(self, max_bytes: int, pinned: Iterable[str] = ()):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, PooledModel]" = OrderedDict()
+        self._pinned = set(pinned)
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._loads = 0
+        self._load_seconds_total = 0.0
+        self._load_seconds_max = 0.0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def get(self, model_id: str) -> Optional[PooledModel]:
+        """查找模型并标记为最近使用，未命中返回 None"""
+        with self._lock:
+            entry = self._entries.get(model_id)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(model_id)
+            entry.hits += 1
+            entry.last_used = time.time()
+            self._hits += 1
+            return entry
+
+    def measure_load(self, load_fn):
+        """执行加载函数并返回 (结果, 估算的内存占用字节数, 耗时秒数)
+
+        内存占用按模型张量大小估算（见 _tensor_bytes），为 0 时由 put 改用权重文件大小
+        """
+        start = time.perf_counter()
+        result = load_fn()
+        elapsed = time.perf_counter() - start
+        return result, _tensor_bytes(result), elapsed
+
+    def put(self, model_id: str, model: Any, model_meta: dict, weights_path: str,
+            memory_bytes: int = 0, load_seconds: float = 0.0, runtime: str = "pytorch") -> PooledModel:
+        """放入新加载的模型，必要时淘汰旧模型
+
+        memory_bytes 为估算的内存占用，未提供时按权重文件大小计
+        """
+        entry = PooledModel(
+            model_id, model, model_meta, str(weights_path),
+            size_bytes=memory_bytes or _weights_bytes(weights_path),
+            load_seconds=load_seconds,
+            pinned=model_id in self._pinned,
+            runtime=runtime,
+        )
+
+        with self._lock:
+            # 同ID的旧条目直接替换，仍在使用它的推理持有自己的引用
+            self._entries.pop(model_id, None)
+            self._entries[model_id] = entry
+            self._loads += 1
+            self._load_seconds_total += load_seconds
+            self._load_seconds_max = max(self._load_seconds_max, load_seconds)
+            evicted = self._evict_locked(keep=model_id)
+
+        self._after_evict(evicted)
+        return entry
+
+    def acquire(self, entry: PooledModel):
+        """推理开始前占用模型，防止其被淘汰"""
+        with self._lock:
+            entry.refcount += 1
+
+    def release(self, entry: PooledModel):
+        """推理结束后释放模型，若池已超限则补做淘汰"""
+        with self._lock:
+            entry.refcount -= 1
+            evicted = self._evict_locked() if entry.refcount == 0 else []
+        self._after_evict(evicted)
+
+    @contextmanager
+    def lease(self, entry: PooledModel):
+        """acquire/release 的上下文管理器形式"""
+        self.acquire(entry)
+        try:
+            yield entry
+        finally:
+            self.release(entry)
+
+    def _evict_locked(self, keep: Optional[str] = None) -> List[str]:
+        """按 LRU 顺序淘汰直到满足限额（需持有锁），返回被淘汰的模型ID"""
+        evicted = []
+        while self.total_bytes > self.max_bytes:
+            victim = None
+            for model_id, entry in self._entries.items():
+                if model_id == keep or entry.pinned or entry.refcount > 0:
+                    continue
+                victim = model_id
+                break
+            if victim is None:
+                # 其余模型都在使用中或已固定，暂时允许超出限额
+                break
+            del self._entries[victim]
+            self._evictions += 1
+            evicted.append(victim)
+        return evicted
+
+    @staticmethod
+    def _after_evict(evicted: List[str]):
+        """淘汰后的日志和垃圾回收（在锁外执行）"""
+        if not evicted:
+            return
+        for model_id in evicted:
+            print(f"Model pool evicted {model_id}")
+        gc.collect()
+
+    def invalidate(self, model_id: str) -> bool:
+        """移除模型（例如模型被更新或删除）；正在进行的推理仍持有自己的引用"""
+        with self._lock:
+            removed = self._entries.pop(model_id, None) is not None
+        if removed:
+            gc.collect()
+        return removed
+
+    def pin(self, model_id: str):
+        with self._lock:
+            self._pinned.add(model_id)
+            entry = self._entries.get(model_id)
+            if entry is not None:
+                entry.pinned = True
+
+    def unpin(self, model_id: str):
+        with self._lock:
+            self._pinned.discard(model_id)
+            entry = self._entries.get(model_id)
+            if entry is not None:
+                entry.pinned = False
+            evicted = self._evict_locked()
+        self._after_evict(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "max_bytes": self.max_bytes,
+                "total_bytes": self.total_bytes,
+                "total_mb": round(self.total_bytes / (1024 * 1024), 2),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+                "evictions": self._evictions,
+                "loads": self._loads,
+                "load_seconds_avg": round(self._load_seconds_total / self._loads, 3) if self._loads else None,
+                "load_seconds_max": round(self._load_seconds_max, 3),
+                "pinned": sorted(self._pinned),
+                # 按 LRU 顺序，最久未使用的在前
+                "models": [entry.to_dict() for entry in self._entries.values()],
+            }
+
+
+model_pool = ModelPool(settings.MODEL_POOL_MAX_BYTES, settings.MODEL_POOL_PINNED)
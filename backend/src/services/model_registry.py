@@ -0,0 +1,271 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from src.core.settings import settings
+
+# 列表接口允许的排序字段
+SORT_FIELDS = {"created_at", "updated_at", "name", "model_id", "file_size"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    model_id TEXT PRIMARY KEY,
+    name TEXT,
+    task TEXT,
+    job_id TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    file_size INTEGER,
+    json_mtime_ns INTEGER,
+    meta TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_models_created_at ON models (created_at);
+CREATE INDEX IF NOT EXISTS idx_models_updated_at ON models (updated_at);
+CREATE INDEX IF NOT EXISTS idx_models_name ON models (name);
+CREATE TABLE IF NOT EXISTS model_tags (
+    model_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (model_id, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_model_tags_tag ON model_tags (tag);
+CREATE TABLE IF NOT EXISTS model_classes (
+    model_id TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    PRIMARY KEY (model_id, class_name)
+);
+CREATE INDEX IF NOT EXISTS idx_model_classes_class_name ON model_classes (class_name);
+CREATE TABLE IF NOT EXISTS registry_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _weights_size(model_dir: Path, model_meta: dict) -> Optional[int]:
+    weights_path = model_meta.get("weights_path")
+    if not weights_path:
+        return None
+    path = Path(weights_path)
+    if not path.is_absolute():
+        path = model_dir / path
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def _class_names(classes) -> List[str]:
+    """model.json 中的 classes 可能是列表或 {id: name} 字典"""
+    if isinstance(classes, dict):
+        return [str(name) for name in classes.values()]
+    return [str(name) for name in classes or []]
+
+
+def _escape_like(value: str) -> str:
+    """转义 LIKE 模式中的 \\、% 和 _，使其按字面匹配"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class ModelRegistryIndex:
+    """模型仓库索引（SQLite）
+
+    model.json 仍是唯一的数据来源，索引保存每个模型的元数据副本、权重大小以及标签和类别，
+    列表接口只需按页查询索引，不再遍历仓库目录和读取每个 model.json。
+
+    - 服务内对 model.json 的写入（上传、更新、删除、优化等）同步更新索引，训练脚本注册模型时也会写入
+    - 仓库目录的修改时间变化（新增或删除了模型目录）时自动与目录对账，启动时完整对账一次
+    """
+
+    def __init__(self, registry_dir: Path, db_path: Path):
+        self.registry_dir = registry_dir
+        self.db_path = db_path
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.db_path, timeout=30)
+                    try:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(_SCHEMA)
+                        conn.commit()
+                    finally:
+                        conn.close()
+                    self._initialized = True
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _upsert(self, conn, model_meta: dict, file_size: Optional[int], json_mtime_ns: Optional[int]):
+        model_id = model_meta["model_id"]
+        conn.execute(
+            "INSERT OR REPLACE INTO models "
+            "(model_id, name, task, job_id, created_at, updated_at, file_size, json_mtime_ns, meta) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                model_id,
+                model_meta.get("name") or model_id,
+                model_meta.get("task"),
+                model_meta.get("job_id"),
+                model_meta.get("created_at") or "",
+                model_meta.get("updated_at") or model_meta.get("created_at") or "",
+                file_size,
+                json_mtime_ns,
+                json.dumps(model_meta, ensure_ascii=False),
+            ),
+        )
+        conn.execute("DELETE FROM model_tags WHERE model_id = ?", (model_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO model_tags (model_id, tag) VALUES (?, ?)",
+            [(model_id, str(tag)) for tag in model_meta.get("tags") or []],
+        )
+        conn.execute("DELETE FROM model_classes WHERE model_id = ?", (model_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO model_classes (model_id, class_name) VALUES (?, ?)",
+            [(model_id, name) for name in _class_names(model_meta.get("classes"))],
+        )
+
+    @staticmethod
+    def _delete(conn, model_id: str):
+        conn.execute("DELETE FROM models WHERE model_id = ?", (model_id,))
+        conn.execute("DELETE FROM model_tags WHERE model_id = ?", (model_id,))
+        conn.execute("DELETE FROM model_classes WHERE model_id = ?", (model_id,))
+
+    def upsert(self, model_meta: dict):
+        """model.json 写入后调用，更新该模型的索引"""
+        model_id = model_meta.get("model_id")
+        if not model_id:
+            return
+        model_dir = self.registry_dir / model_id
+        try:
+            json_mtime_ns = (model_dir / "model.json").stat().st_mtime_ns
+        except OSError:
+            json_mtime_ns = None
+        with self._connect() as conn:
+            self._upsert(conn, model_meta, _weights_size(model_dir, model_meta), json_mtime_ns)
+
+    def delete(self, model_id: str):
+        with self._connect() as conn:
+            self._delete(conn, model_id)
+
+    def _registry_mtime_ns(self) -> Optional[int]:
+        try:
+            return self.registry_dir.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def reconcile(self, force: bool = False) -> Dict[str, int]:
+        """与仓库目录对账
+
+        非 force 时只在仓库目录的修改时间变化后（新增或删除了模型目录）才扫描，否则只需一次 stat；
+        扫描时只重新读取修改时间变化的 model.json
+        """
+        registry_mtime = self._registry_mtime_ns()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM registry_state WHERE key = 'registry_mtime_ns'").fetchone()
+            if not force and row is not None and registry_mtime is not None and int(row["value"]) == registry_mtime:
+                return {"scanned": 0, "updated": 0, "removed": 0}
+
+            indexed = {r["model_id"]: r["json_mtime_ns"]
+                       for r in conn.execute("SELECT model_id, json_mtime_ns FROM models")}
+            seen, updated = set(), 0
+            if self.registry_dir.exists():
+                for model_dir in self.registry_dir.iterdir():
+                    model_file = model_dir / "model.json"
+                    try:
+                        json_mtime_ns = model_file.stat().st_mtime_ns
+                    except OSError:
+                        continue
+                    model_id = model_dir.name
+                    seen.add(model_id)
+                    if indexed.get(model_id) == json_mtime_ns:
+                        continue
+                    try:
+                        with open(model_file, "r", encoding="utf-8") as f:
+                            model_meta = json.load(f)
+                    except (OSError, ValueError):
+                        seen.discard(model_id)
+                        continue
+                    model_meta["model_id"] = model_id
+                    self._upsert(conn, model_meta, _weights_size(model_dir, model_meta), json_mtime_ns)
+                    updated += 1
+
+            removed = [model_id for model_id in indexed if model_id not in seen]
+            for model_id in removed:
+                self._delete(conn, model_id)
+
+            if registry_mtime is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO registry_state (key, value) VALUES ('registry_mtime_ns', ?)",
+                    (str(registry_mtime),),
+                )
+            return {"scanned": len(seen), "updated": updated, "removed": len(removed)}
+
+    def list(self, offset: int = 0, limit: Optional[int] = None, sort: str = "created_at", order: str = "desc",
+             tag: Optional[str] = None, class_name: Optional[str] = None,
+             q: Optional[str] = None) -> Dict[str, Any]:
+        """分页查询模型，可按标签、类别过滤，按名称或ID模糊搜索"""
+        self.reconcile()
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unsupported sort field: {sort}")
+        direction = "ASC" if order == "asc" else "DESC"
+
+        where, params = [], []
+        if tag is not None:
+            where.append("model_id IN (SELECT model_id FROM model_tags WHERE tag = ?)")
+            params.append(tag)
+        if class_name is not None:
+            where.append("model_id IN (SELECT model_id FROM model_classes WHERE class_name = ?)")
+            params.append(class_name)
+        if q:
+            # 按子串匹配：转义用户输入中的 LIKE 通配符
+            pattern = f"%{_escape_like(q)}%"
+            where.append("(name LIKE ? ESCAPE '\\' OR model_id LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM models {where_sql}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT meta, file_size FROM models {where_sql} "
+                f"ORDER BY {sort} {direction}, model_id {direction} LIMIT ? OFFSET ?",
+                params + [limit if limit is not None else -1, offset],
+            ).fetchall()
+
+        models = []
+        for row in rows:
+            model_meta = json.loads(row["meta"])
+            if row["file_size"] is not None:
+                model_meta["file_size"] = row["file_size"]
+                model_meta["file_size_mb"] = round(row["file_size"] / (1024 * 1024), 2)
+            models.append(model_meta)
+        return {"models": models, "total": total, "offset": offset, "limit": limit}
+
+    def facets(self) -> Dict[str, List[Dict[str, Any]]]:
+        """所有标签和类别及对应的模型数量（用于筛选下拉框）"""
+        self.reconcile()
+        with self._connect() as conn:
+            tags = conn.execute(
+                "SELECT tag, COUNT(*) AS count FROM model_tags GROUP BY tag ORDER BY count DESC, tag"
+            ).fetchall()
+            classes = conn.execute(
+                "SELECT class_name, COUNT(*) AS count FROM model_classes GROUP BY class_name ORDER BY count DESC, class_name"
+            ).fetchall()
+        return {
+            "tags": [{"tag": r["tag"], "count": r["count"]} for r in tags],
+            "classes": [{"class_name": r["class_name"], "count": r["count"]} for r in classes],
+        }
+
+
+model_registry = ModelRegistryIndex(settings.REGISTRY_DIR, settings.REGISTRY_DB)
@@ -0,0 +1,142 @@
+import importlib.util
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 可导出的推理运行时：格式 -> 加载该格式所需的模块
+RUNTIME_BACKENDS = {
+    "onnx": "onnxruntime",
+    "openvino": "openvino",
+}
+
+# 没有基准测试结果时，CPU 上的默认优先顺序（越靠前越快）
+CPU_PREFERENCE = ["openvino", "onnx", "pytorch"]
+
+
+def runtime_available(fmt: str) -> bool:
+    """当前环境是否可以加载该格式的模型"""
+    if fmt == "pytorch":
+        return True
+    module = RUNTIME_BACKENDS.get(fmt)
+    return module is not None and importlib.util.find_spec(module) is not None
+
+
+def runtime_name(fmt: str, half: bool = False, int8: bool = False) -> str:
+    """运行时名称，如 onnx、openvino_fp16、openvino_int8"""
+    if int8:
+        return f"{fmt}_int8"
+    if half:
+        return f"{fmt}_fp16"
+    return fmt
+
+
+def artifact_path(weights_path: Path, fmt: str, name: str) -> Path:
+    """导出文件保存在 best.pt 旁边：best.onnx、best_fp16.onnx、best_int8_openvino_model/ 等"""
+    suffix = name[len(fmt):]  # "" / "_fp16" / "_int8"
+    if fmt == "onnx":
+        return weights_path.parent / f"{weights_path.stem}{suffix}.onnx"
+    return weights_path.parent / f"{weights_path.stem}{suffix}_{fmt}_model"
+
+
+def export_runtime(weights_path: Path, fmt: str, imgsz: int, half: bool = False, int8: bool = False,
+                   data: Optional[str] = None) -> Path:
+    """导出模型为指定格式（动态输入尺寸，支持批量推理），返回导出文件路径"""
+    if fmt not in RUNTIME_BACKENDS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    if int8 and fmt != "openvino":
+        raise ValueError("INT8 quantization is only supported for OpenVINO")
+
+    from ultralytics import YOLO
+    export_kwargs = {"format": fmt, "imgsz": imgsz, "half": half, "int8": int8, "dynamic": True, "verbose": False}
+    if int8 and data:
+        export_kwargs["data"] = data  # INT8 量化的校准数据集
+    exported = Path(YOLO(str(weights_path)).export(**export_kwargs))
+
+    target = artifact_path(weights_path, fmt, runtime_name(fmt, half, int8))
+    if exported.resolve() != target.resolve():
+        if target.is_dir():
+            shutil.rmtree(target)
+        elif target.exists():
+            target.unlink()
+        shutil.move(str(exported), str(target))
+    return target
+
+
+def artifact_size(path: Path) -> int:
+    if path.is_dir():
+        return sum(item.stat().st_size for item in path.rglob("*") if item.is_file())
+    return path.stat().st_size
+
+
+def list_runtimes(model_dir: Path, model_meta: dict, weights_path: Path) -> List[Dict[str, Any]]:
+    """列出模型可用的运行时（文件存在且当前环境可加载），PyTorch 权重总是可用"""
+    runtimes = [{"name": "pytorch", "format": "pytorch", "path": weights_path}]
+    for name, info in (model_meta.get("runtimes") or {}).items():
+        path = Path(info["path"])
+        if not path.is_absolute():
+            path = model_dir / path
+        if path.exists() and runtime_available(info["format"]):
+            runtimes.append({"name": name, "format": info["format"], "path": path})
+    return runtimes
+
+
+def select_runtime(model_dir: Path, model_meta: dict, weights_path: Path, preference: str = "auto") -> Dict[str, Any]:
+    """选择推理运行时
+
+    - preference 为运行时名称或格式（如 onnx、openvino_int8）时优先使用，不可用则退回 PyTorch
+    - auto：有基准测试结果时选延迟最低的；否则有 GPU 时用 PyTorch，CPU 上按 OpenVINO > ONNX > PyTorch
+    """
+    runtimes = list_runtimes(model_dir, model_meta, weights_path)
+    if preference != "auto":
+        for runtime in runtimes:
+            if preference in (runtime["name"], runtime["format"]):
+                return runtime
+        return runtimes[0]
+
+    benchmark = (model_meta.get("benchmark") or {}).get("results") or {}
+    measured = [runtime for runtime in runtimes if benchmark.get(runtime["name"], {}).get("latency_ms")]
+    if measured:
+        return min(measured, key=lambda runtime: benchmark[runtime["name"]]["latency_ms"])
+
+    if len(runtimes) == 1 or _cuda_available():
+        return runtimes[0]
+    return min(runtimes, key=lambda runtime: CPU_PREFERENCE.index(runtime["format"]))
+
+
+def _cuda_available() -> bool:
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except Exception:
+        return False
+
+
+def benchmark_runtime(path: Path, task: str, imgsz: int, runs: int = 20, warmup: int = 3) -> Dict[str, Any]:
+    """测量单个运行时的加载耗时和单张图片推理延迟（随机图片，固定输入尺寸）"""
+    import numpy as np
+    from ultralytics import YOLO
+
+    start = time.perf_counter()
+    model = YOLO(str(path), task=task)
+    image = np.random.randint(0, 255, (imgsz, imgsz, 3), dtype=np.uint8)
+    model(image, imgsz=imgsz, verbose=False)  # 首次推理包含初始化，计入加载耗时
+    load_seconds = time.perf_counter() - start
+
+    for _ in range(warmup):
+        model(image, imgsz=imgsz, verbose=False)
+
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model(image, imgsz=imgsz, verbose=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    return {
+        "latency_ms": round(sum(latencies) / len(latencies), 3),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+        "load_seconds": round(load_seconds, 3),
+        "runs": runs,
+    }
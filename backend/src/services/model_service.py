@@ -1,19 +1,34 @@
 import json
 import shutil
-import csv
 import os
 import asyncio
 import tempfile
 import zipfile
 import io
+import time
+import threading
 from pathlib import Path
 from datetime import datetime
 from fastapi import UploadFile
 from src.core.settings import settings
-import matplotlib
-matplotlib.use('Agg')  # 使用非交互式后端
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
+from src.services.model_pool import model_pool
+from src.services.result_cache import result_cache
+from src.services import model_runtimes
+from src.services import model_info
+from src.services.zip_stream import iter_zip
+from src.services.model_registry import model_registry
+from src.services.training_history import training_history_cache, history_to_dict, downsample_series
+
+CHARTS_DIR = "charts"  # 训练图表缓存目录（位于训练任务目录下）
+_chart_lock = threading.Lock()  # pyplot 使用全局状态，同一时间只渲染一张图表
+
+
+def _pyplot():
+    """延迟导入 matplotlib，只在需要渲染图表时加载"""
+    import matplotlib
+    matplotlib.use('Agg')  # 使用非交互式后端
+    import matplotlib.pyplot as plt
+    return plt
 
 
 def _load_json(path: Path):
@@ -33,38 +48,40 @@ def _delete_directory(path: Path):
     shutil.rmtree(path)
 
 
+def _resolve_weights_path(model_dir: Path, model_meta: dict) -> Path:
+    """model.json 中的权重路径可能是绝对路径或相对于模型目录的路径"""
+    weights_path = Path(model_meta.get("weights_path", ""))
+    if not weights_path.is_absolute():
+        weights_path = model_dir / weights_path
+    return weights_path
+
+
 class ModelService:
     def __init__(self):
         self.registry_dir = settings.REGISTRY_DIR
         self.jobs_dir = settings.JOBS_DIR
     
-    async def list_models(self):
-        """列出所有模型"""
-        def _list_models_sync():
-            models = []
-            
-            if not self.registry_dir.exists():
-                return models
-            
-            for model_dir in self.registry_dir.iterdir():
-                if model_dir.is_dir():
-                    model_file = model_dir / "model.json"
-                    if model_file.exists():
-                        try:
-                            model_meta = _load_json(model_file)
-                            # 添加模型文件大小
-                            weights_path = model_meta.get("weights_path")
-                            if weights_path and Path(weights_path).exists():
-                                model_meta["file_size"] = os.path.getsize(weights_path)
-                                model_meta["file_size_mb"] = round(model_meta["file_size"] / (1024 * 1024), 2)
-                            models.append(model_meta)
-                        except Exception:
-                            continue
-            
-            return models
+    async def list_models(self, offset: int = 0, limit: int = None, sort: str = "created_at", order: str = "desc",
+                          tag: str = None, class_name: str = None, q: str = None):
+        """列出模型（从模型仓库索引分页查询，不遍历仓库目录）
         
-        models = await asyncio.to_thread(_list_models_sync)
-        return {"models": sorted(models, key=lambda x: x.get("created_at", ""), reverse=True)}
+        Args:
+            offset / limit: 分页，limit 为空时返回全部
+            sort / order: 排序字段（created_at、updated_at、name、model_id、file_size）和方向（asc / desc）
+            tag / class_name: 按标签、类别过滤
+            q: 按名称或模型ID模糊搜索
+        """
+        return await asyncio.to_thread(
+            model_registry.list, offset, limit, sort, order, tag, class_name, q
+        )
+    
+    async def list_model_facets(self):
+        """所有标签和类别及对应的模型数量"""
+        return await asyncio.to_thread(model_registry.facets)
+    
+    async def reindex_models(self):
+        """重新扫描仓库目录，重建模型索引中发生变化的条目"""
+        return await asyncio.to_thread(model_registry.reconcile, True)
     
     async def get_model(self, model_id: str):
         """获取模型详情（包含训练指标）"""
@@ -95,10 +112,10 @@ class ModelService:
             if training_metrics:
                 model_meta["training_metrics"] = training_metrics
         
-        # 尝试获取模型参数信息
-        model_info = await self._get_model_info(model_meta.get("weights_path"))
-        if model_info:
-            model_meta["model_info"] = model_info
+        # 模型参数信息（缓存在 model.json 中，权重文件变化后才重新计算）
+        info = await asyncio.to_thread(self._ensure_model_info, model_dir, model_meta)
+        if info:
+            model_meta["model_info"] = info
         
         return model_meta
     
@@ -112,15 +129,13 @@ class ModelService:
         def _load_metrics_sync():
             metrics = {}
             
-            # 尝试读取 results.csv（YOLO 训练输出）
-            # 查找 train 目录下的 results.csv
-            results_files = list(job_dir.rglob("results.csv"))
-            if results_files:
-                results_csv = results_files[0]
-                try:
-                    metrics["training_history"] = self._parse_results_csv(results_csv)
-                except Exception as e:
-                    print(f"Error parsing results.csv: {e}")
+            # 训练历史（YOLO 输出的 results.csv，解析结果缓存在任务目录下，只增量解析新增的行）
+            try:
+                history = training_history_cache.load(job_dir)
+                if history is not None:
+                    metrics["training_history"] = history_to_dict(history)
+            except Exception as e:
+                print(f"Error parsing results.csv: {e}")
             
             # 读取训练任务配置
             job_file = job_dir / "job.json"
@@ -144,110 +159,34 @@ class ModelService:
         
         return await asyncio.to_thread(_load_metrics_sync)
     
-    def _parse_results_csv(self, csv_path: Path):
-        """解析 YOLO 训练输出的 results.csv（同步方法，在线程中调用）"""
-        history = {
-            "epochs": [],
-            "train_box_loss": [],
-            "train_cls_loss": [],
-            "train_dfl_loss": [],
-            "val_box_loss": [],
-            "val_cls_loss": [],
-            "val_dfl_loss": [],
-            "metrics_precision": [],
-            "metrics_recall": [],
-            "metrics_mAP50": [],
-            "metrics_mAP50_95": []
-        }
-        
-        try:
-            with open(csv_path, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # 清理列名（去除空格）
-                    row = {k.strip(): v.strip() for k, v in row.items()}
-                    
-                    epoch = int(row.get("epoch", len(history["epochs"]) + 1))
-                    history["epochs"].append(epoch)
-                    
-                    # 训练损失
-                    if "train/box_loss" in row:
-                        history["train_box_loss"].append(float(row["train/box_loss"]))
-                    if "train/cls_loss" in row:
-                        history["train_cls_loss"].append(float(row["train/cls_loss"]))
-                    if "train/dfl_loss" in row:
-                        history["train_dfl_loss"].append(float(row["train/dfl_loss"]))
-                    
-                    # 验证损失
-                    if "val/box_loss" in row:
-                        history["val_box_loss"].append(float(row["val/box_loss"]))
-                    if "val/cls_loss" in row:
-                        history["val_cls_loss"].append(float(row["val/cls_loss"]))
-                    if "val/dfl_loss" in row:
-                        history["val_dfl_loss"].append(float(row["val/dfl_loss"]))
-                    
-                    # 指标
-                    if "metrics/precision(B)" in row:
-                        history["metrics_precision"].append(float(row["metrics/precision(B)"]))
-                    if "metrics/recall(B)" in row:
-                        history["metrics_recall"].append(float(row["metrics/recall(B)"]))
-                    if "metrics/mAP50(B)" in row:
-                        history["metrics_mAP50"].append(float(row["metrics/mAP50(B)"]))
-                    if "metrics/mAP50-95(B)" in row:
-                        history["metrics_mAP50_95"].append(float(row["metrics/mAP50-95(B)"]))
-            
-            # 清理空列表
-            history = {k: v for k, v in history.items() if v}
-            
-            # 添加最终指标摘要
-            if history.get("metrics_mAP50"):
-                history["final_metrics"] = {
-                    "mAP50": history["metrics_mAP50"][-1] if history["metrics_mAP50"] else None,
-                    "mAP50_95": history["metrics_mAP50_95"][-1] if history.get("metrics_mAP50_95") else None,
-                    "precision": history["metrics_precision"][-1] if history.get("metrics_precision") else None,
-                    "recall": history["metrics_recall"][-1] if history.get("metrics_recall") else None
-                }
-            
-            return history
-            
-        except Exception as e:
-            print(f"Error parsing CSV: {e}")
+    def _ensure_model_info(self, model_dir: Path, model_meta: dict):
+        """返回 model.json 中缓存的模型信息，权重文件变化（大小或修改时间不同）或没有缓存时重新计算并写回"""
+        if not model_meta.get("weights_path"):
             return None
-    
-    async def _get_model_info(self, weights_path: str):
-        """获取模型参数信息"""
-        if not weights_path:
+        weights_path = _resolve_weights_path(model_dir, model_meta)
+        if not weights_path.exists():
             return None
         
-        if not await asyncio.to_thread(lambda: Path(weights_path).exists()):
-            return None
+        cached = model_meta.get("model_info")
+        if model_info.is_current(cached, weights_path):
+            return cached
         
-        def _get_model_info_sync():
-            try:
-                from ultralytics import YOLO
-                model = YOLO(weights_path)
-                
-                # 获取模型信息
-                info = {
-                    "task": model.task,
-                    "model_type": model.model.yaml.get("yaml_file", "unknown") if hasattr(model.model, "yaml") else "unknown"
-                }
-                
-                # 尝试获取参数数量
-                if hasattr(model.model, "model"):
-                    total_params = sum(p.numel() for p in model.model.model.parameters())
-                    trainable_params = sum(p.numel() for p in model.model.model.parameters() if p.requires_grad)
-                    info["total_params"] = total_params
-                    info["trainable_params"] = trainable_params
-                    info["total_params_m"] = round(total_params / 1e6, 2)  # 百万参数
-                
-                return info
-                
-            except Exception as e:
-                print(f"Error getting model info: {e}")
-                return None
+        try:
+            info = model_info.compute_model_info(weights_path, model_meta.get("imgsz"))
+        except Exception as e:
+            print(f"Error getting model info: {e}")
+            return None
         
-        return await asyncio.to_thread(_get_model_info_sync)
+        # 重新读取后只更新 model_info，避免覆盖计算期间其他请求写入的字段
+        model_file = model_dir / "model.json"
+        try:
+            latest_meta = _load_json(model_file)
+        except (OSError, ValueError):
+            latest_meta = model_meta
+        latest_meta["model_info"] = info
+        _save_json(model_file, latest_meta)
+        model_registry.upsert(latest_meta)
+        return info
     
     async def update_model(self, model_id: str, request):
         """更新模型信息"""
@@ -267,10 +206,17 @@ class ModelService:
                 model_meta["description"] = request.description
             if request.tags is not None:
                 model_meta["tags"] = request.tags
+            if request.infer_defaults is not None:
+                model_meta["infer_defaults"] = request.infer_defaults.model_dump(exclude_none=True)
             
             model_meta["updated_at"] = datetime.now().isoformat()
             
             _save_json(model_file, model_meta)
+            model_registry.upsert(model_meta)
+            
+            # 模型信息变化后缓存的推理结果不再可信，模型池中的元数据也需重新加载
+            result_cache.invalidate_model(model_id)
+            model_pool.invalidate(model_id)
             
             return model_meta
         
@@ -285,9 +231,127 @@ class ModelService:
         
         # 删除模型目录
         await asyncio.to_thread(_delete_directory, model_dir)
+        await asyncio.to_thread(model_registry.delete, model_id)
+        
+        # 从推理模型池和结果缓存中移除
+        model_pool.invalidate(model_id)
+        await asyncio.to_thread(result_cache.invalidate_model, model_id)
         
         return {"ok": True, "message": f"Model {model_id} deleted"}
     
+    def _calibration_data(self, model_meta: dict):
+        """INT8 量化的校准数据集：使用训练该模型的数据集"""
+        job_id = model_meta.get("job_id")
+        if not job_id:
+            return None
+        job_file = self.jobs_dir / f"{job_id}.json"
+        if not job_file.exists():
+            return None
+        job_meta = _load_json(job_file)
+        data_yaml = settings.DATASETS_DIR / str(job_meta.get("dataset_id")) / str(job_meta.get("version")) / "data.yaml"
+        return str(data_yaml) if data_yaml.exists() else None
+    
+    async def optimize_model(self, model_id: str, request):
+        """导出优化的推理运行时（ONNX / OpenVINO，可选 FP16、INT8 量化）
+        
+        导出文件保存在 weights/best.pt 旁边，并记录在 model.json 的 runtimes 中，
+        推理服务加载模型时会优先选择最快的可用运行时。
+        """
+        model_dir = self.registry_dir / model_id
+        model_file = model_dir / "model.json"
+        
+        if not await asyncio.to_thread(lambda: model_file.exists()):
+            return None
+        
+        def _optimize_model_sync():
+            model_meta = _load_json(model_file)
+            weights_path = _resolve_weights_path(model_dir, model_meta)
+            if not weights_path.exists():
+                return {"error": f"Model weights not found: {weights_path}"}
+            
+            imgsz = int(request.imgsz or model_meta.get("imgsz") or 640)
+            data = self._calibration_data(model_meta) if request.int8 else None
+            runtimes = model_meta.get("runtimes") or {}
+            results = {}
+            
+            for fmt in request.formats:
+                name = model_runtimes.runtime_name(fmt, request.half, request.int8)
+                start = time.perf_counter()
+                try:
+                    target = model_runtimes.export_runtime(
+                        weights_path, fmt, imgsz, half=request.half, int8=request.int8, data=data
+                    )
+                except Exception as e:
+                    results[name] = {"ok": False, "error": str(e)}
+                    continue
+                
+                try:
+                    relative_path = str(target.relative_to(model_dir))
+                except ValueError:
+                    relative_path = str(target)
+                runtimes[name] = {
+                    "format": fmt,
+                    "path": relative_path,
+                    "half": request.half,
+                    "int8": request.int8,
+                    "imgsz": imgsz,
+                    "size_bytes": model_runtimes.artifact_size(target),
+                    "available": model_runtimes.runtime_available(fmt),
+                    "exported_at": datetime.now().isoformat()
+                }
+                results[name] = {"ok": True, "export_seconds": round(time.perf_counter() - start, 3), **runtimes[name]}
+            
+            model_meta["runtimes"] = runtimes
+            model_meta["updated_at"] = datetime.now().isoformat()
+            _save_json(model_file, model_meta)
+            model_registry.upsert(model_meta)
+            return {"model_id": model_id, "results": results, "runtimes": runtimes}
+        
+        result = await asyncio.to_thread(_optimize_model_sync)
+        # 重新加载模型以选择新的运行时
+        model_pool.invalidate(model_id)
+        return result
+    
+    async def benchmark_model(self, model_id: str, runs: int = 20):
+        """比较模型各运行时（PyTorch 及已导出的格式）的加载耗时和推理延迟，结果记录在 model.json 中"""
+        model_dir = self.registry_dir / model_id
+        model_file = model_dir / "model.json"
+        
+        if not await asyncio.to_thread(lambda: model_file.exists()):
+            return None
+        
+        def _benchmark_model_sync():
+            model_meta = _load_json(model_file)
+            weights_path = _resolve_weights_path(model_dir, model_meta)
+            if not weights_path.exists():
+                return {"error": f"Model weights not found: {weights_path}"}
+            
+            imgsz = int(model_meta.get("imgsz") or 640)
+            task = model_meta.get("task") or "detect"
+            results = {}
+            for runtime in model_runtimes.list_runtimes(model_dir, model_meta, weights_path):
+                try:
+                    results[runtime["name"]] = model_runtimes.benchmark_runtime(runtime["path"], task, imgsz, runs)
+                except Exception as e:
+                    results[runtime["name"]] = {"error": str(e)}
+            
+            measured = {name: r for name, r in results.items() if "latency_ms" in r}
+            model_meta["benchmark"] = {
+                "imgsz": imgsz,
+                "runs": runs,
+                "benchmarked_at": datetime.now().isoformat(),
+                "fastest": min(measured, key=lambda name: measured[name]["latency_ms"]) if measured else None,
+                "results": results
+            }
+            _save_json(model_file, model_meta)
+            model_registry.upsert(model_meta)
+            return {"model_id": model_id, **model_meta["benchmark"]}
+        
+        result = await asyncio.to_thread(_benchmark_model_sync)
+        # 重新加载模型以按基准测试结果选择运行时
+        model_pool.invalidate(model_id)
+        return result
+    
     async def upload_model(self, file: UploadFile):
         """上传已有模型（ZIP格式）"""
         # 验证文件格式
@@ -413,60 +477,47 @@ class ModelService:
                 # 保存model.json
                 model_file = model_dir / "model.json"
                 _save_json(model_file, model_meta)
+                model_registry.upsert(model_meta)
                 
                 return model_meta
         
         model_meta = await asyncio.to_thread(_process_zip, filename)
         
-        # 尝试获取模型信息
-        weights_path = model_meta.get("weights_path")
-        if weights_path:
-            model_info = await self._get_model_info(weights_path)
-            if model_info:
-                model_meta["model_info"] = model_info
-                # 更新model.json
-                model_dir = self.registry_dir / model_meta["model_id"]
-                model_file = model_dir / "model.json"
-                await asyncio.to_thread(_save_json, model_file, model_meta)
+        # 注册时计算一次模型信息并写入model.json
+        model_dir = self.registry_dir / model_meta["model_id"]
+        info = await asyncio.to_thread(self._ensure_model_info, model_dir, model_meta)
+        if info:
+            model_meta["model_info"] = info
         
         return model_meta
     
     async def export_model(self, model_id: str):
-        """导出模型为ZIP文件"""
+        """导出模型为ZIP文件，返回 ZIP 字节流生成器"""
         model_dir = self.registry_dir / model_id
         model_file = model_dir / "model.json"
         
         if not await asyncio.to_thread(lambda: model_file.exists()):
             return None
         
-        # 创建临时ZIP文件
-        def _create_zip():
-            # 创建临时文件
-            temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            temp_zip_path = temp_zip.name
-            temp_zip.close()
+        # ZIP条目（惰性遍历，边读边发送）
+        def _entries():
+            # 添加model.json
+            if model_file.exists():
+                yield model_file, f"{model_id}/model.json"
             
-            with zipfile.ZipFile(temp_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # 添加model.json
-                if model_file.exists():
-                    zipf.write(model_file, f"{model_id}/model.json")
-                
-                # 添加weights目录
-                weights_dir = model_dir / "weights"
-                if weights_dir.exists():
-                    for weight_file in weights_dir.iterdir():
-                        if weight_file.is_file():
-                            zipf.write(weight_file, f"{model_id}/weights/{weight_file.name}")
-                
-                # 添加其他可能的文件
-                for item in model_dir.iterdir():
-                    if item.is_file() and item.name != "model.json":
-                        zipf.write(item, f"{model_id}/{item.name}")
+            # 添加weights目录
+            weights_dir = model_dir / "weights"
+            if weights_dir.exists():
+                for weight_file in weights_dir.iterdir():
+                    if weight_file.is_file():
+                        yield weight_file, f"{model_id}/weights/{weight_file.name}"
             
-            return temp_zip_path
+            # 添加其他可能的文件
+            for item in model_dir.iterdir():
+                if item.is_file() and item.name != "model.json":
+                    yield item, f"{model_id}/{item.name}"
         
-        zip_path = await asyncio.to_thread(_create_zip)
-        return zip_path
+        return iter_zip(_entries())
     
     async def generate_training_charts(self, model_id: str, chart_type: str = "all"):
         """生成训练图表
@@ -490,131 +541,171 @@ class ModelService:
         if not job_id:
             raise ValueError("Model has no associated training job")
         
-        # 查找results.csv
-        job_dir = self.jobs_dir / job_id
-        
-        def _find_results_csv():
-            results_files = list(job_dir.rglob("results.csv"))
-            if results_files:
-                return results_files[0]
-            return None
+        if chart_type not in ("loss", "metrics", "all"):
+            raise ValueError(f"Unsupported chart type: {chart_type}")
+        charts = ["loss", "metrics"] if chart_type == "all" else [chart_type]
         
-        results_csv = await asyncio.to_thread(_find_results_csv)
+        # 读取训练历史（results.csv 的解析缓存），版本随 CSV 变化
+        job_dir = self.jobs_dir / job_id
+        loaded = await asyncio.to_thread(training_history_cache.load_versioned, job_dir)
         
-        if not results_csv:
+        if loaded is None:
             raise ValueError("Training results.csv not found")
         
-        # 解析CSV数据
-        training_history = await asyncio.to_thread(self._parse_results_csv, results_csv)
-        
-        if not training_history:
-            raise ValueError("Failed to parse training results")
+        version, history = loaded
         
-        # 生成图表
+        # 生成图表（按训练历史版本缓存在任务目录的 charts/ 下，训练历史不变时直接返回已渲染的图片）
         def _generate_charts():
-            # 设置中文字体支持（如果需要）
-            plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
-            plt.rcParams['axes.unicode_minus'] = False
+            charts_dir = job_dir / CHARTS_DIR
+            chart_paths = {f"{chart}_chart": str(charts_dir / f"{chart}_{version}.png") for chart in charts}
+            pending = [chart for chart in charts if not Path(chart_paths[f"{chart}_chart"]).exists()]
+            if not pending:
+                return chart_paths
             
-            if chart_type == "loss" or chart_type == "all":
-                # 生成损失曲线图
-                fig, axes = plt.subplots(1, 3, figsize=(18, 5))
-                
-                epochs = training_history.get("epochs", [])
-                
-                # Box Loss
-                if "train_box_loss" in training_history:
-                    axes[0].plot(epochs, training_history["train_box_loss"], label='Train Box Loss', marker='o')
-                if "val_box_loss" in training_history:
-                    axes[0].plot(epochs, training_history["val_box_loss"], label='Val Box Loss', marker='s')
-                axes[0].set_xlabel('Epoch')
-                axes[0].set_ylabel('Loss')
-                axes[0].set_title('Box Loss')
-                axes[0].legend()
-                axes[0].grid(True)
-                
-                # Class Loss
-                if "train_cls_loss" in training_history:
-                    axes[1].plot(epochs, training_history["train_cls_loss"], label='Train Cls Loss', marker='o')
-                if "val_cls_loss" in training_history:
-                    axes[1].plot(epochs, training_history["val_cls_loss"], label='Val Cls Loss', marker='s')
-                axes[1].set_xlabel('Epoch')
-                axes[1].set_ylabel('Loss')
-                axes[1].set_title('Classification Loss')
-                axes[1].legend()
-                axes[1].grid(True)
-                
-                # DFL Loss
-                if "train_dfl_loss" in training_history:
-                    axes[2].plot(epochs, training_history["train_dfl_loss"], label='Train DFL Loss', marker='o')
-                if "val_dfl_loss" in training_history:
-                    axes[2].plot(epochs, training_history["val_dfl_loss"], label='Val DFL Loss', marker='s')
-                axes[2].set_xlabel('Epoch')
-                axes[2].set_ylabel('Loss')
-                axes[2].set_title('DFL Loss')
-                axes[2].legend()
-                axes[2].grid(True)
-                
-                plt.tight_layout()
-                
-                loss_chart_path = tempfile.mktemp(suffix='_loss.png')
-                plt.savefig(loss_chart_path, dpi=150, bbox_inches='tight')
-                plt.close()
+            training_history = history_to_dict(history)
+            if not training_history:
+                raise ValueError("Failed to parse training results")
             
-            if chart_type == "metrics" or chart_type == "all":
-                # 生成指标曲线图
-                fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-                
-                epochs = training_history.get("epochs", [])
-                
-                # Precision
-                if "metrics_precision" in training_history:
-                    axes[0, 0].plot(epochs, training_history["metrics_precision"], label='Precision', marker='o', color='blue')
-                    axes[0, 0].set_xlabel('Epoch')
-                    axes[0, 0].set_ylabel('Precision')
-                    axes[0, 0].set_title('Precision')
-                    axes[0, 0].legend()
-                    axes[0, 0].grid(True)
-                
-                # Recall
-                if "metrics_recall" in training_history:
-                    axes[0, 1].plot(epochs, training_history["metrics_recall"], label='Recall', marker='s', color='green')
-                    axes[0, 1].set_xlabel('Epoch')
-                    axes[0, 1].set_ylabel('Recall')
-                    axes[0, 1].set_title('Recall')
-                    axes[0, 1].legend()
-                    axes[0, 1].grid(True)
-                
-                # mAP50
-                if "metrics_mAP50" in training_history:
-                    axes[1, 0].plot(epochs, training_history["metrics_mAP50"], label='mAP@0.5', marker='^', color='orange')
-                    axes[1, 0].set_xlabel('Epoch')
-                    axes[1, 0].set_ylabel('mAP@0.5')
-                    axes[1, 0].set_title('mAP@0.5')
-                    axes[1, 0].legend()
-                    axes[1, 0].grid(True)
-                
-                # mAP50-95
-                if "metrics_mAP50_95" in training_history:
-                    axes[1, 1].plot(epochs, training_history["metrics_mAP50_95"], label='mAP@0.5:0.95', marker='d', color='red')
-                    axes[1, 1].set_xlabel('Epoch')
-                    axes[1, 1].set_ylabel('mAP@0.5:0.95')
-                    axes[1, 1].set_title('mAP@0.5:0.95')
-                    axes[1, 1].legend()
-                    axes[1, 1].grid(True)
-                
-                plt.tight_layout()
-                
-                metrics_chart_path = tempfile.mktemp(suffix='_metrics.png')
-                plt.savefig(metrics_chart_path, dpi=150, bbox_inches='tight')
-                plt.close()
+            charts_dir.mkdir(parents=True, exist_ok=True)
+            with _chart_lock:
+                plt = _pyplot()
+                # 设置中文字体支持（如果需要）
+                plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
+                plt.rcParams['axes.unicode_minus'] = False
+                
+                for chart in pending:
+                    chart_path = Path(chart_paths[f"{chart}_chart"])
+                    if chart_path.exists():  # 等锁期间已由其他请求渲染
+                        continue
+                    
+                    epochs = training_history.get("epochs", [])
+                    
+                    if chart == "loss":
+                        # 生成损失曲线图
+                        fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+                        
+                        # Box Loss
+                        if "train_box_loss" in training_history:
+                            axes[0].plot(epochs, training_history["train_box_loss"], label='Train Box Loss', marker='o')
+                        if "val_box_loss" in training_history:
+                            axes[0].plot(epochs, training_history["val_box_loss"], label='Val Box Loss', marker='s')
+                        axes[0].set_xlabel('Epoch')
+                        axes[0].set_ylabel('Loss')
+                        axes[0].set_title('Box Loss')
+                        axes[0].legend()
+                        axes[0].grid(True)
+                        
+                        # Class Loss
+                        if "train_cls_loss" in training_history:
+                            axes[1].plot(epochs, training_history["train_cls_loss"], label='Train Cls Loss', marker='o')
+                        if "val_cls_loss" in training_history:
+                            axes[1].plot(epochs, training_history["val_cls_loss"], label='Val Cls Loss', marker='s')
+                        axes[1].set_xlabel('Epoch')
+                        axes[1].set_ylabel('Loss')
+                        axes[1].set_title('Classification Loss')
+                        axes[1].legend()
+                        axes[1].grid(True)
+                        
+                        # DFL Loss
+                        if "train_dfl_loss" in training_history:
+                            axes[2].plot(epochs, training_history["train_dfl_loss"], label='Train DFL Loss', marker='o')
+                        if "val_dfl_loss" in training_history:
+                            axes[2].plot(epochs, training_history["val_dfl_loss"], label='Val DFL Loss', marker='s')
+                        axes[2].set_xlabel('Epoch')
+                        axes[2].set_ylabel('Loss')
+                        axes[2].set_title('DFL Loss')
+                        axes[2].legend()
+                        axes[2].grid(True)
+                        
+                        plt.tight_layout()
+                    else:
+                        # 生成指标曲线图
+                        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+                        
+                        # Precision
+                        if "metrics_precision" in training_history:
+                            axes[0, 0].plot(epochs, training_history["metrics_precision"], label='Precision', marker='o', color='blue')
+                            axes[0, 0].set_xlabel('Epoch')
+                            axes[0, 0].set_ylabel('Precision')
+                            axes[0, 0].set_title('Precision')
+                            axes[0, 0].legend()
+                            axes[0, 0].grid(True)
+                        
+                        # Recall
+                        if "metrics_recall" in training_history:
+                            axes[0, 1].plot(epochs, training_history["metrics_recall"], label='Recall', marker='s', color='green')
+                            axes[0, 1].set_xlabel('Epoch')
+                            axes[0, 1].set_ylabel('Recall')
+                            axes[0, 1].set_title('Recall')
+                            axes[0, 1].legend()
+                            axes[0, 1].grid(True)
+                        
+                        # mAP50
+                        if "metrics_mAP50" in training_history:
+                            axes[1, 0].plot(epochs, training_history["metrics_mAP50"], label='mAP@0.5', marker='^', color='orange')
+                            axes[1, 0].set_xlabel('Epoch')
+                            axes[1, 0].set_ylabel('mAP@0.5')
+                            axes[1, 0].set_title('mAP@0.5')
+                            axes[1, 0].legend()
+                            axes[1, 0].grid(True)
+                        
+                        # mAP50-95
+                        if "metrics_mAP50_95" in training_history:
+                            axes[1, 1].plot(epochs, training_history["metrics_mAP50_95"], label='mAP@0.5:0.95', marker='d', color='red')
+                            axes[1, 1].set_xlabel('Epoch')
+                            axes[1, 1].set_ylabel('mAP@0.5:0.95')
+                            axes[1, 1].set_title('mAP@0.5:0.95')
+                            axes[1, 1].legend()
+                            axes[1, 1].grid(True)
+                        
+                        plt.tight_layout()
+                    
+                    tmp_path = chart_path.with_name(f".{chart_path.name}.tmp")
+                    plt.savefig(tmp_path, dpi=150, bbox_inches='tight', format='png')
+                    plt.close()
+                    os.replace(tmp_path, chart_path)
+                    
+                    # 删除该图表的旧版本
+                    for old_chart in charts_dir.glob(f"{chart}_*.png"):
+                        if old_chart != chart_path:
+                            old_chart.unlink(missing_ok=True)
             
-            if chart_type == "all":
-                return {"loss_chart": loss_chart_path, "metrics_chart": metrics_chart_path}
-            elif chart_type == "loss":
-                return {"loss_chart": loss_chart_path}
-            elif chart_type == "metrics":
-                return {"metrics_chart": metrics_chart_path}
+            return chart_paths
         
         chart_paths = await asyncio.to_thread(_generate_charts)
         return chart_paths
+    
+    async def get_metric_series(self, model_id: str, points: int = 200, method: str = "lttb", metrics: list = None):
+        """训练指标的降采样序列（前端直接绘图，不需要服务端渲染）
+        
+        Args:
+            model_id: 模型ID
+            points: 每个指标最多保留的点数
+            method: 降采样方法 - "lttb"（保留曲线形状）, "minmax"（保留每段的最小/最大值）
+            metrics: 只返回这些指标，为空时返回全部
+        """
+        model_file = self.registry_dir / model_id / "model.json"
+        
+        if not await asyncio.to_thread(lambda: model_file.exists()):
+            return None
+        
+        model_meta = await asyncio.to_thread(_load_json, model_file)
+        job_id = model_meta.get("job_id")
+        
+        if not job_id:
+            raise ValueError("Model has no associated training job")
+        
+        loaded = await asyncio.to_thread(training_history_cache.load_versioned, self.jobs_dir / job_id)
+        if loaded is None:
+            raise ValueError("Training results.csv not found")
+        
+        version, history = loaded
+        series = await asyncio.to_thread(downsample_series, history, points, method, metrics)
+        return {
+            "model_id": model_id,
+            "version": version,
+            "total_epochs": int(len(history["epochs"])),
+            "points": points,
+            "method": method,
+            "series": series,
+        }
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from src.core.settings import settings
+
+
+class ResultCache:
+    """推理结果缓存：内存 LRU（按字节数限额）+ 可选的磁盘层
+
+    - 键：上传内容的哈希 + 模型ID + 权重文件修改时间 + 元数据版本（类别名称） + 推理参数
+    - 值：解析后的检测结果，以 JSON 字节保存（命中时返回新的副本，调用方修改不会影响缓存）
+    - 磁盘层按模型分目录保存在 disk_dir 下，内存未命中时查找，命中后回填内存
+    - 模型更新或删除时按模型ID整体失效
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[Path] = None, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (model_id, JSON字节)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(content: bytes, model_id: str, weights_mtime: float, meta_version: str,
+                 params: Dict[str, Any]) -> str:
+        """由内容哈希、模型ID、权重修改时间、元数据版本（类别名称）和推理参数生成缓存键
+
+        只修改类别名称（不改权重）的模型更新也会使旧键失效：更新期间仍在进行的推理
+        在 invalidate_model 之后写入的旧结果使用旧的元数据版本，不会再被命中
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        params_str = json.dumps(params, sort_keys=True)
+        raw = f"{digest}|{model_id}|{weights_mtime}|{meta_version}|{params_str}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, model_id: str, key: str) -> Path:
+        return self.disk_dir / model_id / key[:2] / f"{key}.json"
+
+    def get(self, model_id: str, key: str) -> Optional[Any]:
+        """查找缓存，未命中返回 None"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return json.loads(item[1])
+
+        if self.disk_dir is not None:
+            try:
+                data = self._disk_path(model_id, key).read_bytes()
+            except OSError:
+                data = None
+            if data is not None:
+                self._store(model_id, key, data)
+                with self._lock:
+                    self._disk_hits += 1
+                return json.loads(data)
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, model_id: str, key: str, value: Any):
+        """写入缓存（同时写入磁盘层）"""
+        if not self.enabled:
+            return
+
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        self._store(model_id, key, data)
+
+        if self.disk_dir is not None:
+            path = self._disk_path(model_id, key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Warning: Failed to write result cache: {e}")
+
+    def _store(self, model_id: str, key: str, data: bytes):
+        """放入内存层，超出限额时按 LRU 淘汰"""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= len(old[1])
+            self._entries[key] = (model_id, data)
+            self._total_bytes += len(data)
+            while self._total_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+    def invalidate_model(self, model_id: str) -> int:
+        """删除某个模型的所有缓存结果，返回移除的内存条目数"""
+        with self._lock:
+            keys = [key for key, (owner, _) in self._entries.items() if owner == model_id]
+            for key in keys:
+                self._total_bytes -= len(self._entries.pop(key)[1])
+
+        if self.disk_dir is not None:
+            model_dir = self.disk_dir / model_id
+            if model_dir.exists():
+                shutil.rmtree(model_dir, ignore_errors=True)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+        if self.disk_dir is not None and self.disk_dir.exists():
+            shutil.rmtree(self.disk_dir, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "disk": self.disk_dir is not None,
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else None,
+            }
+
+
+result_cache = ResultCache(
+    settings.RESULT_CACHE_MAX_BYTES,
+    disk_dir=settings.INFERENCE_RESULTS_DIR / "_cache" if settings.RESULT_CACHE_DISK else None,
+    enabled=settings.RESULT_CACHE_ENABLED,
+)
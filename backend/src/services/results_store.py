@@ -0,0 +1,172 @@
+import csv
+import importlib.util
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# 推理结果CSV的列（每个检测框一行，没有检测结果的图片也记录一行）
+CSV_FIELDS = [
+    "image_uuid", "image_filename", "model_id", "image_width",
+    "image_height", "detection_count", "detection_index",
+    "class_id", "class_name", "confidence", "x1", "y1", "x2", "y2",
+]
+
+DETECTIONS_DIR = "detections"  # 列式检测结果（Parquet 分片）
+
+
+def parquet_available() -> bool:
+    """是否安装了 pyarrow（可选依赖，未安装时只保存 results.jsonl 和 CSV）"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("index", pa.int32()),
+        ("image_uuid", pa.string()),
+        ("image_filename", pa.string()),
+        ("model_id", pa.string()),
+        ("image_width", pa.int32()),
+        ("image_height", pa.int32()),
+        ("detection_count", pa.int32()),
+        ("detection_index", pa.int32()),
+        ("class_id", pa.int32()),
+        ("class_name", pa.string()),
+        ("confidence", pa.float32()),
+        ("x1", pa.float32()),
+        ("y1", pa.float32()),
+        ("x2", pa.float32()),
+        ("y2", pa.float32()),
+    ])
+
+
+def detection_rows(result: dict) -> List[Dict[str, Any]]:
+    """把一张图片的结果展开为检测框行；没有检测结果时返回一行空检测，推理失败的图片不产生行"""
+    if result.get("error"):
+        return []
+    base = {
+        "index": result["index"],
+        "image_uuid": result["image_uuid"],
+        "image_filename": result["image_filename"],
+        "model_id": result["model_id"],
+        "image_width": result["image_width"],
+        "image_height": result["image_height"],
+        "detection_count": result["detection_count"],
+    }
+    if not result["detections"]:
+        return [{**base, "detection_index": None, "class_id": None, "class_name": None,
+                 "confidence": None, "x1": None, "y1": None, "x2": None, "y2": None}]
+    return [
+        {**base, "detection_index": idx, "class_id": det["class_id"], "class_name": det["class_name"],
+         "confidence": det["conf"], "x1": det["x1"], "y1": det["y1"], "x2": det["x2"], "y2": det["y2"]}
+        for idx, det in enumerate(result["detections"])
+    ]
+
+
+class DetectionWriter:
+    """把检测结果按批追加为 Parquet 分片（detections/part-00000.parquet ...）
+
+    每批达到 batch_rows 行时写出一个分片（先写临时文件再改名），内存占用与会话大小无关。
+    未写出的行在服务重启后由 results.jsonl 补写，见 covered_indices。
+    """
+
+    def __init__(self, session_dir: Path, batch_rows: int):
+        self.parts_dir = session_dir / DETECTIONS_DIR
+        self.batch_rows = batch_rows
+        self._rows: List[Dict[str, Any]] = []
+
+    def add(self, result: dict):
+        self._rows.extend(detection_rows(result))
+        if len(self._rows) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        part_number = sum(1 for _ in self.parts_dir.glob("part-*.parquet"))
+        path = self.parts_dir / f"part-{part_number:05d}.parquet"
+        tmp_path = self.parts_dir / f".{path.name}.tmp"
+        table = pa.Table.from_pylist(self._rows, schema=_schema())
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+        self._rows = []
+
+    def covered_indices(self) -> set:
+        """已写入分片的图片序号（只读取 index 列）"""
+        parts = sorted(self.parts_dir.glob("part-*.parquet")) if self.parts_dir.exists() else []
+        if not parts:
+            return set()
+        import pyarrow.parquet as pq
+        covered = set()
+        for part in parts:
+            covered.update(pq.read_table(part, columns=["index"]).column("index").to_pylist())
+        return covered
+
+
+def write_results_csv(csv_path: Path, results: Iterable[dict]):
+    """逐张图片写出推理结果CSV（流式，不需要把所有结果放在内存中）"""
+    with open(csv_path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for result in results:
+            for row in detection_rows(result):
+                row.pop("index")
+                writer.writerow({key: "" if value is None else value for key, value in row.items()})
+
+
+def query_detections(session_dir: Path, results: Iterable[dict], class_name: Optional[str] = None,
+                     class_id: Optional[int] = None, min_conf: Optional[float] = None,
+                     max_conf: Optional[float] = None, image: Optional[str] = None,
+                     offset: int = 0, limit: int = 100, use_parquet: bool = True) -> Dict[str, Any]:
+    """按类别、置信度和图片（文件名或UUID）筛选检测框
+
+    有 Parquet 分片时利用谓词下推和列裁剪，只读取需要的行组；
+    否则（或任务未完成、分片还不完整时）逐行扫描 results（results.jsonl 的迭代器），内存占用只与 limit 有关
+    """
+    parts_dir = session_dir / DETECTIONS_DIR
+    if use_parquet and parquet_available() and parts_dir.exists() and any(parts_dir.glob("part-*.parquet")):
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(sorted(parts_dir.glob("part-*.parquet")), format="parquet", schema=_schema())
+        conditions = []
+        if class_name is not None:
+            conditions.append(pc.field("class_name") == class_name)
+        if class_id is not None:
+            conditions.append(pc.field("class_id") == class_id)
+        if min_conf is not None:
+            conditions.append(pc.field("confidence") >= min_conf)
+        if max_conf is not None:
+            conditions.append(pc.field("confidence") <= max_conf)
+        if image is not None:
+            conditions.append((pc.field("image_filename") == image) | (pc.field("image_uuid") == image))
+        expr = None
+        for condition in conditions:
+            expr = condition if expr is None else expr & condition
+
+        total = dataset.count_rows(filter=expr)
+        items = dataset.scanner(filter=expr).head(offset + limit).slice(offset).to_pylist()
+        return {"total": total, "offset": offset, "limit": limit, "storage": "parquet", "items": items}
+
+    total = 0
+    items = []
+    for result in results:
+        for row in detection_rows(result):
+            if class_name is not None and row["class_name"] != class_name:
+                continue
+            if class_id is not None and row["class_id"] != class_id:
+                continue
+            if min_conf is not None and (row["confidence"] is None or row["confidence"] < min_conf):
+                continue
+            if max_conf is not None and (row["confidence"] is None or row["confidence"] > max_conf):
+                continue
+            if image is not None and image not in (row["image_filename"], row["image_uuid"]):
+                continue
+            if offset <= total < offset + limit:
+                items.append(row)
+            total += 1
+    return {"total": total, "offset": offset, "limit": limit, "storage": "jsonl", "items": items}
@@ -0,0 +1,84 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict
+
+
+class LatestFrameBuffer:
+    """只保留最新一帧的缓冲区（latest-frame-wins）
+
+    生产者不等待消费者：新帧覆盖尚未被取走的旧帧，旧帧计为丢弃，
+    因此慢的客户端收到的帧更少，而不是越积越多。
+    控制事件（视频信息、完成、错误等）不会被丢弃，按放入顺序与帧交替取出。
+    """
+
+    def __init__(self):
+        self._seq = 0
+        self._frame = None  # (序号, 帧事件)
+        self._controls = deque()  # [(序号, 控制事件)]
+        self._event = asyncio.Event()
+        self.dropped = 0
+
+    def put_frame(self, item):
+        self._seq += 1
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = (self._seq, item)
+        self._event.set()
+
+    def put_control(self, item):
+        self._seq += 1
+        self._controls.append((self._seq, item))
+        self._event.set()
+
+    async def get(self):
+        """取出下一个事件：按放入顺序，帧只取最新的一帧"""
+        while self._frame is None and not self._controls:
+            self._event.clear()
+            await self._event.wait()
+        if self._controls and (self._frame is None or self._controls[0][0] < self._frame[0]):
+            return self._controls.popleft()[1]
+        item = self._frame[1]
+        self._frame = None
+        return item
+
+
+class StreamSession:
+    """一次流式视频推理的会话统计"""
+
+    def __init__(self, model_id: str, transport: str):
+        self.session_id = f"stream_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.model_id = model_id
+        self.transport = transport
+        self.buffer = LatestFrameBuffer()
+        self.status = "running"  # running / completed / disconnected / error
+        self.frames_produced = 0
+        self.frames_sent = 0
+        self.started_at = time.time()
+        self.ended_at = None
+
+    @property
+    def frames_dropped(self) -> int:
+        return self.buffer.dropped
+
+    def finish(self, status: str):
+        if self.status == "running":
+            self.status = status
+        if self.ended_at is None:
+            self.ended_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.ended_at or time.time()
+        return {
+            "session_id": self.session_id,
+            "model_id": self.model_id,
+            "transport": self.transport,
+            "status": self.status,
+            "frames_produced": self.frames_produced,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "started_at": self.started_at,
+            "duration_seconds": round(end - self.started_at, 3),
+        }
@@ -7,6 +7,7 @@ import asyncio
 from pathlib import Path
 from datetime import datetime
 from src.core.settings import settings
+from src.services.training_history import training_history_cache
 
 
 def _load_json(path: Path):
@@ -119,7 +120,8 @@ class TrainService:
             "--name", "train",
             "--job_id", job_id,
             "--job_file", str(job_file),
-            "--registry_dir", str(self.registry_dir)
+            "--registry_dir", str(self.registry_dir),
+            "--registry_db", str(settings.REGISTRY_DB)
         ]
         
         if resume:
@@ -133,6 +135,10 @@ class TrainService:
             # 设置环境变量确保 Python 进程输出 UTF-8 编码
             env = os.environ.copy()
             env["PYTHONIOENCODING"] = "utf-8"
+            # 训练脚本注册模型时复用 src.services 中的模型信息和仓库索引代码
+            env["PYTHONPATH"] = os.pathsep.join(
+                path for path in (str(settings.BASE_DIR), env.get("PYTHONPATH")) if path
+            )
             
             process = subprocess.Popen(
                 cmd,
@@ -275,6 +281,7 @@ class TrainService:
                 _delete_directory(train_dir)
             except Exception as e:
                 errors.append(f"Failed to delete train directory: {e}")
+            training_history_cache.invalidate(train_dir)
             
             # 如果有错误，但不影响主要删除操作（文件可能已经被删除或不存在）
             if errors:
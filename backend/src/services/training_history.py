@@ -0,0 +1,271 @@
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# results.csv 列名 -> 训练历史中的指标名
+HISTORY_COLUMNS = {
+    "train/box_loss": "train_box_loss",
+    "train/cls_loss": "train_cls_loss",
+    "train/dfl_loss": "train_dfl_loss",
+    "val/box_loss": "val_box_loss",
+    "val/cls_loss": "val_cls_loss",
+    "val/dfl_loss": "val_dfl_loss",
+    "metrics/precision(B)": "metrics_precision",
+    "metrics/recall(B)": "metrics_recall",
+    "metrics/mAP50(B)": "metrics_mAP50",
+    "metrics/mAP50-95(B)": "metrics_mAP50_95",
+}
+
+CACHE_FILE = "training_history.npz"  # 保存在训练任务目录下
+_STATE_KEY = "__state__"
+
+
+def _parse_float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
+
+
+def _parse_rows(lines: List[str], header: List[str], start_epoch: int) -> Dict[str, "np.ndarray"]:
+    """把 CSV 数据行解析为按指标的数组（缺失或无法解析的值记为 NaN）"""
+    import numpy as np
+
+    positions = {HISTORY_COLUMNS[name]: i for i, name in enumerate(header) if name in HISTORY_COLUMNS}
+    epoch_pos = header.index("epoch") if "epoch" in header else None
+
+    epochs = []
+    values = {key: [] for key in positions}
+    for line in lines:
+        cells = [cell.strip() for cell in line.split(",")]
+        if not any(cells):
+            continue
+        if epoch_pos is not None and epoch_pos < len(cells) and cells[epoch_pos]:
+            epochs.append(int(float(cells[epoch_pos])))
+        else:
+            epochs.append(start_epoch + len(epochs) + 1)
+        for key, pos in positions.items():
+            values[key].append(_parse_float(cells[pos]) if pos < len(cells) else math.nan)
+
+    arrays = {"epochs": np.asarray(epochs, dtype=np.int32)}
+    for key, column in values.items():
+        arrays[key] = np.asarray(column, dtype=np.float64)
+    return arrays
+
+
+def _version(state: dict) -> str:
+    return f"{state['size']:x}-{state['mtime_ns']:x}"
+
+
+class TrainingHistoryCache:
+    """训练历史（results.csv）的解析缓存
+
+    解析结果按指标保存为 NumPy 数组，写入训练任务目录下的 training_history.npz，
+    同时记录 CSV 的路径、大小、修改时间和已解析到的字节偏移：
+    - CSV 未变化时直接返回缓存（进程内缓存只需一次 stat）
+    - 训练过程中 YOLO 只向 CSV 追加行，只解析新增的行并追加到数组
+    - CSV 变小或表头变化（重新训练）时完整重新解析
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._memory: Dict[Path, Tuple[dict, Dict[str, "np.ndarray"]]] = {}
+
+    @staticmethod
+    def _read_cache(job_dir: Path) -> Optional[Tuple[dict, Dict[str, "np.ndarray"]]]:
+        import numpy as np
+
+        try:
+            with np.load(job_dir / CACHE_FILE, allow_pickle=False) as data:
+                state = json.loads(str(data[_STATE_KEY]))
+                arrays = {key: data[key] for key in data.files if key != _STATE_KEY}
+            return state, arrays
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @staticmethod
+    def _write_cache(job_dir: Path, state: dict, arrays: Dict[str, "np.ndarray"]):
+        import numpy as np
+
+        path = job_dir / CACHE_FILE
+        tmp_path = job_dir / f".{CACHE_FILE}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays, **{_STATE_KEY: np.array(json.dumps(state))})
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _find_csv(job_dir: Path, state: Optional[dict]) -> Optional[Path]:
+        if state:
+            csv_path = job_dir / state["csv"]
+            if csv_path.exists():
+                return csv_path
+        for csv_path in job_dir.rglob("results.csv"):
+            return csv_path
+        return None
+
+    def load(self, job_dir: Path) -> Optional[Dict[str, "np.ndarray"]]:
+        """返回训练任务的训练历史数组，没有 results.csv 时返回 None"""
+        loaded = self.load_versioned(job_dir)
+        return loaded[1] if loaded else None
+
+    def load_versioned(self, job_dir: Path) -> Optional[Tuple[str, Dict[str, "np.ndarray"]]]:
+        """返回 (版本, 训练历史数组)，版本由 CSV 的大小和修改时间组成，CSV 变化后版本随之变化"""
+        import numpy as np
+
+        with self._lock:
+            cached = self._memory.get(job_dir) or self._read_cache(job_dir)
+            state, arrays = cached if cached else (None, None)
+
+            csv_path = self._find_csv(job_dir, state)
+            if csv_path is None:
+                return None
+            stat = csv_path.stat()
+            csv_rel = csv_path.relative_to(job_dir).as_posix()
+
+            if state and state["csv"] == csv_rel and state["size"] == stat.st_size \
+                    and state["mtime_ns"] == stat.st_mtime_ns:
+                self._memory[job_dir] = (state, arrays)
+                return _version(state), arrays
+
+            incremental = bool(state) and state["csv"] == csv_rel and stat.st_size >= state["offset"]
+            with open(csv_path, "rb") as f:
+                header_line = f.readline()
+                header = [name.strip() for name in header_line.decode("utf-8").split(",")]
+                if incremental and header == state["header"]:
+                    f.seek(state["offset"])
+                else:
+                    incremental = False
+                data = f.read()
+
+            # 只解析完整的行，写了一半的最后一行留到下次
+            end = data.rfind(b"\n") + 1
+            lines = data[:end].decode("utf-8").splitlines()
+            offset = (state["offset"] if incremental else len(header_line)) + end
+
+            start_epoch = int(arrays["epochs"][-1]) if incremental and len(arrays["epochs"]) else 0
+            parsed = _parse_rows(lines, header, start_epoch)
+            if incremental:
+                arrays = {key: np.concatenate([arrays[key], parsed[key]]) for key in parsed}
+            else:
+                arrays = parsed
+
+            state = {
+                "csv": csv_rel,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "offset": offset,
+                "header": header,
+            }
+            try:
+                self._write_cache(job_dir, state, arrays)
+            except OSError as e:
+                print(f"Error writing training history cache: {e}")
+            self._memory[job_dir] = (state, arrays)
+            return _version(state), arrays
+
+    def invalidate(self, job_dir: Path):
+        with self._lock:
+            self._memory.pop(job_dir, None)
+
+
+def history_to_dict(arrays: Dict[str, "np.ndarray"]) -> Dict[str, Any]:
+    """转换为接口返回的训练历史（与原 results.csv 解析结果的结构相同，NaN 记为 null）"""
+    history = {}
+    for key, values in arrays.items():
+        if not len(values):
+            continue
+        if key == "epochs":
+            history[key] = values.tolist()
+        else:
+            history[key] = [None if math.isnan(v) else v for v in values.tolist()]
+
+    def _last(key):
+        return history[key][-1] if history.get(key) else None
+
+    if history.get("metrics_mAP50"):
+        history["final_metrics"] = {
+            "mAP50": _last("metrics_mAP50"),
+            "mAP50_95": _last("metrics_mAP50_95"),
+            "precision": _last("metrics_precision"),
+            "recall": _last("metrics_recall"),
+        }
+    return history
+
+
+def lttb(x: "np.ndarray", y: "np.ndarray", threshold: int) -> "np.ndarray":
+    """Largest-Triangle-Three-Buckets 降采样，返回保留点的下标（保留首尾点和曲线形状）"""
+    import numpy as np
+
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)  # 中间 threshold-2 个桶的边界
+    selected = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个桶的平均点（最后一个桶用末尾点）
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        # 与上一个选中点、下一个桶平均点组成的三角形面积最大的点
+        areas = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+    return indices
+
+
+def minmax_decimate(y: "np.ndarray", threshold: int) -> "np.ndarray":
+    """最小/最大值抽取：每个桶保留最小值和最大值点，返回保留点的下标（保留峰值）"""
+    import numpy as np
+
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    buckets = np.array_split(np.arange(n), threshold // 2)
+    indices = set()
+    for bucket in buckets:
+        values = y[bucket]
+        indices.add(int(bucket[np.argmin(values)]))
+        indices.add(int(bucket[np.argmax(values)]))
+    indices.update((0, n - 1))
+    return np.fromiter(sorted(indices), dtype=np.int64)
+
+
+def downsample_series(arrays: Dict[str, "np.ndarray"], points: int, method: str = "lttb",
+                      metrics: Optional[List[str]] = None) -> Dict[str, Dict[str, list]]:
+    """把每个指标降采样为最多约 points 个点（跳过 NaN），返回 {指标: {"epochs": [...], "values": [...]}}"""
+    import numpy as np
+
+    if method not in ("lttb", "minmax"):
+        raise ValueError(f"Unsupported downsampling method: {method}")
+
+    epochs = arrays["epochs"]
+    series = {}
+    for key, values in arrays.items():
+        if key == "epochs" or (metrics and key not in metrics):
+            continue
+        valid = ~np.isnan(values)
+        x, y = epochs[valid], values[valid]
+        if not len(x):
+            continue
+        if method == "lttb":
+            keep = lttb(x.astype(np.float64), y, points)
+        else:
+            keep = minmax_decimate(y, points)
+        series[key] = {"epochs": x[keep].tolist(), "values": y[keep].tolist()}
+    return series
+
+
+training_history_cache = TrainingHistoryCache()
@@ -0,0 +1,221 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+_END = object()  # 流结束标记
+
+
+class FrameSampler:
+    """决定哪些帧需要推理，其余帧沿用最近一次的检测结果
+
+    - stride: 每隔 stride 帧推理一次（1 表示每帧都推理）
+    - adaptive: 自适应模式，与上一次推理的帧相比画面变化（缩小后灰度图的平均绝对差，0~255）
+      达到 diff_threshold 时才推理
+    """
+
+    SIGNATURE_SIZE = (64, 36)
+
+    def __init__(self, stride: int = 1, adaptive: bool = False, diff_threshold: float = 8.0):
+        self.stride = max(1, int(stride))
+        self.adaptive = adaptive
+        self.diff_threshold = diff_threshold
+        self._reference = None  # 上一次推理帧的缩略灰度图
+        self.processed = 0
+        self.skipped = 0
+
+    def _signature(self, frame):
+        import cv2
+
+        small = cv2.resize(frame, self.SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def should_infer(self, frame_number: int, frame) -> bool:
+        """frame_number 从 1 开始；第一帧总是推理"""
+        import cv2
+
+        infer = (frame_number - 1) % self.stride == 0
+        if infer and self.adaptive:
+            signature = self._signature(frame)
+            if self._reference is not None and float(cv2.absdiff(signature, self._reference).mean()) < self.diff_threshold:
+                infer = False
+            else:
+                self._reference = signature
+
+        if infer:
+            self.processed += 1
+        else:
+            self.skipped += 1
+        return infer
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stride": self.stride,
+            "adaptive": self.adaptive,
+            "diff_threshold": self.diff_threshold if self.adaptive else None,
+            "processed_frames": self.processed,
+            "skipped_frames": self.skipped,
+        }
+
+
+class StageStats:
+    """流水线单个阶段的统计：处理帧数与实际工作耗时（不含等待队列的时间）"""
+
+    def __init__(self):
+        self.frames = 0
+        self.busy_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "frames": self.frames,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "fps": round(self.frames / self.busy_seconds, 2) if self.busy_seconds > 0 else None,
+        }
+
+
+class _Stopped(Exception):
+    """其他阶段出错或被要求停止"""
+
+
+def _put(q: queue.Queue, item, stop: threading.Event):
+    """阻塞写入有界队列，期间可被 stop 打断"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+    raise _Stopped()
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """阻塞读取队列，期间可被 stop 打断"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    raise _Stopped()
+
+
+def run_video_pipeline(
+    cap,
+    infer_batch: Callable[[List[Any]], List[Any]],
+    sink: Callable[[int, Any, Any], None],
+    batch_size: int = 8,
+    queue_size: int = 32,
+    stop: threading.Event = None,
+    sampler: FrameSampler = None,
+) -> Dict[str, Any]:
+    """三段式视频流水线：解码线程 -> 批量推理（当前线程） -> 编码线程
+
+    - cap: 已打开的 cv2.VideoCapture
+    - infer_batch(frames): 对一批帧推理，返回与帧一一对应的检测结果
+    - sink(frame_number, frame, detections): 编码阶段按原始帧顺序调用（绘制、写出等）
+    - stop: 外部可设置的停止事件（例如客户端断开）
+    - sampler: 抽帧策略，未被选中的帧不推理，沿用最近一次推理的检测结果
+
+    各阶段之间为有界队列，慢的阶段会反压前面的阶段。返回各阶段的帧率统计。
+    """
+    stop = stop or threading.Event()
+    decode_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    encode_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    stats = {"decode": StageStats(), "infer": StageStats(), "encode": StageStats()}
+    errors: List[BaseException] = []
+
+    def _decoder():
+        try:
+            frame_number = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                ret, frame = cap.read()
+                stats["decode"].busy_seconds += time.perf_counter() - start
+                if not ret:
+                    break
+                frame_number += 1
+                stats["decode"].frames += 1
+                # 抽帧判断在解码线程中完成（只需缩略图，开销很小）
+                infer = sampler is None or sampler.should_infer(frame_number, frame)
+                _put(decode_queue, (frame_number, frame, infer), stop)
+            _put(decode_queue, _END, stop)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    def _encoder():
+        try:
+            while True:
+                item = _get(encode_queue, stop)
+                if item is _END:
+                    break
+                frame_number, frame, detections = item
+                start = time.perf_counter()
+                sink(frame_number, frame, detections)
+                stats["encode"].busy_seconds += time.perf_counter() - start
+                stats["encode"].frames += 1
+        except _Stopped:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    decoder = threading.Thread(target=_decoder, name="video-decode", daemon=True)
+    encoder = threading.Thread(target=_encoder, name="video-encode", daemon=True)
+    wall_start = time.perf_counter()
+    decoder.start()
+    encoder.start()
+
+    last_detections: List[Any] = []  # 最近一次推理的检测结果，供跳过的帧沿用
+
+    try:
+        finished = False
+        while not finished:
+            # 阻塞等待第一帧，再尽量凑满一个批次（不等待）
+            batch = [_get(decode_queue, stop)]
+            if batch[0] is _END:
+                break
+            while len(batch) < batch_size:
+                try:
+                    item = decode_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _END:
+                    finished = True
+                    break
+                batch.append(item)
+
+            frames = [frame for _, frame, infer in batch if infer]
+            batch_detections = iter(())
+            if frames:
+                start = time.perf_counter()
+                batch_detections = iter(infer_batch(frames))
+                stats["infer"].busy_seconds += time.perf_counter() - start
+                stats["infer"].frames += len(frames)
+
+            for frame_number, frame, infer in batch:
+                if infer:
+                    last_detections = next(batch_detections)
+                _put(encode_queue, (frame_number, frame, last_detections), stop)
+        _put(encode_queue, _END, stop)
+    except _Stopped:
+        pass
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        encoder.join()
+        stop.set()
+        decoder.join()
+
+    if errors:
+        raise errors[0]
+
+    wall_seconds = time.perf_counter() - wall_start
+    result = {name: stage.to_dict() for name, stage in stats.items()}
+    result["wall_seconds"] = round(wall_seconds, 3)
+    result["fps"] = round(stats["encode"].frames / wall_seconds, 2) if wall_seconds > 0 else None
+    busiest = max(stats, key=lambda name: stats[name].busy_seconds)
+    result["bottleneck"] = busiest
+    return result
@@ -0,0 +1,60 @@
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple
+
+# 本身已压缩的文件直接存储（STORED），再压缩只浪费 CPU
+STORED_SUFFIXES = {
+    ".jpg", ".jpeg", ".png", ".webp", ".gif",
+    ".mp4", ".avi", ".mov", ".zip", ".gz",
+    ".pt", ".pth", ".onnx", ".bin", ".npz",
+}
+
+ZIP_CHUNK_SIZE = 1024 * 1024
+
+
+class _ZipOutput:
+    """ZipFile 的输出目标：只追加、不可 seek，写入的字节由生成器取走后发送"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        if self._chunks:
+            data = b"".join(self._chunks)
+            self._chunks.clear()
+            yield data
+
+
+def compress_type_for(path: Path) -> int:
+    return zipfile.ZIP_STORED if path.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+
+
+def iter_zip(entries: Iterable[Tuple[Path, str]]) -> Iterator[bytes]:
+    """边读文件边生成 ZIP 字节流，不使用临时文件
+
+    entries 为 (文件路径, ZIP内路径)，可以是惰性的生成器；
+    输出不可 seek，每个条目使用数据描述符记录大小和 CRC
+    """
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for path, arcname in entries:
+            zinfo = zipfile.ZipInfo.from_file(path, arcname)
+            zinfo.compress_type = compress_type_for(path)
+            with open(path, "rb") as src, zipf.open(zinfo, "w") as dst:
+                while True:
+                    chunk = src.read(ZIP_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    yield from output.drain()
+            yield from output.drain()
+    # 中央目录
+    yield from output.drain()
@@ -55,6 +55,7 @@ def main():
     parser.add_argument("--job_id", required=True)
     parser.add_argument("--job_file", required=True)
     parser.add_argument("--registry_dir", required=True)
+    parser.add_argument("--registry_db", default=None)
     parser.add_argument("--resume", action="store_true", help="Resume training from last checkpoint")
     
     args = parser.parse_args()
@@ -190,9 +191,24 @@ def main():
             "weights_path": str(weights_path_abs)
         }
         
+        # 计算模型参数信息（失败不影响注册，服务会在首次查看模型详情时补算）
+        try:
+            from src.services.model_info import compute_model_info
+            model_meta["model_info"] = compute_model_info(weights_path_abs, args.imgsz)
+        except Exception as e:
+            print(f"[{datetime.now().isoformat()}] Warning: Failed to compute model info: {e}")
+        
         with open(model_dir / "model.json", "w", encoding="utf-8") as f:
             json.dump(model_meta, f, indent=2, ensure_ascii=False)
         
+        # 更新模型仓库索引（失败不影响注册，服务会在下次列出模型时与仓库目录对账）
+        try:
+            from src.services.model_registry import ModelRegistryIndex
+            registry_db = Path(args.registry_db) if args.registry_db else Path(args.registry_dir).parent / "registry.db"
+            ModelRegistryIndex(Path(args.registry_dir), registry_db).upsert(model_meta)
+        except Exception as e:
+            print(f"[{datetime.now().isoformat()}] Warning: Failed to update model registry index: {e}")
+        
         print(f"[{datetime.now().isoformat()}] Model registered as {model_id}")
         
         # 更新job状态
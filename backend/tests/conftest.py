@@ -0,0 +1,12 @@
+import sys
+from pathlib import Path
+
+# 测试从 backend 目录以 src.* 导入服务代码
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def pytest_configure(config):
+    # 依赖机器负载的耗时/内存预算测试，CI 可用 -m "not perf" 跳过
+    config.addinivalue_line("markers", "perf: wall-clock and memory budget tests sensitive to machine load")
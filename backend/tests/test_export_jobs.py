@@ -0,0 +1,46 @@
+import json
+
+from src.services.export_jobs import ExportJob
+
+
+def _job(tmp_path, total=3):
+    job = ExportJob.create(tmp_path, "model", {}, [f"{i}.jpg" for i in range(total)])
+    job.save()
+    return job
+
+
+def _result(index, error=None):
+    return {"index": index, "image_filename": f"{index}.jpg", "detections": [], "error": error}
+
+
+def test_resume_after_partial_line_keeps_next_result(tmp_path):
+    job = _job(tmp_path)
+    job.append_result(_result(0))
+    # 服务在写第二条结果时中断
+    with open(tmp_path / ExportJob.RESULTS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(_result(1))[:20])
+
+    resumed = ExportJob.load(tmp_path)
+    completed, failed = resumed.completed_indices()
+    assert completed == {0}
+    assert failed == 0
+
+    resumed.start(len(completed), failed)
+    resumed.append_result(_result(1))
+    resumed.append_result(_result(2, error="bad image"))
+
+    assert [result["index"] for result in resumed.iter_results()] == [0, 1, 2]
+    assert resumed.completed_indices() == ({0, 1, 2}, 1)
+
+
+def test_completed_indices_without_results_file(tmp_path):
+    job = _job(tmp_path)
+    assert job.completed_indices() == (set(), 0)
+
+
+def test_complete_last_line_is_kept(tmp_path):
+    job = _job(tmp_path)
+    job.append_result(_result(0))
+    job.append_result(_result(1))
+    assert job.completed_indices() == ({0, 1}, 0)
+    assert len(list(job.iter_results())) == 2
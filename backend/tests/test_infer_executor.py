@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from src.services import infer_executor
+from src.services.infer_executor import use_model
+
+
+class _FakeYOLO:
+    loads = []
+
+    def __init__(self, path, task=None):
+        self.path = path
+        self.task = task
+        _FakeYOLO.loads.append((path, task))
+
+
+@pytest.fixture
+def fake_yolo(monkeypatch):
+    _FakeYOLO.loads = []
+    monkeypatch.setattr("ultralytics.YOLO", _FakeYOLO)
+    monkeypatch.setattr(infer_executor.settings, "INFER_WORKER_MAX_MODELS", 2)
+    infer_executor._worker_models.clear()
+    yield _FakeYOLO
+    infer_executor._worker_models.clear()
+
+
+def _weights(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"weights")
+    return str(path)
+
+
+def _get(path, task="detect"):
+    with use_model((path, task)) as model:
+        return model
+
+
+def test_worker_model_is_cached_and_loaded_with_task(tmp_path, fake_yolo):
+    path = _weights(tmp_path, "a.pt")
+    first = _get(path, "segment")
+    assert _get(path, "segment") is first
+    assert first.task == "segment"
+    assert fake_yolo.loads == [(path, "segment")]
+
+
+def test_replaced_weights_are_reloaded(tmp_path, fake_yolo):
+    path = _weights(tmp_path, "a.pt")
+    first = _get(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    second = _get(path)
+    assert second is not first
+    assert len(fake_yolo.loads) == 2
+    # 旧版本不再占用缓存
+    assert len(infer_executor._worker_models) == 1
+
+
+def test_worker_models_are_bounded_by_lru(tmp_path, fake_yolo):
+    a, b, c = (_weights(tmp_path, f"{name}.pt") for name in "abc")
+    _get(a)
+    _get(b)
+    _get(a)  # a 最近使用，淘汰 b
+    _get(c)
+    assert [key[0] for key in infer_executor._worker_models] == [a, c]
+    _get(b)
+    assert [path for path, _ in fake_yolo.loads] == [a, b, c, b]
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import torch
+
+from src.services.infer_service import _detect_frame_job, _infer_video_job
+
+
+class _Boxes:
+    def __init__(self):
+        self.data = torch.zeros((0, 6))
+
+
+class _Result:
+    def __init__(self):
+        self.boxes = _Boxes()
+
+
+class _SlowModel:
+    """假模型：每次前向推理耗时 delay 秒，记录同时进入推理的调用数"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._guard = threading.Lock()
+
+    def __call__(self, source, **kwargs):
+        with self._guard:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._guard:
+            self.active -= 1
+        return [_Result() for _ in (source if isinstance(source, list) else [source])]
+
+
+def _write_video(path, frames: int):
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 10, (64, 48))
+    for i in range(frames):
+        out.write(np.full((48, 64, 3), i % 256, dtype=np.uint8))
+    out.release()
+
+
+def test_video_job_does_not_block_other_requests_for_the_same_model(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.core.settings.settings.INFER_VIDEO_BATCH_SIZE", 1)
+    video_path = tmp_path / "in.mp4"
+    _write_video(video_path, frames=20)
+    model = _SlowModel(delay=0.05)
+    meta = {"classes": ["a"]}
+
+    video_done = threading.Event()
+    video_result = {}
+
+    def _run_video():
+        video_result.update(_infer_video_job(model, str(video_path), str(tmp_path / "out.mp4"), meta, {}))
+        video_done.set()
+
+    thread = threading.Thread(target=_run_video)
+    thread.start()
+    time.sleep(0.2)
+
+    start = time.perf_counter()
+    assert _detect_frame_job(model, np.zeros((48, 64, 3), dtype=np.uint8), meta, {}) == []
+    waited = time.perf_counter() - start
+
+    # 单帧请求只需等待当前这一次前向推理，而不是整个视频
+    assert not video_done.is_set()
+    assert waited < 0.5
+    thread.join(timeout=10)
+    assert video_result["video_info"]["processed_frames"] == 20
+    # 同一模型对象的前向推理仍然互斥
+    assert model.max_active == 1
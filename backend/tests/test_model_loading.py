@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+
+from src.services.infer_service import InferService
+from src.services.model_pool import ModelPool
+
+
+def _service(load_result, delay: float = 0.2):
+    """InferService 使用独立的模型池，_load_model 替换为计数的假加载"""
+    service = InferService()
+    service.model_pool = ModelPool(max_bytes=1 << 30)
+    calls = []
+    lock = threading.Lock()
+
+    def _fake_load(model_id):
+        with lock:
+            calls.append(model_id)
+        time.sleep(delay)  # 模拟耗时的加载，让并发请求都在加载期间到达
+        return load_result(service, model_id)
+
+    service._load_model = _fake_load
+    return service, calls
+
+
+def _loaded(service, model_id):
+    entry = service.model_pool.put(model_id, object(), {"classes": []}, "/nonexistent/best.pt")
+    return entry, None
+
+
+def _failed(service, model_id):
+    return None, "Model weights not found"
+
+
+async def _get_many(service, model_id, n=10):
+    return await asyncio.gather(*(service._get_model(model_id) for _ in range(n)))
+
+
+def test_concurrent_requests_load_model_once():
+    service, calls = _service(_loaded)
+
+    results = asyncio.run(_get_many(service, "m"))
+
+    assert calls == ["m"]
+    entries = {id(entry) for entry, error in results}
+    assert len(entries) == 1
+    assert all(error is None for _, error in results)
+
+    entry = results[0][0]
+    assert entry.refcount == 10
+    for entry, _ in results:
+        service.model_pool.release(entry)
+    assert entry.refcount == 0
+    assert service._loading == {}
+
+
+def test_load_error_reaches_every_waiter():
+    service, calls = _service(_failed)
+
+    results = asyncio.run(_get_many(service, "m"))
+
+    assert calls == ["m"]
+    assert results == [(None, "Model weights not found")] * 10
+    assert service._loading == {}
+
+    # 失败的加载不会被缓存，之后的请求重新加载
+    asyncio.run(_get_many(service, "m", n=1))
+    assert calls == ["m", "m"]
+
+
+def test_cached_model_is_not_reloaded():
+    service, calls = _service(_loaded, delay=0)
+
+    async def _scenario():
+        first, _ = await service._get_model("m")
+        service.model_pool.release(first)
+        return await _get_many(service, "m", n=5)
+
+    results = asyncio.run(_scenario())
+    assert calls == ["m"]
+    entry = results[0][0]
+    assert entry.refcount == 5
+    for entry, _ in results:
+        service.model_pool.release(entry)
+    assert entry.refcount == 0
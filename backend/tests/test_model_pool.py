@@ -0,0 +1,35 @@
+import torch
+
+from src.services.model_pool import ModelPool
+
+
+class _Loaded:
+    """模拟 ultralytics.YOLO：model 属性为 PyTorch 模块"""
+
+    def __init__(self, numel: int):
+        self.model = torch.nn.Linear(numel, 1, bias=False)
+
+
+def test_measure_load_estimates_size_from_tensors():
+    pool = ModelPool(max_bytes=1 << 30)
+
+    model, memory_bytes, _ = pool.measure_load(lambda: _Loaded(1000))
+    assert memory_bytes == 1000 * 4
+
+
+def test_size_falls_back_to_weights_file(tmp_path):
+    weights = tmp_path / "best.onnx"
+    weights.write_bytes(b"x" * 2048)
+    pool = ModelPool(max_bytes=1 << 30)
+    entry = pool.put("m", object(), {}, str(weights))
+    assert entry.size_bytes == 2048
+
+
+def test_lru_eviction_uses_estimated_sizes(capsys):
+    pool = ModelPool(max_bytes=10_000)
+    pool.put("a", object(), {}, "/nonexistent/a.pt", memory_bytes=4000)
+    pool.put("b", object(), {}, "/nonexistent/b.pt", memory_bytes=4000)
+    pool.get("a")
+    pool.put("c", object(), {}, "/nonexistent/c.pt", memory_bytes=4000)
+    assert [model["model_id"] for model in pool.stats()["models"]] == ["a", "c"]
+    assert "Model pool evicted b" in capsys.readouterr().out
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from src.services.model_registry import ModelRegistryIndex
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry_dir = tmp_path / "registry"
+    for model_id, name in [("m1", "v21"), ("m2", "v_1"), ("m3", "50%_off"), ("m4", "a\\b")]:
+        model_dir = registry_dir / model_id
+        model_dir.mkdir(parents=True)
+        (model_dir / "model.json").write_text(json.dumps({"model_id": model_id, "name": name}), encoding="utf-8")
+    return ModelRegistryIndex(registry_dir, tmp_path / "registry.db")
+
+
+def _names(registry, q):
+    return sorted(model["name"] for model in registry.list(q=q)["models"])
+
+
+def test_search_matches_substring(registry):
+    assert _names(registry, "v") == ["v21", "v_1"]
+    assert _names(registry, "m3") == ["50%_off"]
+
+
+def test_search_treats_like_wildcards_literally(registry):
+    assert _names(registry, "v_1") == ["v_1"]
+    assert _names(registry, "%") == ["50%_off"]
+    assert _names(registry, "_") == ["50%_off", "v_1"]
+    assert _names(registry, "\\") == ["a\\b"]
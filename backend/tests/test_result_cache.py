@@ -0,0 +1,34 @@
+from src.services.model_pool import ModelPool
+from src.services.result_cache import ResultCache
+
+
+def _key(cache, entry, content=b"image", params=None):
+    return cache.make_key(content, entry.model_id, entry.weights_mtime, entry.meta_version, params or {"conf": 0.25})
+
+
+def test_class_rename_invalidates_in_flight_results():
+    cache = ResultCache(max_bytes=1 << 20)
+    pool = ModelPool(max_bytes=1 << 30)
+    old_entry = pool.put("m", object(), {"classes": ["cat"]}, "/nonexistent/best.pt")
+    old_key = _key(cache, old_entry)
+
+    # update_model 修改类别名称（权重不变）并使缓存和模型池失效
+    cache.invalidate_model("m")
+    pool.invalidate("m")
+    # 更新前开始的推理在失效之后才写入旧的结果
+    cache.put("m", old_key, [{"class_name": "cat"}])
+
+    new_entry = pool.put("m", object(), {"classes": ["dog"]}, "/nonexistent/best.pt")
+    new_key = _key(cache, new_entry)
+    assert new_key != old_key
+    assert cache.get("m", new_key) is None
+
+
+def test_same_metadata_reuses_cached_results():
+    cache = ResultCache(max_bytes=1 << 20)
+    pool = ModelPool(max_bytes=1 << 30)
+    entry = pool.put("m", object(), {"classes": ["cat"]}, "/nonexistent/best.pt")
+    cache.put("m", _key(cache, entry), [{"class_name": "cat"}])
+
+    reloaded = pool.put("m", object(), {"classes": ["cat"]}, "/nonexistent/best.pt")
+    assert cache.get("m", _key(cache, reloaded)) == [{"class_name": "cat"}]
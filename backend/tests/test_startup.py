@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.core.settings import settings
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+PERF_PROBES = 3  # 耗时和内存受机器负载影响，取多次测量中最好的一次
+
+# 在全新的解释器中导入 src.main，测量导入耗时（含 FastAPI 等依赖）和导入后的常驻内存
+_PROBE = """
+import json, time
+start = time.perf_counter()
+import src.main
+elapsed = time.perf_counter() - start
+from src.core.startup_profile import startup_profile, HEAVY_MODULES, _rss_mb
+import sys
+print(json.dumps({
+    "import_seconds": elapsed,
+    "rss_mb": _rss_mb(),
+    "heavy_modules_loaded": [name for name in HEAVY_MODULES if name in sys.modules],
+}))
+"""
+
+
+def _probe_startup() -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=str(BACKEND_DIR),
+        capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.perf
+def test_startup_within_budget():
+    results = [_probe_startup() for _ in range(PERF_PROBES)]
+    import_seconds = min(result["import_seconds"] for result in results)
+    assert import_seconds <= settings.STARTUP_IMPORT_BUDGET_SECONDS, results
+    rss_values = [result["rss_mb"] for result in results if result["rss_mb"] is not None]
+    assert rss_values and min(rss_values) <= settings.STARTUP_RSS_BUDGET_MB, results
+
+
+def test_startup_does_not_import_heavy_modules():
+    result = _probe_startup()
+    assert result["heavy_modules_loaded"] == []
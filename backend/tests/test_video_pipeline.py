@@ -0,0 +1,31 @@
+import numpy as np
+
+from src.services.video_pipeline import FrameSampler
+
+
+def _frame(value: int):
+    return np.full((72, 128, 3), value, dtype=np.uint8)
+
+
+def test_adaptive_sampler_skips_static_frames():
+    sampler = FrameSampler(adaptive=True, diff_threshold=8.0)
+    decisions = [sampler.should_infer(i + 1, _frame(100)) for i in range(5)]
+    assert decisions == [True, False, False, False, False]
+    assert sampler.processed == 1
+    assert sampler.skipped == 4
+
+
+def test_adaptive_sampler_infers_on_scene_change():
+    sampler = FrameSampler(adaptive=True, diff_threshold=8.0)
+    assert sampler.should_infer(1, _frame(0))
+    assert not sampler.should_infer(2, _frame(2))
+    assert sampler.should_infer(3, _frame(200))
+    assert not sampler.should_infer(4, _frame(201))
+
+
+def test_stride_with_adaptive():
+    sampler = FrameSampler(stride=2, adaptive=True, diff_threshold=8.0)
+    decisions = [sampler.should_infer(i + 1, _frame(i * 50 % 256)) for i in range(6)]
+    # 偶数帧不在步长上，不参与比较
+    assert decisions[1::2] == [False, False, False]
+    assert decisions[0]
@@ -1,8 +1,26 @@
 import api from './axios'
 
-export const inference = async (modelId: string, file: File) => {
+// 推理参数：未指定的字段使用模型默认值（model.json 的 infer_defaults）
+export interface InferOptions {
+  conf?: number     // 置信度阈值
+  iou?: number      // NMS 的 IoU 阈值
+  imgsz?: number    // 推理输入尺寸
+  max_det?: number  // 每张图片最多检测框数
+  half?: boolean    // FP16（仅 GPU 有效）
+}
+
+const appendInferOptions = (formData: FormData, options?: InferOptions) => {
+  if (!options) return
+  for (const key of ['conf', 'iou', 'imgsz', 'max_det', 'half'] as const) {
+    const value = options[key]
+    if (value !== undefined && value !== null) formData.append(key, value.toString())
+  }
+}
+
+export const inference = async (modelId: string, file: File, options?: InferOptions) => {
   const formData = new FormData()
   formData.append('file', file)
+  appendInferOptions(formData, options)
   const { data } = await api.post(`/infer/${modelId}`, formData)
   return data
 }
@@ -34,8 +52,13 @@ export interface BatchInferenceResult {
   total_images: number
 }
 
-export const batchInference = async (modelIds: string[], files: File[]): Promise<BatchInferenceResult> => {
+export const batchInference = async (
+  modelIds: string[],
+  files: File[],
+  options?: InferOptions
+): Promise<BatchInferenceResult> => {
   const formData = new FormData()
+  appendInferOptions(formData, options)
   
   // 添加模型ID列表（逗号分隔）
   formData.append('model_ids', modelIds.join(','))
@@ -50,15 +73,32 @@ export const batchInference = async (modelIds: string[], files: File[]): Promise
 }
 
 // 视频推理相关接口
+export interface VideoSamplingOptions extends Omit<InferOptions, 'conf'> {
+  stride?: number          // 每隔 stride 帧推理一次
+  adaptive?: boolean       // 自适应模式：画面变化足够大时才推理
+  diffThreshold?: number   // 自适应模式的画面差异阈值（0~255）
+}
+
+const appendSamplingOptions = (formData: FormData, options?: VideoSamplingOptions) => {
+  if (!options) return
+  appendInferOptions(formData, options)
+  if (options.stride !== undefined) formData.append('stride', options.stride.toString())
+  if (options.adaptive !== undefined) formData.append('adaptive', options.adaptive.toString())
+  if (options.diffThreshold !== undefined) formData.append('diff_threshold', options.diffThreshold.toString())
+}
+
 export interface VideoInferenceResult {
   model_id: string
-  video_data: string  // base64编码的视频数据
+  video_id: string
+  video_url: string  // 处理后视频的下载地址（支持 Range 请求）
+  video_size: number
   video_info: {
     fps: number
     width: number
     height: number
     total_frames: number
-    processed_frames: number
+    processed_frames: number  // 实际推理的帧数
+    skipped_frames: number    // 跳过推理、沿用上一次检测结果的帧数
   }
   summary: {
     total_detections: number
@@ -71,12 +111,16 @@ export interface VideoFrameData {
   type: 'info' | 'frame' | 'complete' | 'error'
   // info类型
   fps?: number
+  classes?: string[]
+  session_id?: string  // 流式会话ID，可在 /infer/stream/stats 查看丢帧统计
   width?: number
   height?: number
   total_frames?: number
   // frame类型
   frame_number?: number
-  frame_data?: string  // base64编码的JPEG图片
+  inferred?: boolean  // 该帧是否实际推理（否则沿用上一次的检测结果）
+  frame_data?: string  // base64编码的JPEG图片（SSE接口）
+  frame_image?: Blob   // JPEG图片（二进制帧流接口）
   detections?: {
     class_id: number
     class_name: string
@@ -85,6 +129,8 @@ export interface VideoFrameData {
   }[]
   // complete类型
   processed_frames?: number
+  skipped_frames?: number
+  frames_dropped?: number  // 客户端消费较慢时被丢弃（未发送）的帧数
   // error类型
   error?: string
 }
@@ -95,11 +141,13 @@ export interface VideoFrameData {
 export const videoInference = async (
   modelId: string, 
   file: File, 
-  conf: number = 0.25
+  conf: number = 0.25,
+  options?: VideoSamplingOptions
 ): Promise<VideoInferenceResult> => {
   const formData = new FormData()
   formData.append('file', file)
   formData.append('conf', conf.toString())
+  appendSamplingOptions(formData, options)
   
   const { data } = await api.post(`/infer/video/${modelId}`, formData, {
     timeout: 600000  // 10分钟超时，视频处理可能较慢
@@ -107,6 +155,13 @@ export const videoInference = async (
   return data
 }
 
+/**
+ * 视频推理结果的完整地址（可直接用于 <video> 的 src）
+ */
+export const getVideoResultUrl = (videoUrl: string): string => {
+  return `${import.meta.env.VITE_API_BASE || '/dev-api'}${videoUrl}`
+}
+
 /**
  * 视频推理流式接口：逐帧返回结果
  */
@@ -116,12 +171,14 @@ export const videoInferenceStream = (
   conf: number = 0.25,
   onFrame: (data: VideoFrameData) => void,
   onError?: (error: any) => void,
-  onComplete?: () => void
+  onComplete?: () => void,
+  options?: VideoSamplingOptions
 ): Promise<void> => {
   return new Promise((resolve, reject) => {
     const formData = new FormData()
     formData.append('file', file)
     formData.append('conf', conf.toString())
+    appendSamplingOptions(formData, options)
     
     // 使用fetch API进行流式请求
     fetch(`${import.meta.env.VITE_API_BASE || '/dev-api'}/infer/video/${modelId}/stream`, {
@@ -184,12 +241,153 @@ export const videoInferenceStream = (
   })
 }
 
-export interface InferenceAndSaveResult {
+// 二进制帧流的记录格式（小端），与后端 infer_service 中的定义一致
+const RECORD_HEADER_SIZE = 12  // 类型 u8、标志 u8、检测框数量 u16、帧号 u32、负载长度 u32
+const DETECTION_SIZE = 22      // 类别ID u16、置信度 f32、x1 y1 x2 y2 i32
+const RECORD_TYPES = ['info', 'frame', 'complete', 'error'] as const
+const FLAG_INFERRED = 0x01
+
+/**
+ * 视频推理二进制帧流：原始JPEG字节 + 二进制检测结果，无 base64 / JSON 开销
+ * mode 为 'detections' 时只返回检测结果，不返回图片
+ */
+export const videoInferenceFrames = (
+  modelId: string,
+  file: File,
+  conf: number = 0.25,
+  onFrame: (data: VideoFrameData) => void,
+  onError?: (error: any) => void,
+  onComplete?: () => void,
+  options?: VideoSamplingOptions & { mode?: 'frames' | 'detections' }
+): Promise<void> => {
+  const formData = new FormData()
+  formData.append('file', file)
+  formData.append('conf', conf.toString())
+  formData.append('mode', options?.mode || 'frames')
+  appendSamplingOptions(formData, options)
+  
+  const processStream = async () => {
+    const response = await fetch(`${import.meta.env.VITE_API_BASE || '/dev-api'}/infer/video/${modelId}/frames`, {
+      method: 'POST',
+      body: formData
+    })
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+    
+    const reader = response.body?.getReader()
+    if (!reader) {
+      throw new Error('No response body')
+    }
+    
+    const textDecoder = new TextDecoder()
+    let classes: string[] = []
+    let buffer = new Uint8Array(0)
+    
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      
+      // 追加到缓冲区，按记录头中的长度切分出完整记录
+      const merged = new Uint8Array(buffer.length + value.length)
+      merged.set(buffer)
+      merged.set(value, buffer.length)
+      buffer = merged
+      
+      let offset = 0
+      while (buffer.length - offset >= RECORD_HEADER_SIZE) {
+        const view = new DataView(buffer.buffer, buffer.byteOffset + offset)
+        const type = RECORD_TYPES[view.getUint8(0)]
+        const flags = view.getUint8(1)
+        const count = view.getUint16(2, true)
+        const frameNumber = view.getUint32(4, true)
+        const payloadLength = view.getUint32(8, true)
+        const recordLength = RECORD_HEADER_SIZE + count * DETECTION_SIZE + payloadLength
+        if (buffer.length - offset < recordLength) break
+        
+        const payloadStart = offset + RECORD_HEADER_SIZE + count * DETECTION_SIZE
+        const payload = buffer.subarray(payloadStart, payloadStart + payloadLength)
+        
+        if (type === 'frame') {
+          const detections = []
+          for (let i = 0; i < count; i++) {
+            const base = RECORD_HEADER_SIZE + i * DETECTION_SIZE
+            const classId = view.getUint16(base, true)
+            detections.push({
+              class_id: classId,
+              class_name: classes[classId] ?? `class_${classId}`,
+              conf: view.getFloat32(base + 2, true),
+              bbox: [
+                view.getInt32(base + 6, true),
+                view.getInt32(base + 10, true),
+                view.getInt32(base + 14, true),
+                view.getInt32(base + 18, true)
+              ] as [number, number, number, number]
+            })
+          }
+          onFrame({
+            type: 'frame',
+            frame_number: frameNumber,
+            inferred: (flags & FLAG_INFERRED) !== 0,
+            frame_image: payloadLength > 0 ? new Blob([payload.slice()], { type: 'image/jpeg' }) : undefined,
+            detections
+          })
+        } else {
+          const data = JSON.parse(textDecoder.decode(payload))
+          if (type === 'error') {
+            if (onError) onError(new Error(data.error))
+          } else {
+            if (type === 'info') classes = data.classes || []
+            onFrame({ type, ...data })
+          }
+        }
+        offset += recordLength
+      }
+      buffer = buffer.slice(offset)
+    }
+    
+    if (onComplete) onComplete()
+  }
+  
+  return processStream().catch(error => {
+    if (onError) onError(error)
+    throw error
+  })
+}
+
+export interface ExportJob {
   session_id: string
+  status: 'queued' | 'running' | 'completed' | 'failed'
+  total: number
+  options: InferOptions
+  render: boolean
+  jpeg_quality: number
+}
+
+export interface ExportProgress {
+  session_id: string
+  model_id: string
+  status: 'queued' | 'running' | 'completed' | 'failed'
+  total: number
+  done: number
+  failed: number
+  progress: number
+  elapsed_seconds: number
+  eta_seconds: number | null  // 按当前速度估算的剩余时间
+  created_at: string
+  started_at: string | null
+  completed_at: string | null
+  error: string | null
+}
+
+export interface InferenceAndSaveResult extends ExportProgress {
+  options: InferOptions
   results: {
+    index: number
     image_uuid: string
     image_filename: string
     model_id: string
+    error?: string  // 该图片推理失败（如无法解码）
     image_width: number
     image_height: number
     detection_count: number
@@ -203,11 +401,24 @@ export interface InferenceAndSaveResult {
       y2: number
     }[]
   }[]
-  session_dir: string | null
 }
 
-export const inferenceAndSave = async (modelId: string, files: File[]): Promise<InferenceAndSaveResult> => {
+// 创建后台推理导出任务，立即返回 session_id，进度用 getExportProgress 轮询
+export interface ExportRenderOptions {
+  render?: boolean  // false 时只生成CSV，不绘制结果图片
+  jpeg_quality?: number  // 结果图片的 JPEG 质量（1~100）
+}
+
+export const inferenceAndSave = async (
+  modelId: string,
+  files: File[],
+  options?: InferOptions,
+  renderOptions?: ExportRenderOptions
+): Promise<ExportJob> => {
   const formData = new FormData()
+  appendInferOptions(formData, options)
+  if (renderOptions?.render !== undefined) formData.append('render', String(renderOptions.render))
+  if (renderOptions?.jpeg_quality !== undefined) formData.append('jpeg_quality', String(renderOptions.jpeg_quality))
   files.forEach(file => {
     formData.append('files', file)
   })
@@ -215,6 +426,56 @@ export const inferenceAndSave = async (modelId: string, files: File[]): Promise<
   return data
 }
 
+export const getExportProgress = async (sessionId: string): Promise<ExportProgress> => {
+  const { data } = await api.get(`/infer/results/${sessionId}/progress`)
+  return data
+}
+
+export const getExportResults = async (sessionId: string): Promise<InferenceAndSaveResult> => {
+  const { data } = await api.get(`/infer/results/${sessionId}`)
+  return data
+}
+
+export interface DetectionQuery {
+  class_name?: string
+  class_id?: number
+  min_conf?: number
+  max_conf?: number
+  image?: string  // 图片文件名或 image_uuid
+  offset?: number
+  limit?: number
+}
+
+export interface DetectionRow {
+  index: number
+  image_uuid: string
+  image_filename: string
+  model_id: string
+  image_width: number
+  image_height: number
+  detection_count: number
+  detection_index: number | null  // 没有检测结果的图片为 null
+  class_id: number | null
+  class_name: string | null
+  confidence: number | null
+  x1: number | null
+  y1: number | null
+  x2: number | null
+  y2: number | null
+}
+
+export const queryExportDetections = async (
+  sessionId: string,
+  query: DetectionQuery = {}
+): Promise<{ total: number; offset: number; limit: number; storage: 'parquet' | 'jsonl'; items: DetectionRow[] }> => {
+  const { data } = await api.get(`/infer/results/${sessionId}/detections`, { params: query })
+  return data
+}
+
+export const getExportCsvUrl = (sessionId: string): string => {
+  return `${import.meta.env.VITE_API_BASE || '/dev-api'}/infer/results/${sessionId}/csv`
+}
+
 export const exportInferenceResults = async (sessionId: string): Promise<Blob> => {
   const response = await api.get(`/infer/results/${sessionId}/export`, {
     responseType: 'blob'
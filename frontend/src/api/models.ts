@@ -1,9 +1,38 @@
 import api from './axios'
+import type { InferOptions } from './infer'
 
 export interface UpdateModelRequest {
   name?: string
   description?: string
   tags?: string[]
+  infer_defaults?: InferOptions  // 该模型的默认推理参数
+}
+
+export interface OptimizeModelRequest {
+  formats?: ('onnx' | 'openvino')[]
+  half?: boolean  // FP16（ONNX 需要 GPU）
+  int8?: boolean  // INT8 量化（仅 OpenVINO）
+  imgsz?: number
+}
+
+export interface ModelRuntime {
+  format: string
+  path: string
+  half: boolean
+  int8: boolean
+  imgsz: number
+  size_bytes: number
+  available: boolean
+  exported_at: string
+}
+
+export interface RuntimeBenchmark {
+  latency_ms?: number
+  p50_ms?: number
+  p95_ms?: number
+  load_seconds?: number
+  runs?: number
+  error?: string
 }
 
 export interface ModelDetails {
@@ -19,6 +48,15 @@ export interface ModelDetails {
   name?: string
   description?: string
   tags?: string[]
+  infer_defaults?: InferOptions
+  runtimes?: Record<string, ModelRuntime>
+  benchmark?: {
+    imgsz: number
+    runs: number
+    benchmarked_at: string
+    fastest: string | null
+    results: Record<string, RuntimeBenchmark>
+  }
   file_size?: number
   file_size_mb?: number
   training_metrics?: {
@@ -58,11 +96,35 @@ export interface ModelDetails {
     total_params?: number
     trainable_params?: number
     total_params_m?: number
+    gflops?: number | null
+    input_size?: number
+    stride?: number | null
+    num_classes?: number | null
+    sha256?: string
+    computed_at?: string
   }
 }
 
-export const listModels = async () => {
-  const { data } = await api.get('/models')
+export interface ListModelsQuery {
+  offset?: number
+  limit?: number  // 不指定时返回全部
+  sort?: 'created_at' | 'updated_at' | 'name' | 'model_id' | 'file_size'
+  order?: 'asc' | 'desc'
+  tag?: string
+  class_name?: string
+  q?: string  // 按名称或模型ID搜索
+}
+
+export const listModels = async (query: ListModelsQuery = {}) => {
+  const { data } = await api.get('/models', { params: query })
+  return data
+}
+
+export const listModelFacets = async (): Promise<{
+  tags: { tag: string; count: number }[]
+  classes: { class_name: string; count: number }[]
+}> => {
+  const { data } = await api.get('/models/facets')
   return data
 }
 
@@ -76,6 +138,18 @@ export const updateModel = async (modelId: string, request: UpdateModelRequest)
   return data
 }
 
+export const optimizeModel = async (modelId: string, request: OptimizeModelRequest = {}) => {
+  const { data } = await api.post(`/models/${modelId}/optimize`, request, {
+    timeout: 600000  // 导出可能较慢
+  })
+  return data
+}
+
+export const benchmarkModel = async (modelId: string, runs = 20) => {
+  const { data } = await api.post(`/models/${modelId}/benchmark`, null, { params: { runs }, timeout: 600000 })
+  return data
+}
+
 export const deleteModel = async (modelId: string) => {
   const { data } = await api.delete(`/models/${modelId}`)
   return data
@@ -105,3 +179,26 @@ export const generateTrainingCharts = async (
   })
   return response.data
 }
+
+export interface MetricSeries {
+  model_id: string
+  version: string  // 训练历史版本（results.csv 变化后改变）
+  total_epochs: number
+  points: number
+  method: 'lttb' | 'minmax'
+  series: Record<string, { epochs: number[]; values: number[] }>
+}
+
+export const getMetricSeries = async (
+  modelId: string,
+  options: { points?: number; method?: 'lttb' | 'minmax'; metrics?: string[] } = {}
+): Promise<MetricSeries> => {
+  const { data } = await api.get(`/models/${modelId}/metrics/series`, {
+    params: {
+      points: options.points,
+      method: options.method,
+      metrics: options.metrics?.join(',')
+    }
+  })
+  return data
+}